@@ -3,13 +3,20 @@ pragma solidity ^0.8.0;
 
 import "@openzeppelin/contracts/token/ERC721/ERC721.sol";
 import "@openzeppelin/contracts/token/ERC721/extensions/ERC721URIStorage.sol";
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/Strings.sol";
 import "@chainlink/contracts/src/v0.8/interfaces/VRFCoordinatorV2Interface.sol";
 import "@chainlink/contracts/src/v0.8/VRFConsumerBaseV2.sol";
 
 // Create an NFT contract
 // The tokenURI can be one of the 3 different dogs (randomly selected)
 
-contract AdvancedCollectible is VRFConsumerBaseV2, ERC721, ERC721URIStorage {
+contract AdvancedCollectible is
+    VRFConsumerBaseV2,
+    ERC721,
+    ERC721URIStorage,
+    Ownable
+{
     // events for each mapping update
     event AssignBreed(uint256 tokenId, uint256 breedIndex); // tokenIdToBreed
     event RequestCollectible(uint256 requestId, address owner); // requestIdToOwner
@@ -25,6 +32,8 @@ contract AdvancedCollectible is VRFConsumerBaseV2, ERC721, ERC721URIStorage {
     // string[] _breedURIs;
     mapping(uint256 => Breed) public tokenIdToBreed;
     mapping(uint256 => address) public requestIdToOwner;
+    // base URI mode: tokenURI = baseURI + tokenId + ".json", if the base URI is set
+    string public baseURI;
 
     // VRF variables
     uint64 public immutable subscriptionId;
@@ -76,6 +85,26 @@ contract AdvancedCollectible is VRFConsumerBaseV2, ERC721, ERC721URIStorage {
         _setTokenURI(tokenId, _tokenURI);
     }
 
+    // set the token URIs of many tokens in a single transaction
+    function setTokenURIs(
+        uint256[] calldata tokenIds,
+        string[] calldata _tokenURIs
+    ) public {
+        require(
+            tokenIds.length == _tokenURIs.length,
+            "Token IDs and URIs length mismatch!"
+        );
+        for (uint256 i = 0; i < tokenIds.length; i++) {
+            setTokenURI(tokenIds[i], _tokenURIs[i]);
+        }
+    }
+
+    // switch to the base URI mode (or back to the per-token URIs, with "")
+    function setBaseURI(string memory _newBaseURI) public onlyOwner {
+        baseURI = _newBaseURI;
+        emit BatchMetadataUpdate(0, type(uint256).max);
+    }
+
     // The following functions are overrides required by Solidity.
     // due to the ERC721URIStorage inherittance
 
@@ -88,6 +117,13 @@ contract AdvancedCollectible is VRFConsumerBaseV2, ERC721, ERC721URIStorage {
     function tokenURI(
         uint256 tokenId
     ) public view override(ERC721, ERC721URIStorage) returns (string memory) {
+        if (bytes(baseURI).length > 0) {
+            _requireMinted(tokenId);
+            return
+                string(
+                    abi.encodePacked(baseURI, Strings.toString(tokenId), ".json")
+                );
+        }
         return super.tokenURI(tokenId);
     }
 
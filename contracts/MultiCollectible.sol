@@ -42,6 +42,7 @@ contract MultiCollectible is
         uint256 amount;
     }
     mapping(uint256 => OwnerRecord) public requestIdToOwnerRecord;
+    mapping(uint256 => uint256) public requestIdToLots; // batched requests only
 
     // VRF variables
     uint64 public immutable subscriptionId;
@@ -50,6 +51,8 @@ contract MultiCollectible is
     uint32 _callbackGasLimit = 500000;
     uint16 _minRequestConfirmations = 3; // The default is 3, but you can set this higher.
     uint32 _numWords = 1; // number of random words to retrieve
+    uint32 public constant MAX_LOTS = 100; // lots per batched request
+    uint32 _callbackGasPerLot = 10000; // extra callback gas per batched lot
 
     constructor(
         string memory _name,
@@ -96,8 +99,18 @@ contract MultiCollectible is
     function getTokenMinimumPrice(
         uint256 _tokenId
     ) public view returns (uint256) {
+        return _tokenMinimumPrice(_tokenId, _ethUsdPrice());
+    }
+
+    function _ethUsdPrice() internal view returns (uint256) {
         (, int answer, , , ) = _dataFeed.latestRoundData();
-        uint256 price = uint256(answer * 10000000000);
+        return uint256(answer * 10000000000);
+    }
+
+    function _tokenMinimumPrice(
+        uint256 _tokenId,
+        uint256 price
+    ) internal view returns (uint256) {
         uint256 precision = 1 * 10 ** 18;
         BreedInfo memory breedInfo = listBreedInfo[_tokenId];
         return (breedInfo.usdMinimumPrice * precision * precision) / price;
@@ -128,15 +141,42 @@ contract MultiCollectible is
         return requestId;
     }
 
+    /*
+     * To mint several lots in a single VRF request, the paid value is split
+     * evenly and each lot gets its own random breed and token amount.
+     */
+    function createCollectibles(
+        uint32 numLots
+    ) public payable returns (uint256) {
+        require(numLots > 0 && numLots <= MAX_LOTS, "Invalid number of lots!");
+        require(msg.value / numLots >= getEntranceFee(), "Insufficient fee!");
+        requestId = _coordinator.requestRandomWords(
+            keyHash,
+            subscriptionId,
+            _minRequestConfirmations,
+            _callbackGasLimit + numLots * _callbackGasPerLot,
+            numLots
+        );
+        requestIdToOwnerRecord[requestId] = OwnerRecord(msg.sender, msg.value);
+        requestIdToLots[requestId] = numLots;
+        emit RequestCollectible(requestId, msg.sender, msg.value);
+        return requestId;
+    }
+
     // override the fulfill random callback
     function fulfillRandomWords(
         uint256 _requestId,
         uint256[] memory _randomWords
     ) internal override {
         require(_randomWords.length > 0, "Random words NOT found!");
+        OwnerRecord memory ownerRecord = requestIdToOwnerRecord[_requestId];
+        uint256 numLots = requestIdToLots[_requestId];
+        if (numLots > 0) {
+            _mintLots(ownerRecord, numLots, _randomWords);
+            return;
+        }
         // Pick the random breed type and calulate the token amount
         uint256 breedId = _randomWords[0] % (uint256(type(Breed).max) + 1);
-        OwnerRecord memory ownerRecord = requestIdToOwnerRecord[_requestId];
         uint256 breedPrice = getTokenMinimumPrice(breedId);
         uint256 tokenAmount = ownerRecord.amount / breedPrice;
 
@@ -145,4 +185,36 @@ contract MultiCollectible is
         // Emit event
         emit MintedCollectible(ownerRecord.owner, breedId, tokenAmount);
     }
+
+    /*
+     * To mint the lots of a batched request with a single `_mintBatch`, the
+     * price is read once and the amounts are summed per breed.
+     */
+    function _mintLots(
+        OwnerRecord memory ownerRecord,
+        uint256 numLots,
+        uint256[] memory _randomWords
+    ) internal {
+        require(_randomWords.length >= numLots, "Random words NOT found!");
+        uint256 numBreeds = uint256(type(Breed).max) + 1;
+        uint256 lotAmount = ownerRecord.amount / numLots;
+        uint256 price = _ethUsdPrice();
+        uint256[] memory ids = new uint256[](numBreeds);
+        uint256[] memory lotTokenAmounts = new uint256[](numBreeds);
+        uint256[] memory amounts = new uint256[](numBreeds);
+        for (uint256 i = 0; i < numBreeds; i++) {
+            ids[i] = i;
+            lotTokenAmounts[i] = lotAmount / _tokenMinimumPrice(i, price);
+        }
+        for (uint256 i = 0; i < numLots; i++) {
+            uint256 breedId = _randomWords[i] % numBreeds;
+            amounts[breedId] += lotTokenAmounts[breedId];
+            emit MintedCollectible(
+                ownerRecord.owner,
+                breedId,
+                lotTokenAmounts[breedId]
+            );
+        }
+        _mintBatch(ownerRecord.owner, ids, amounts, "");
+    }
 }
@@ -1,7 +1,7 @@
-import time, random
-from typing import Optional
-from brownie import AdvancedCollectible, network
-from .create_metadata import generate_metadata
+import os, time, random, threading
+from typing import Callable, Dict, List, Optional
+from brownie import AdvancedCollectible, network, web3
+from .create_metadata import generate_base_uri_metadata, generate_metadata
 from scripts.utils import (
     get_account,
     get_contract,
@@ -10,10 +10,28 @@ from scripts.utils import (
     LOCAL_BLOCKCHAIN_ENV,
 )
 from scripts.utils_ipfs import add_to_ipfs
+from scripts.chain_reader import read_token_range
+from scripts.mint_pipeline import (
+    MintResult,
+    broadcast_requests,
+    run_pipeline,
+    report,
+)
+from scripts.vrf_fulfillment import wait_for_fulfillment
+from scripts.tx_broadcaster import get_broadcaster
+from scripts.profiling import profiled
+
+URI_PROBE_SIZE = 8  # tokens in the gas estimation probe batch
+URI_BATCH_GAS_FRACTION = 0.5  # of the block gas limit per `setTokenURIs` tx
 
 
+@profiled()
 def create_collectible(
-    collectible, account, rng: Optional[int] = None, is_set_uri: bool = False
+    collectible,
+    account,
+    rng: Optional[int] = None,
+    is_set_uri: bool = False,
+    use_base_uri: bool = False,
 ):
     print(f"Creating collectible ...")
     # create the collectible here
@@ -32,13 +50,20 @@ def create_collectible(
         fulfill_tx.wait(1)
     else:
         print(f"Waiting for the VRF fulfill ...")
-        time.sleep(60)
-    # print(f"Request ID: {request_id}, Token Storage: {collectible.tokenIdToBreed()}")
+    # follow the fulfillment logs instead of reading the (racy) token counter
+    assign_event = wait_for_fulfillment(
+        collectible=collectible,
+        request_id=request_id,
+        from_block=create_tx.block_number,
+    )
 
     # set the Token URI here
-    last_token_id = int(collectible.tokenCounter() - 1)
+    last_token_id = int(assign_event["tokenId"])
     token_uri = ""
-    if is_set_uri:
+    if is_set_uri and use_base_uri:
+        base_uri = set_base_uri(collectible=collectible, account=account)
+        token_uri = f"{base_uri}{last_token_id}.json"
+    elif is_set_uri:
         print(f"Proceed to set the Token URI for #{last_token_id}")
         token_uri = set_token_uri(
             collectible=collectible, account=account, token_id=last_token_id
@@ -55,6 +80,7 @@ def create_collectible(
     return create_tx, token_uri
 
 
+@profiled()
 def set_token_uri(collectible, account, token_id: int):
     token_metadata = generate_metadata(token_id=token_id)  # create metadata
     token_uri = f"ipfs://{add_to_ipfs(token_metadata)}"  # create token URI
@@ -63,6 +89,474 @@ def set_token_uri(collectible, account, token_id: int):
     return token_uri
 
 
+@profiled()
+def set_base_uri(collectible, account) -> str:
+    """
+    To switch the collectible to the base URI mode: the metadata of every minted
+    token is generated and pinned as one directory, then the base URI is set (only
+    if it changed), instead of one pin and one transaction per token.
+
+    Returns
+    -------
+    `str`: The base URI.
+    """
+    tokens = [(s.token_id, s.breed) for s in read_token_range(collectible) if s.exists]
+    metadata_directory = generate_base_uri_metadata(collectible, tokens)
+    base_uri = f"ipfs://{add_to_ipfs(metadata_directory)}/"
+    if collectible.baseURI() != base_uri:
+        print(f"Setting the base URI of {len(tokens)} token(s) to '{base_uri}' ...")
+        collectible.setBaseURI(base_uri, {"from": account}).wait(1)
+    return base_uri
+
+
+def estimate_uri_chunk_size(
+    collectible, account, token_uris: Dict[int, str], gas_limit: int
+) -> int:
+    """
+    To estimate how many token URIs fit in a `setTokenURIs` transaction within the
+    gas limit. The per-token gas is measured on a small probe batch, then scaled by
+    the storage words of the longest URI.
+    """
+    token_ids = list(token_uris.keys())
+    probe_ids = token_ids[:URI_PROBE_SIZE]
+    probe_uris = [token_uris[token_id] for token_id in probe_ids]
+    gas_one = collectible.setTokenURIs.estimate_gas(
+        probe_ids[:1], probe_uris[:1], {"from": account}
+    )
+    if len(probe_ids) == 1:
+        return 1
+    gas_probe = collectible.setTokenURIs.estimate_gas(
+        probe_ids, probe_uris, {"from": account}
+    )
+    gas_per_token = (gas_probe - gas_one) / (len(probe_ids) - 1)
+    gas_base = max(0, gas_one - gas_per_token)
+    # a string costs one storage slot per 32 bytes (plus the length slot)
+    probe_words = max(len(uri) for uri in probe_uris) // 32 + 1
+    max_words = max(len(uri) for uri in token_uris.values()) // 32 + 1
+    gas_per_token *= max(1.0, max_words / probe_words)
+    return max(1, int((gas_limit - gas_base) / gas_per_token))
+
+
+@profiled()
+def set_token_uris(
+    collectible,
+    account,
+    token_uris: Dict[int, str],
+    gas_limit: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Dict[int, Optional[str]]:
+    """
+    To set many token URIs with batched `setTokenURIs` transactions. The batches
+    are sized by gas and broadcast concurrently.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    account: `brownie.network.account.Account`
+        The owner (or approved) account of the tokens.
+    token_uris: `Dict[int, str]`
+        The token ID to token URI mapping.
+    gas_limit: `Optional[int]`
+        The gas budget per transaction, defaults to a fraction of the block gas limit.
+    chunk_size: `Optional[int]`
+        The number of tokens per transaction, estimated from `gas_limit` if None.
+
+    Returns
+    -------
+    `Dict[int, Optional[str]]`: The token ID to error mapping, None if the URI is set.
+    """
+    if len(token_uris) == 0:
+        return {}
+    if chunk_size is None:
+        if gas_limit is None:
+            block_gas_limit = web3.eth.get_block("latest")["gasLimit"]
+            gas_limit = int(block_gas_limit * URI_BATCH_GAS_FRACTION)
+        chunk_size = estimate_uri_chunk_size(
+            collectible, account, token_uris, gas_limit
+        )
+    token_ids = list(token_uris.keys())
+    chunks = [
+        token_ids[i : i + chunk_size] for i in range(0, len(token_ids), chunk_size)
+    ]
+    print(f"Setting {len(token_ids)} token URI(s) in {len(chunks)} transaction(s) ...")
+    broadcaster = get_broadcaster(account)
+    futures = [
+        broadcaster.send(
+            collectible.setTokenURIs, chunk, [token_uris[i] for i in chunk]
+        )
+        for chunk in chunks
+    ]
+    errors = {}
+    for chunk, future in zip(chunks, futures):
+        try:
+            future.result()
+            error = None
+        except Exception as e:
+            error = repr(e)
+        errors.update({token_id: error for token_id in chunk})
+    return errors
+
+
+class TokenURIBatcher:
+    """
+    A `set_uri` stage of the mint pipeline (see `run_pipeline`), batching the pinned
+    token URIs: a gas-sized `setTokenURIs` transaction is sent as soon as enough
+    tokens are pinned, so a slow token only holds back its own batch. The batch size
+    is estimated on the first `URI_PROBE_SIZE` pinned tokens, and the leftover
+    tokens are sent by `flush` once the pipeline is done.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    account: `brownie.network.account.Account`
+        The owner (or approved) account of the tokens.
+    gas_limit: `Optional[int]`
+        The gas budget per transaction, defaults to a fraction of the block gas limit.
+    chunk_size: `Optional[int]`
+        The number of tokens per transaction, estimated from `gas_limit` if None.
+    on_set: `Optional[Callable[[List[MintResult]], None]]`
+        Called with the tokens of every confirmed batch, e.g. to journal them.
+    """
+
+    def __init__(
+        self,
+        collectible,
+        account,
+        gas_limit: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        on_set: Optional[Callable[[List[MintResult]], None]] = None,
+    ):
+        self.collectible = collectible
+        self.account = account
+        self.gas_limit = gas_limit
+        self.chunk_size = chunk_size
+        self.on_set = on_set
+        self.batches = 0
+        self._pending: List[MintResult] = []
+        self._queued_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def _estimate_chunk_size(self, results: List[MintResult]) -> int:
+        gas_limit = self.gas_limit
+        if gas_limit is None:
+            block_gas_limit = web3.eth.get_block("latest")["gasLimit"]
+            gas_limit = int(block_gas_limit * URI_BATCH_GAS_FRACTION)
+        return estimate_uri_chunk_size(
+            self.collectible,
+            self.account,
+            {r.token_id: r.token_uri for r in results},
+            gas_limit,
+        )
+
+    def __call__(self, result: MintResult):
+        with self._lock:
+            self._queued_at[id(result)] = time.perf_counter()
+            self._pending.append(result)
+            if self.chunk_size is None:
+                if len(self._pending) < URI_PROBE_SIZE:
+                    return
+                try:
+                    self.chunk_size = self._estimate_chunk_size(self._pending)
+                except Exception:
+                    self._pending.remove(result)  # failed by the pipeline
+                    raise
+            batches = []
+            while len(self._pending) >= self.chunk_size:
+                batches.append(self._pending[: self.chunk_size])
+                self._pending = self._pending[self.chunk_size :]
+        if batches:
+            self._send(batches)
+
+    def flush(self):
+        """To send the leftover pinned tokens, below a full batch."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if len(pending) == 0:
+            return
+        try:
+            chunk_size = self.chunk_size or self._estimate_chunk_size(pending)
+        except Exception as e:
+            for r in pending:
+                r.error = f"set_uri: {e!r}"
+            return
+        self._send(
+            [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        )
+
+    def _send(self, batches: List[List[MintResult]]):
+        broadcaster = get_broadcaster(self.account)
+        futures = [
+            broadcaster.send(
+                self.collectible.setTokenURIs,
+                [r.token_id for r in batch],
+                [r.token_uri for r in batch],
+            )
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            try:
+                future.result()
+                error = None
+            except Exception as e:
+                error = repr(e)
+            now = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                for r in batch:
+                    r.timings["set_uri"] = now - self._queued_at.pop(id(r), now)
+                    if error is not None:
+                        r.error = f"set_uri: {error}"
+            if error is None and self.on_set is not None:
+                self.on_set(batch)
+
+
+@profiled()
+def mint_many(
+    collectible,
+    account,
+    n: int,
+    rngs: Optional[List[int]] = None,
+    is_set_uri: bool = True,
+    use_base_uri: bool = False,
+    max_workers: int = 4,
+    vrf_simulator=None,
+    journal=None,
+) -> List[MintResult]:
+    """
+    To mint N collectibles in a batch. The requests are sent back-to-back, then each
+    token moves independently through the fulfillment, metadata, IPFS pin and
+    token URI stages.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    account: `brownie.network.account.Account`
+        The minting account.
+    n: `int`
+        The number of collectibles to mint.
+    rngs: `Optional[List[int]]`
+        The random number per mint, only used on the local chain.
+    is_set_uri: `bool`
+        Generate, pin and set the token URI of every minted token.
+    use_base_uri: `bool`
+        Set the URIs with the base URI mode (see `set_base_uri`) instead of per token.
+    max_workers: `int`
+        The number of workers per pipeline stage.
+    vrf_simulator: `Optional[VRFSimulator]`
+        The running local VRF fulfiller (see `vrf_simulator`), if given, the
+        requests are left to it instead of being fulfilled right away.
+    journal: `Optional[DropJournal]`
+        The journal recording every completed step (see `drop_journal`), so an
+        interrupted run can be finished with `resume_mints`.
+
+    Returns
+    -------
+    `List[MintResult]`: The per-token results, in request order.
+    """
+    print(f"Creating {n} collectible(s) ...")
+    start = time.perf_counter()
+    broadcaster = get_broadcaster(account)
+    target = "uri_set" if is_set_uri else "fulfilled"  # the last journaled step
+    if journal is not None:
+        run_id = journal.start_run(
+            collectible.address,
+            account.address,
+            from_block=web3.eth.block_number,
+            n=n,
+            target=target,
+        )
+    results = broadcast_requests(
+        collectible.createCollectible, broadcaster=broadcaster, n=n
+    )
+    if journal is not None:
+        journal.record_many(
+            collectible.address,
+            [r for r in results if r.ok],
+            "sent",
+            run_id=run_id,
+            target=target,
+        )
+    _complete_mints(
+        collectible,
+        account,
+        results,
+        rngs=rngs,
+        is_set_uri=is_set_uri,
+        use_base_uri=use_base_uri,
+        max_workers=max_workers,
+        vrf_simulator=vrf_simulator,
+        journal=journal,
+    )
+    report(results, elapsed=time.perf_counter() - start)
+    return results
+
+
+@profiled()
+def resume_mints(
+    collectible,
+    account,
+    journal,
+    use_base_uri: bool = False,
+    max_workers: int = 4,
+) -> List[MintResult]:
+    """
+    To finish the journaled mints of an interrupted run, only the steps not
+    completed yet are run (nothing is requested or paid again).
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    account: `brownie.network.account.Account`
+        The owner (or approved) account of the tokens.
+    journal: `DropJournal`
+        The journal of the interrupted run (see `drop_journal`).
+    use_base_uri: `bool`
+        Set the URIs with the base URI mode (see `set_base_uri`) instead of per token.
+    max_workers: `int`
+        The number of workers per pipeline stage.
+
+    Returns
+    -------
+    `List[MintResult]`: The per-token results of the resumed tokens.
+    """
+    start = time.perf_counter()
+    resumed = []
+    for target, results in journal.get_unfinished(collectible.address).items():
+        print(f"Resuming {len(results)} collectible(s) up to '{target}' ...")
+        _complete_mints(
+            collectible,
+            account,
+            results,
+            is_set_uri=target == "uri_set",
+            use_base_uri=use_base_uri,
+            max_workers=max_workers,
+            journal=journal,
+            resumed=True,
+        )
+        resumed += results
+    if len(resumed) == 0:
+        print("Nothing to resume, every journaled mint is finished.")
+        return resumed
+    report(resumed, elapsed=time.perf_counter() - start)
+    return resumed
+
+
+def _complete_mints(
+    collectible,
+    account,
+    results: List[MintResult],
+    rngs: Optional[List[int]] = None,
+    is_set_uri: bool = True,
+    use_base_uri: bool = False,
+    max_workers: int = 4,
+    vrf_simulator=None,
+    journal=None,
+    resumed: bool = False,
+):
+    """
+    To move the sent requests through the remaining stages, the stages already
+    done (a known token ID, metadata file or token URI) are skipped.
+    """
+    broadcaster = get_broadcaster(account)
+    is_local = network.show_active() in LOCAL_BLOCKCHAIN_ENV
+    vrf = get_contract(contract_name="vrf_coordinator")
+    poll_kwargs = {}
+    if vrf_simulator is not None:  # follow the simulated fulfillments closely
+        poll_kwargs = {
+            "poll_interval": vrf_simulator.poll_interval,
+            "max_poll_interval": vrf_simulator.poll_interval,
+        }
+
+    def record(result: MintResult, step: str):
+        if journal is not None:
+            journal.record(collectible.address, result, step)
+
+    def fulfill(result: MintResult):
+        if result.token_id is not None:
+            return
+        assign_event = None
+        if resumed:  # it may have been fulfilled before the interruption
+            try:
+                assign_event = wait_for_fulfillment(
+                    collectible=collectible,
+                    request_id=result.request_id,
+                    from_block=result.request_block,
+                    timeout=0,
+                )
+            except TimeoutError:
+                pass
+        if assign_event is None and is_local and vrf_simulator is None:
+            # manually fulfill the request
+            winning_rng = (
+                random.randint(100, 100000) if rngs is None else rngs[result.index]
+            )
+            broadcaster.send(
+                vrf.fulfillRandomWordsWithOverride,
+                result.request_id,
+                collectible.address,
+                [winning_rng],
+            ).result()
+        if assign_event is None:
+            assign_event = wait_for_fulfillment(
+                collectible=collectible,
+                request_id=result.request_id,
+                from_block=result.request_block,
+                **poll_kwargs,
+            )
+        result.token_id = int(assign_event["tokenId"])
+        result.breed = int(assign_event["breedIndex"])
+        record(result, "fulfilled")
+
+    def create_metadata(result: MintResult):
+        if result.metadata_path and os.path.exists(result.metadata_path):
+            return
+        result.metadata_path = generate_metadata(
+            token_id=result.token_id, breed_id=result.breed
+        )
+        record(result, "metadata")
+
+    def pin_metadata(result: MintResult):
+        if result.token_uri:
+            return
+        result.token_uri = f"ipfs://{add_to_ipfs(result.metadata_path)}"
+        record(result, "pinned")
+
+    def record_uris(batch: List[MintResult]):
+        if journal is not None:
+            journal.record_many(collectible.address, batch, "uri_set")
+
+    uri_batcher = None
+    stages = [("fulfill", fulfill)]
+    if is_set_uri and not use_base_uri:
+        uri_batcher = TokenURIBatcher(collectible, account, on_set=record_uris)
+        stages += [
+            ("metadata", create_metadata),
+            ("pin", pin_metadata),
+            ("set_uri", uri_batcher),
+        ]
+    run_pipeline(results, stages=stages, max_workers=max_workers)
+    if uri_batcher is not None:  # the tokens below a full batch
+        uri_batcher.flush()
+    if is_set_uri and use_base_uri:  # one directory pin and one transaction
+        set_uri_start = time.perf_counter()
+        base_uri = set_base_uri(collectible, account)
+        for r in results:
+            if r.ok:
+                r.token_uri = f"{base_uri}{r.token_id}.json"
+                r.timings["set_uri"] = time.perf_counter() - set_uri_start
+        if journal is not None:
+            journal.record_many(
+                collectible.address, [r for r in results if r.ok], "uri_set"
+            )
+    if journal is not None:
+        journal.record_errors(collectible.address, results)
+    return results
+
+
 def main():
     create_collectible(
         collectible=AdvancedCollectible[-1], account=get_account(), is_set_uri=True
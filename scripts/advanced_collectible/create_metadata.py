@@ -1,12 +1,24 @@
-import json
+import os
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from brownie import AdvancedCollectible, network
-from metadata.sample_metadata import metadata_template_puppies
 from scripts.utils import get_breed
 from scripts.utils_ipfs import add_to_ipfs
+from scripts.chain_reader import read_token_range
+from scripts.event_indexer import EventIndexer
+from scripts.metadata_builder import (
+    build_collection_metadata,
+    build_erc721_metadata,
+    get_breed_image_path,
+    render_erc721_metadata,
+    write_json_atomic,
+)
 
+# the base URI mode directories, overridden by the BASE_URI_METADATA_ROOT env variable
+DEFAULT_BASE_URI_METADATA_ROOT = "./metadata/erc721-base"
 
-def generate_metadata(token_id: int) -> str:
+
+def generate_metadata(token_id: int, breed_id: Optional[int] = None) -> str:
     """
     To generate the token metadata
 
@@ -14,35 +26,124 @@ def generate_metadata(token_id: int) -> str:
     ----------
     token_id: `int`
         The specific token ID.
+    breed_id: `Optional[int]`
+        The token breed ID, if None, read it from the latest deployed collectible.
 
     Returns
     -------
     `str`: The token metadata filepath.
     """
-    advanced_collectible = AdvancedCollectible[-1]
-    breed = get_breed(advanced_collectible.tokenIdToBreed(token_id))
-    breed_name = " ".join(breed.split("_")).title()
+    if breed_id is None:
+        breed_id = AdvancedCollectible[-1].tokenIdToBreed(token_id)
+    breed = get_breed(breed_id)
     # generate filenames
     metadata_filepath = (
         f"./metadata/erc721/{network.show_active()}/{token_id}-{breed}.json"
     )
-    image_filepath = f"./img/{breed.lower().replace('_', '-')}.png"
+    image_filepath = get_breed_image_path(breed)
 
     # check if metadata already exists
-    metadata = metadata_template_puppies
     if Path(metadata_filepath).exists():
         print(f"Metadata already exists: '{metadata_filepath}'!")
         return metadata_filepath
     # create the image metadata here
     print(f"Creating metadata file: '{metadata_filepath}' ...")
-    metadata["name"] = breed_name
-    metadata["description"] = f"An adorable {breed_name} pup!"
-    metadata["image"] = f"ipfs://{add_to_ipfs(filepath=image_filepath)}"
+    image_uri = f"ipfs://{add_to_ipfs(filepath=image_filepath)}"
     # store the metadata
-    with open(metadata_filepath, "w") as f:
-        json.dump(metadata, f)
+    write_json_atomic(metadata_filepath, render_erc721_metadata(breed, image_uri))
     return metadata_filepath
 
 
+def generate_collection_metadata(
+    tokens: List[Tuple[int, int]], max_workers: int = 8
+) -> Dict[int, str]:
+    """
+    To generate the metadata of many tokens at once, the breed images are pinned
+    once and the files are written in parallel.
+
+    Parameters
+    ----------
+    tokens: `List[Tuple[int, int]]`
+        The (token ID, breed ID) pairs.
+    max_workers: `int`
+        The number of writer threads.
+
+    Returns
+    -------
+    `Dict[int, str]`: The token ID to metadata filepath mapping.
+    """
+    return build_erc721_metadata(
+        [(token_id, get_breed(breed_id)) for token_id, breed_id in tokens],
+        metadata_directory=f"./metadata/erc721/{network.show_active()}",
+        max_workers=max_workers,
+    )
+
+
+def generate_token_range_metadata(
+    collectible, start: int = 0, stop: Optional[int] = None
+) -> Dict[int, str]:
+    """
+    To generate the metadata of the minted tokens in `[start, stop)`, reading all
+    the breeds with batched calls.
+    """
+    states = read_token_range(collectible, start=start, stop=stop)
+    return generate_collection_metadata(
+        [(state.token_id, state.breed) for state in states if state.exists]
+    )
+
+
+def generate_base_uri_metadata(
+    collectible, tokens: List[Tuple[int, int]], max_workers: int = 8
+) -> str:
+    """
+    To generate the `{token_id}.json` metadata files of the base URI mode, in one
+    `<root>/<network>/<address>` directory per collectible (apart from the per
+    token files), so the whole collection is pinned at once.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    tokens: `List[Tuple[int, int]]`
+        The (token ID, breed ID) pairs.
+    max_workers: `int`
+        The number of writer threads.
+
+    Returns
+    -------
+    `str`: The metadata directory.
+    """
+    metadata_root = os.getenv("BASE_URI_METADATA_ROOT", DEFAULT_BASE_URI_METADATA_ROOT)
+    metadata_directory = os.path.join(
+        metadata_root, network.show_active(), collectible.address
+    )
+    build_collection_metadata(
+        [(token_id, get_breed(breed_id)) for token_id, breed_id in tokens],
+        metadata_directory,
+        render=lambda _, breed, image_uri: render_erc721_metadata(breed, image_uri),
+        filename=lambda token_id, _: f"{token_id}.json",
+        max_workers=max_workers,
+    )
+    return metadata_directory
+
+
+def generate_indexed_metadata(
+    collectible, indexer: Optional[EventIndexer] = None
+) -> Dict[int, str]:
+    """
+    To generate the metadata of every minted token from the local event index,
+    only the new blocks are fetched from the RPC.
+    """
+    local_indexer = indexer is None
+    indexer = EventIndexer() if local_indexer else indexer
+    try:
+        indexer.sync(collectible)
+        token_breeds = indexer.get_token_breeds(collectible)
+    finally:
+        if local_indexer:  # a given indexer is left open for the caller
+            indexer.close()
+    return generate_collection_metadata(token_breeds)
+
+
 def main():
     generate_metadata(token_id=0)
@@ -1,12 +1,14 @@
 from brownie import AdvancedCollectible, network, config
 from scripts.utils import get_account, get_contract, BREED_TOKEN_URIS
 from scripts.advanced_collectible.create_collectible import create_collectible
+from scripts.profiling import profiled
 from scripts.vrf_subscription import (
     get_subscription,
     register_consumer,
 )
 
 
+@profiled()
 def deploy():
     network_id = network.show_active()
     # get the VRF subscription ID
@@ -28,11 +30,17 @@ def deploy():
     return advanced_collectible
 
 
-def deploy_and_create():
+@profiled()
+def deploy_and_create(use_base_uri: bool = False):
     # deploying the collectible
     collectible = deploy()
     # create/mint the first NFT
-    create_collectible(collectible=collectible, account=get_account(), is_set_uri=True)
+    create_collectible(
+        collectible=collectible,
+        account=get_account(),
+        is_set_uri=True,
+        use_base_uri=use_base_uri,
+    )
 
 
 def main():
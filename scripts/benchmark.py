@@ -0,0 +1,324 @@
+import os
+import json
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from brownie import network
+from scripts.utils import (
+    get_account,
+    chain_checkpoint,
+    BREED_NAMES,
+    LOCAL_BLOCKCHAIN_ENV,
+)
+from scripts.ipfs_cid import compute_file_cid
+from scripts.ipfs_stub import StubIPFSServer
+from scripts.metadata_builder import build_erc721_metadata
+from scripts.profiling import profiler
+from scripts.utils_ipfs import add_many_to_ipfs
+from scripts.advanced_collectible.create_collectible import (
+    mint_many as mint_many_advanced,
+)
+from scripts.advanced_collectible.deploy_and_create import deploy as deploy_advanced
+from scripts.multi_collectible.deploy_and_mint import (
+    deploy as deploy_multi,
+    mint_many as mint_many_multi,
+)
+
+# run with `brownie run scripts/benchmark.py`, the settings are read from the env:
+# BENCHMARK_SIZES, BENCHMARK_SAMPLE_SIZE, BENCHMARK_SEED, BENCHMARK_THRESHOLD and
+# BENCHMARK_BASELINE
+DEFAULT_SIZES = [1, 100, 1000]
+DEFAULT_SEED = 42
+DEFAULT_THRESHOLD = 0.2  # max relative regression against the baseline
+DEFAULT_BASELINE = "./benchmarks/baseline.json"
+DEFAULT_RESULT_DIR = "./reports/benchmarks"
+DEFAULT_SAMPLE_SIZE = 1000  # files per metadata / IPFS pin benchmark
+# the compared metrics, and whether a higher value is better
+COMPARED_METRICS = {
+    "mints_per_sec": True,
+    "rpc_per_mint": False,
+    "gas_per_mint": False,
+    "files_per_sec": True,
+    "pins_per_sec": True,
+    "bytes_per_sec": True,
+}
+
+
+@contextmanager
+def _env(**variables):
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def ipfs_stub(latency: float = 0.0):
+    """To pin everything to an in-process IPFS stub, bypassing the pin cache."""
+    server = StubIPFSServer(latency=latency).start()
+    try:
+        with _env(
+            IPFS_NETWORK="local", IPFS_LOCAL_API_URL=server.url, IPFS_PIN_CACHE="0"
+        ):
+            yield server
+    finally:
+        server.stop()
+
+
+@contextmanager
+def _isolated_case(metadata_directory: str):
+    """
+    To run a case from the same chain and metadata state, the chain is reverted and
+    the new metadata files are removed afterwards.
+    """
+    os.makedirs(metadata_directory, exist_ok=True)
+    existing = set(os.listdir(metadata_directory))
+    try:
+        with chain_checkpoint():
+            yield
+    finally:
+        for filename in set(os.listdir(metadata_directory)) - existing:
+            os.remove(os.path.join(metadata_directory, filename))
+
+
+def _mint_metrics(span, n: int, succeeded: int) -> Dict[str, float]:
+    return {
+        "n": n,
+        "succeeded": succeeded,
+        "wall_time": span.wall_time,
+        "mints_per_sec": succeeded / span.wall_time if span.wall_time > 0 else 0.0,
+        "rpc_per_mint": span.rpc_total / n,
+        "gas_per_mint": span.gas_used / n,
+        "ipfs_bytes": span.ipfs_bytes,
+    }
+
+
+def bench_advanced_mints(sizes: List[int], seed: int) -> Dict[str, dict]:
+    """To measure the AdvancedCollectible mints, with the metadata and token URIs."""
+    account = get_account()
+    collectible = deploy_advanced()
+    results = {}
+    for n in sizes:
+        rngs = [random.Random(seed + i).randint(100, 100000) for i in range(n)]
+        metadata_directory = f"./metadata/erc721/{network.show_active()}"
+        with _isolated_case(metadata_directory):
+            with profiler.span("benchmark.advanced_mint", n=n) as span:
+                minted = mint_many_advanced(
+                    collectible, account, n=n, rngs=rngs, is_set_uri=True
+                )
+            results[f"advanced_mint_n{n}"] = _mint_metrics(
+                span, n, sum(r.ok for r in minted)
+            )
+    return results
+
+
+def bench_multi_mints(sizes: List[int], seed: int) -> Dict[str, dict]:
+    """To measure the paid MultiCollectible mints."""
+    account = get_account()
+    collectible = deploy_multi()
+    results = {}
+    for n in sizes:
+        rngs = [random.Random(seed + i).randint(100, 100000) for i in range(n)]
+        with _isolated_case(f"./metadata/erc1155/{network.show_active()}"):
+            with profiler.span("benchmark.multi_mint", n=n) as span:
+                minted = mint_many_multi(collectible, account, n=n, rngs=rngs)
+            results[f"multi_mint_n{n}"] = _mint_metrics(
+                span, n, sum(r.ok for r in minted)
+            )
+    return results
+
+
+def bench_metadata(n: int, seed: int) -> Dict[str, dict]:
+    """To measure the metadata generation, with offline computed image CIDs."""
+    rng = random.Random(seed)
+    tokens = [(token_id, rng.choice(BREED_NAMES)) for token_id in range(n)]
+    with tempfile.TemporaryDirectory() as metadata_directory:
+        with profiler.span("benchmark.metadata", n=n) as span:
+            build_erc721_metadata(
+                tokens,
+                metadata_directory,
+                image_resolver=lambda paths: {
+                    p: f"ipfs://{compute_file_cid(p)}" for p in set(paths)
+                },
+            )
+    return {
+        f"metadata_n{n}": {
+            "n": n,
+            "wall_time": span.wall_time,
+            "files_per_sec": n / span.wall_time if span.wall_time > 0 else 0.0,
+        }
+    }
+
+
+def bench_ipfs_pins(n: int, seed: int) -> Dict[str, dict]:
+    """To measure the concurrent IPFS pinning of metadata sized files to the stub."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory, ipfs_stub() as server:
+        filepaths = []
+        for i in range(n):
+            filepath = os.path.join(directory, f"{i}.json")
+            with open(filepath, "w") as f:
+                json.dump({"name": f"#{i}", "seed": rng.getrandbits(64)}, f)
+            filepaths.append(filepath)
+        with profiler.span("benchmark.ipfs_pin", n=n) as span:
+            pinned = add_many_to_ipfs(filepaths, use_cache=False)
+        failed = [r for r in pinned if not r.ok]
+        if failed:
+            raise ValueError(f"{len(failed)} pin(s) failed, e.g. {failed[0].error}")
+        uploaded_bytes = server.uploaded_bytes
+    return {
+        f"ipfs_pin_n{n}": {
+            "n": n,
+            "wall_time": span.wall_time,
+            "pins_per_sec": n / span.wall_time if span.wall_time > 0 else 0.0,
+            "bytes_per_sec": (
+                uploaded_bytes / span.wall_time if span.wall_time > 0 else 0.0
+            ),
+        }
+    }
+
+
+def run_benchmarks(
+    sizes: Optional[List[int]] = None,
+    seed: int = DEFAULT_SEED,
+    result_dir: str = DEFAULT_RESULT_DIR,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> str:
+    """
+    To run the whole benchmark suite on the local chain and mocks, every case uses
+    the same seeded random numbers, so the runs are comparable.
+
+    Parameters
+    ----------
+    sizes: `Optional[List[int]]`
+        The number of mints per collectible case, defaults to 1, 100 and 1000.
+    seed: `int`
+        The seed of the random numbers (VRF words, breeds and file contents).
+    result_dir: `str`
+        The directory of the JSON results.
+    sample_size: `int`
+        The number of files of the metadata and IPFS pin cases.
+
+    Returns
+    -------
+    `str`: The JSON results filepath.
+    """
+    network_id = network.show_active()
+    if network_id not in LOCAL_BLOCKCHAIN_ENV:
+        raise ValueError(
+            f"Benchmarks only run on a local blockchain! Got: {network_id}"
+        )
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    started_at = datetime.now(timezone.utc)
+    results = {}
+    with profiler.span("benchmark", sizes=sizes, seed=seed, sample_size=sample_size):
+        results.update(bench_metadata(sample_size, seed))
+        results.update(bench_ipfs_pins(sample_size, seed))
+        with ipfs_stub():
+            results.update(bench_advanced_mints(sizes, seed))
+            results.update(bench_multi_mints(sizes, seed))
+    os.makedirs(result_dir, exist_ok=True)
+    filepath = os.path.join(result_dir, f"{started_at:%Y%m%dT%H%M%S}-{network_id}.json")
+    with open(filepath, "w") as f:
+        json.dump(
+            {
+                "network": network_id,
+                "started_at": started_at.isoformat(),
+                "sizes": sizes,
+                "sample_size": sample_size,
+                "seed": seed,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    for name, metrics in results.items():
+        print(f"[benchmark] {name}: {metrics}")
+    print(f"Benchmark results are saved in '{filepath}'")
+    return filepath
+
+
+def compare_results(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """
+    To compare the benchmark results against the baseline ones.
+
+    Parameters
+    ----------
+    results: `Dict[str, dict]`
+        The case name to metrics mapping of the current run.
+    baseline: `Dict[str, dict]`
+        The case name to metrics mapping of the baseline run.
+    threshold: `float`
+        The max relative regression of a metric, e.g. 0.2 for 20%.
+
+    Returns
+    -------
+    `List[str]`: The regressions, empty if none.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            base = baseline.get(name, {}).get(metric)
+            if metric not in metrics or not base:
+                continue  # a new case/metric, or nothing to compare with
+            change = (metrics[metric] - base) / base
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    f"{name}.{metric}: {metrics[metric]:.4g} vs. {base:.4g} "
+                    f"in the baseline ({change:+.1%})"
+                )
+    return regressions
+
+
+def _load_results(filepath: str) -> Dict[str, dict]:
+    with open(filepath, "r") as f:
+        return json.load(f)["results"]
+
+
+def _settings():
+    sizes = os.getenv("BENCHMARK_SIZES")
+    return {
+        "sizes": None if sizes is None else [int(n) for n in sizes.split(",")],
+        "seed": int(os.getenv("BENCHMARK_SEED", DEFAULT_SEED)),
+        "sample_size": int(os.getenv("BENCHMARK_SAMPLE_SIZE", DEFAULT_SAMPLE_SIZE)),
+    }
+
+
+def save_baseline():
+    """To run the benchmarks and store the results as the new baseline."""
+    filepath = run_benchmarks(**_settings())
+    baseline_path = os.getenv("BENCHMARK_BASELINE", DEFAULT_BASELINE)
+    os.makedirs(os.path.dirname(baseline_path) or ".", exist_ok=True)
+    with open(filepath, "r") as src, open(baseline_path, "w") as dst:
+        dst.write(src.read())
+    print(f"The benchmark baseline is saved in '{baseline_path}'")
+
+
+def main():
+    filepath = run_benchmarks(**_settings())
+    baseline_path = os.getenv("BENCHMARK_BASELINE", DEFAULT_BASELINE)
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at '{baseline_path}', run `save_baseline` to store one.")
+        return
+    threshold = float(os.getenv("BENCHMARK_THRESHOLD", DEFAULT_THRESHOLD))
+    regressions = compare_results(
+        _load_results(filepath), _load_results(baseline_path), threshold=threshold
+    )
+    if regressions:
+        raise ValueError(
+            f"{len(regressions)} benchmark regression(s) over {threshold:.0%}:\n"
+            + "\n".join(regressions)
+        )
+    print(f"No benchmark regression over {threshold:.0%} against the baseline.")
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from scripts.utils import get_contract
+
+DEFAULT_CHUNK_SIZE = 300  # calls per `eth_call`
+
+
+@dataclass
+class TokenState:
+    """The on-chain state of an ERC-721 collectible token."""
+
+    token_id: int
+    breed: Optional[int]
+    owner: Optional[str]
+    token_uri: Optional[str]
+
+    @property
+    def exists(self) -> bool:
+        return self.owner is not None
+
+
+def multicall(
+    calls: Sequence[Tuple[Any, Sequence[Any]]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Any]:
+    """
+    To run many view calls with one `eth_call` per chunk through Multicall3.
+
+    Parameters
+    ----------
+    calls: `Sequence[Tuple[ContractCall, Sequence[Any]]]`
+        The (contract view function, arguments) pairs,
+        e.g. `(collectible.ownerOf, [token_id])`.
+    chunk_size: `int`
+        The maximum number of calls per `eth_call`.
+
+    Returns
+    -------
+    `List[Any]`: The decoded results in the calls order, None for a reverted call.
+    """
+    multicall3 = get_contract(contract_name="multicall")
+    results = []
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start : start + chunk_size]
+        encoded = [(fn._address, True, fn.encode_input(*args)) for fn, args in chunk]
+        for (fn, _), (success, return_data) in zip(
+            chunk, multicall3.aggregate3.call(encoded)
+        ):
+            results.append(fn.decode_output(return_data) if success else None)
+    return results
+
+
+def read_tokens(
+    collectible, token_ids: Sequence[int], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[TokenState]:
+    """
+    To read the breed, owner and token URI of many AdvancedCollectible tokens.
+    Nonexistent tokens have None fields.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The AdvancedCollectible contract.
+    token_ids: `Sequence[int]`
+        The token IDs to read.
+    chunk_size: `int`
+        The maximum number of calls per `eth_call`.
+
+    Returns
+    -------
+    `List[TokenState]`: The token states, in the `token_ids` order.
+    """
+    calls = []
+    for token_id in token_ids:
+        calls += [
+            (collectible.ownerOf, [token_id]),
+            (collectible.tokenIdToBreed, [token_id]),
+            (collectible.tokenURI, [token_id]),
+        ]
+    results = multicall(calls, chunk_size=chunk_size)
+    states = []
+    for i, token_id in enumerate(token_ids):
+        owner, breed, token_uri = results[3 * i : 3 * i + 3]
+        exists = owner is not None
+        states.append(
+            TokenState(
+                token_id=int(token_id),
+                breed=int(breed) if exists else None,
+                owner=str(owner) if exists else None,
+                token_uri=str(token_uri) if exists else None,
+            )
+        )
+    return states
+
+
+def read_token_range(
+    collectible,
+    start: int = 0,
+    stop: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[TokenState]:
+    """
+    To read the state of the tokens in `[start, stop)`, up to the `tokenCounter`.
+    """
+    token_counter = collectible.tokenCounter()
+    stop = token_counter if stop is None else min(stop, token_counter)
+    return read_tokens(collectible, range(start, stop), chunk_size=chunk_size)
+
+
+def read_balances(
+    collectible,
+    owners: Sequence[str],
+    token_ids: Sequence[int],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Dict[int, int]]:
+    """
+    To read the MultiCollectible (ERC-1155) balance of every owner for every ID.
+
+    Returns
+    -------
+    `Dict[str, Dict[int, int]]`: The owner -> token ID -> balance mapping.
+    """
+    calls = [
+        (collectible.balanceOf, [owner, token_id])
+        for owner in owners
+        for token_id in token_ids
+    ]
+    results = iter(multicall(calls, chunk_size=chunk_size))
+    return {
+        str(owner): {int(token_id): int(next(results)) for token_id in token_ids}
+        for owner in owners
+    }
@@ -0,0 +1,374 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from brownie import AdvancedCollectible, MultiCollectible, web3
+from scripts.utils import get_account
+from scripts.event_indexer import decode_log
+from scripts.mint_pipeline import MintResult
+from scripts.advanced_collectible.create_collectible import (
+    resume_mints as resume_advanced_mints,
+)
+from scripts.multi_collectible.deploy_and_mint import (
+    resume_mints as resume_multi_mints,
+)
+
+DEFAULT_JOURNAL_PATH = "./.drop_journal.db"
+# the pipeline steps of a token, in order
+STEPS = ["sent", "fulfilled", "metadata", "pinned", "uri_set"]
+RECOVERY_CHUNK_SIZE = 2000  # blocks per `eth_getLogs` while recovering requests
+
+_JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    from_block INTEGER NOT NULL,
+    requested INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract TEXT NOT NULL,
+    request_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    contract TEXT NOT NULL,
+    request_id TEXT NOT NULL,
+    run_id INTEGER,
+    idx INTEGER NOT NULL,
+    request_block INTEGER,
+    step INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    token_id INTEGER,
+    breed INTEGER,
+    amount INTEGER,
+    metadata_path TEXT NOT NULL DEFAULT '',
+    token_uri TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (contract, request_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tokens_unfinished ON tokens (contract, step, target);
+"""
+
+# served by `idx_tokens_unfinished`, so a resume doesn't scan the finished tokens
+_UNFINISHED_QUERY = (
+    "SELECT * FROM tokens WHERE contract = ? AND step < target ORDER BY run_id, idx"
+)
+# the state columns of a token, copied from its `MintResult`
+_STATE_FIELDS = ["token_id", "breed", "amount", "metadata_path", "token_uri"]
+
+
+def _step_index(step: str) -> int:
+    if step not in STEPS:
+        raise ValueError(f"Unknown pipeline step: '{step}'! Available: {STEPS}")
+    return STEPS.index(step)
+
+
+class DropJournal:
+    """
+    A crash-safe journal of the mint pipeline, stored in SQLite (WAL mode).
+    Every step completed by a token is appended to the `events` log, and the
+    latest state of the token is kept in the `tokens` table within the same
+    transaction, so a resume reads the unfinished tokens from an index instead of
+    replaying the whole log. A step never moves a token backwards, which makes
+    the recording idempotent.
+
+    Parameters
+    ----------
+    path: `str`
+        The SQLite database filepath.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # a commit is atomic and survives a crash of the process, without a
+        # fsync per commit (only an OS crash may lose the latest commits)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_JOURNAL_SCHEMA)
+        self._conn.commit()
+
+    def start_run(
+        self, contract: str, owner: str, from_block: int, n: int, target: str
+    ) -> int:
+        """
+        To record a mint run before its requests are sent, so the requests sent
+        right before a crash can be recovered from the chain (see
+        `recover_requests`).
+
+        Parameters
+        ----------
+        contract: `str`
+            The collectible address.
+        owner: `str`
+            The minting account address.
+        from_block: `int`
+            The block the requests are sent from.
+        n: `int`
+            The number of requests.
+        target: `str`
+            The last pipeline step of the tokens, e.g. "uri_set".
+
+        Returns
+        -------
+        `int`: The run ID.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (contract, owner, from_block, requested, target, "
+                "started_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (contract, str(owner), from_block, n, _step_index(target), time.time()),
+            )
+        return cursor.lastrowid
+
+    def get_runs(self, contract: str) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM runs WHERE contract = ? ORDER BY run_id", (contract,)
+            ).fetchall()
+        return [dict(row, target=STEPS[row["target"]]) for row in rows]
+
+    def record(
+        self,
+        contract: str,
+        result: MintResult,
+        step: str,
+        run_id: Optional[int] = None,
+        target: Optional[str] = None,
+    ):
+        """To record a single completed step (see `record_many`)."""
+        self.record_many(contract, [result], step, run_id=run_id, target=target)
+
+    def record_many(
+        self,
+        contract: str,
+        results: List[MintResult],
+        step: str,
+        run_id: Optional[int] = None,
+        target: Optional[str] = None,
+    ):
+        """
+        To record the completed step of many tokens, in a single transaction.
+
+        Parameters
+        ----------
+        contract: `str`
+            The collectible address.
+        results: `List[MintResult]`
+            The mint results, with a request ID.
+        step: `str`
+            The completed step, one of `STEPS`.
+        run_id: `Optional[int]`
+            The run of the requests, only stored by the "sent" step.
+        target: `Optional[str]`
+            The last pipeline step of the tokens, required by the "sent" step.
+        """
+        step_index = _step_index(step)
+        if step_index == 0 and target is None:
+            raise ValueError("The target step of the sent requests is required!")
+        now = time.time()
+        events, tokens = [], []
+        for result in results:
+            state = {name: getattr(result, name) for name in _STATE_FIELDS}
+            request_id = str(result.request_id)
+            events.append((contract, request_id, step, json.dumps(state), now))
+            tokens.append(
+                (contract, request_id, run_id, result.index, result.request_block)
+                + (step_index, _step_index(target or step))
+                + tuple(state.values())
+                + (now,)
+            )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (contract, request_id, step, data, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                events,
+            )
+            # a known token only moves forward, keeping its known state
+            self._conn.executemany(
+                "INSERT INTO tokens (contract, request_id, run_id, idx, request_block, "
+                "step, target, token_id, breed, amount, metadata_path, token_uri, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (contract, request_id) DO UPDATE SET "
+                "step = MAX(step, excluded.step), "
+                "token_id = COALESCE(excluded.token_id, token_id), "
+                "breed = COALESCE(excluded.breed, breed), "
+                "amount = COALESCE(excluded.amount, amount), "
+                "metadata_path = COALESCE(NULLIF(excluded.metadata_path, ''), "
+                "metadata_path), "
+                "token_uri = COALESCE(NULLIF(excluded.token_uri, ''), token_uri), "
+                "error = NULL, updated_at = excluded.updated_at",
+                tokens,
+            )
+
+    def record_errors(self, contract: str, results: List[MintResult]):
+        """To record the errors of the failed tokens, their state is unchanged."""
+        now = time.time()
+        failed = [r for r in results if not r.ok and r.request_id is not None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (contract, request_id, step, data, created_at) "
+                "VALUES (?, ?, 'error', ?, ?)",
+                [
+                    (contract, str(r.request_id), json.dumps({"error": r.error}), now)
+                    for r in failed
+                ],
+            )
+            self._conn.executemany(
+                "UPDATE tokens SET error = ?, updated_at = ? "
+                "WHERE contract = ? AND request_id = ?",
+                [(r.error, now, contract, str(r.request_id)) for r in failed],
+            )
+
+    def get_unfinished(self, contract: str) -> Dict[str, List[MintResult]]:
+        """
+        To get the tokens which did not reach their target step, as mint results
+        (with their recorded state) grouped by target step.
+        """
+        with self._lock:
+            rows = self._conn.execute(_UNFINISHED_QUERY, (contract,)).fetchall()
+        unfinished: Dict[str, List[MintResult]] = {}
+        for row in rows:
+            unfinished.setdefault(STEPS[row["target"]], []).append(
+                MintResult(
+                    index=row["idx"],
+                    request_id=int(row["request_id"]),
+                    request_block=row["request_block"],
+                    **{name: row[name] for name in _STATE_FIELDS},
+                )
+            )
+        return unfinished
+
+    def get_step(self, contract: str, request_id: int) -> Optional[str]:
+        """To get the last completed step of a request, None if it's unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT step FROM tokens WHERE contract = ? AND request_id = ?",
+                (contract, str(request_id)),
+            ).fetchone()
+        return None if row is None else STEPS[row["step"]]
+
+    def get_history(self, contract: str, request_id: int) -> List[dict]:
+        """To get the journaled events of a request, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT step, data, created_at FROM events "
+                "WHERE contract = ? AND request_id = ? ORDER BY seq",
+                (contract, str(request_id)),
+            ).fetchall()
+        return [dict(row, data=json.loads(row["data"])) for row in rows]
+
+    def count_steps(self, contract: str) -> Dict[str, int]:
+        """To count the tokens per last completed step."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT step, COUNT(*) AS n FROM tokens WHERE contract = ? "
+                "GROUP BY step",
+                (contract,),
+            ).fetchall()
+        return {STEPS[row["step"]]: row["n"] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def recover_requests(journal: DropJournal, collectible) -> int:
+    """
+    To journal the requests of the runs which were sent but not recorded, e.g.
+    when the script died while waiting for the receipts. The `RequestCollectible`
+    logs of the run owners are scanned from the first run block.
+
+    Returns
+    -------
+    `int`: The number of recovered requests.
+    """
+    runs = journal.get_runs(collectible.address)
+    if len(runs) == 0:
+        return 0
+    runs_by_owner: Dict[str, List[dict]] = {}
+    for run in sorted(runs, key=lambda r: r["from_block"]):
+        runs_by_owner.setdefault(web3.toChecksumAddress(run["owner"]), []).append(run)
+    event_abi = next(
+        abi
+        for abi in collectible.abi
+        if abi["type"] == "event" and abi["name"] == "RequestCollectible"
+    )
+    latest_block = web3.eth.block_number
+    recovered = []
+    for start in range(
+        min(run["from_block"] for run in runs), latest_block + 1, RECOVERY_CHUNK_SIZE
+    ):
+        logs = web3.eth.get_logs(
+            {
+                "address": collectible.address,
+                "topics": [collectible.topics["RequestCollectible"]],
+                "fromBlock": start,
+                "toBlock": min(start + RECOVERY_CHUNK_SIZE - 1, latest_block),
+            }
+        )
+        for log in logs:
+            event = decode_log(event_abi, log)
+            # the latest run of the owner started before the request
+            owner = web3.toChecksumAddress(event["owner"])
+            candidates = [
+                run
+                for run in runs_by_owner.get(owner, [])
+                if run["from_block"] <= log["blockNumber"]
+            ]
+            if len(candidates) == 0:
+                continue
+            run = candidates[-1]
+            request_id = int(event["requestId"])
+            if journal.get_step(collectible.address, request_id) is None:
+                recovered.append(
+                    (
+                        run,
+                        MintResult(
+                            index=run["requested"] + len(recovered),
+                            request_id=request_id,
+                            request_block=log["blockNumber"],
+                        ),
+                    )
+                )
+    for run, result in recovered:
+        journal.record(
+            collectible.address,
+            result,
+            "sent",
+            run_id=run["run_id"],
+            target=run["target"],
+        )
+    return len(recovered)
+
+
+def main():
+    # resume the unfinished tokens of the latest deployments
+    journal = DropJournal()
+    account = get_account()
+    for container, resume_mints in [
+        (AdvancedCollectible, resume_advanced_mints),
+        (MultiCollectible, resume_multi_mints),
+    ]:
+        if len(container) == 0:
+            continue
+        collectible = container[-1]
+        recovered = recover_requests(journal, collectible)
+        if recovered:
+            print(f"Recovered {recovered} unrecorded request(s) from the chain.")
+        resume_mints(collectible, account, journal)
+        print(
+            f"{container._name} '{collectible.address}' journal: "
+            f"{journal.count_steps(collectible.address)}"
+        )
+    journal.close()
@@ -0,0 +1,456 @@
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+from hexbytes import HexBytes
+from brownie import AdvancedCollectible, MultiCollectible, web3
+from scripts.utils import get_contract
+
+try:
+    from eth_abi import decode as decode_abi
+except ImportError:  # eth-abi < 4
+    from eth_abi import decode_abi
+
+DEFAULT_DB_PATH = "./.event_index.db"
+DEFAULT_REORG_DEPTH = 12  # blocks
+DEFAULT_CHUNK_SIZE = 2000  # blocks per `eth_getLogs`
+MAX_CHUNK_SIZE = 100000
+TARGET_LOGS_PER_CHUNK = 1000  # shrink the block range above, grow it below
+REQUEST_IDS_PER_QUERY = 100
+COLLECTIBLE_EVENTS = ["RequestCollectible", "AssignBreed", "MintedCollectible"]
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    contract TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    contract TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    PRIMARY KEY (contract, block_number)
+);
+CREATE TABLE IF NOT EXISTS requests (
+    contract TEXT NOT NULL,
+    request_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    value TEXT,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    PRIMARY KEY (contract, request_id)
+);
+CREATE INDEX IF NOT EXISTS idx_requests_owner ON requests (owner);
+CREATE INDEX IF NOT EXISTS idx_requests_block ON requests (contract, block_number);
+CREATE TABLE IF NOT EXISTS mints (
+    contract TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    request_id TEXT,
+    token_id INTEGER NOT NULL,
+    breed INTEGER NOT NULL,
+    owner TEXT,
+    amount INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    PRIMARY KEY (contract, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_mints_token ON mints (contract, token_id);
+CREATE INDEX IF NOT EXISTS idx_mints_owner ON mints (owner);
+CREATE INDEX IF NOT EXISTS idx_mints_request ON mints (request_id);
+CREATE INDEX IF NOT EXISTS idx_mints_block ON mints (contract, block_number);
+"""
+
+
+def _to_hex(value) -> str:
+    return "0x" + bytes(HexBytes(value)).hex()
+
+
+def decode_log(event_abi: dict, log) -> dict:
+    """To decode a raw log into the event arguments."""
+    inputs = event_abi["inputs"]
+    data_inputs = [i for i in inputs if not i["indexed"]]
+    values = decode_abi([i["type"] for i in data_inputs], HexBytes(log["data"]))
+    event = {i["name"]: v for i, v in zip(data_inputs, values)}
+    topic_inputs = [i for i in inputs if i["indexed"]]
+    for i, topic in zip(topic_inputs, log["topics"][1:]):
+        event[i["name"]] = decode_abi([i["type"]], HexBytes(topic))[0]
+    return event
+
+
+class EventIndexer:
+    """
+    An incremental log indexer of the collectible events, stored in SQLite.
+    The logs are fetched in adaptive block ranges, and every synced range is
+    checkpointed, so the next `sync` only fetches the new blocks. A reorg (of up to
+    `reorg_depth` blocks) is detected with the stored block hashes and rolled back.
+
+    Parameters
+    ----------
+    path: `str`
+        The SQLite database filepath.
+    reorg_depth: `int`
+        The maximum number of blocks re-indexed on a reorg.
+    chunk_size: `int`
+        The initial number of blocks per `eth_getLogs` call.
+    max_chunk_size: `int`
+        The upper bound of the adaptive block range.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        reorg_depth: int = DEFAULT_REORG_DEPTH,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_size: int = MAX_CHUNK_SIZE,
+    ):
+        self.path = path
+        self.reorg_depth = reorg_depth
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_INDEX_SCHEMA)
+        self._conn.commit()
+
+    def checkpoint(self, collectible) -> Optional[int]:
+        """To get the last indexed block of a collectible, None if never synced."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT block_number FROM checkpoints WHERE contract = ?",
+                (collectible.address,),
+            ).fetchone()
+        return None if row is None else row["block_number"]
+
+    def sync(
+        self,
+        collectible,
+        from_block: Optional[int] = None,
+        to_block: Optional[int] = None,
+    ) -> int:
+        """
+        To index the new collectible events, up to `to_block`.
+
+        Parameters
+        ----------
+        collectible: `brownie.network.contract.ProjectContract`
+            The AdvancedCollectible or MultiCollectible contract.
+        from_block: `Optional[int]`
+            The first block of the very first sync, defaults to the deployment block.
+        to_block: `Optional[int]`
+            The last block to index, defaults to the latest block.
+
+        Returns
+        -------
+        `int`: The number of newly indexed events.
+        """
+        address = collectible.address
+        self._rollback_reorg(address)
+        checkpoint = self.checkpoint(collectible)
+        if checkpoint is not None:
+            start = checkpoint + 1
+        elif from_block is not None:
+            start = from_block
+        else:
+            deploy_tx = getattr(collectible, "tx", None)
+            start = deploy_tx.block_number if deploy_tx is not None else 0
+        stop_block = web3.eth.block_number if to_block is None else to_block
+        event_topics = [
+            collectible.topics[name]
+            for name in COLLECTIBLE_EVENTS
+            if name in collectible.topics
+        ]
+        chunk_size = self.chunk_size
+        indexed = 0
+        while start <= stop_block:
+            stop = min(start + chunk_size - 1, stop_block)
+            try:
+                logs = web3.eth.get_logs(
+                    {
+                        "address": address,
+                        "topics": [event_topics],
+                        "fromBlock": start,
+                        "toBlock": stop,
+                    }
+                )
+            except Exception as e:
+                if chunk_size == 1:
+                    raise
+                # too many results or a provider range limit, retry a smaller range
+                chunk_size = max(1, chunk_size // 2)
+                print(f"get_logs({start}, {stop}) failed ({e}), shrinking the range")
+                continue
+            indexed += self._store(collectible, logs, stop)
+            if len(logs) > TARGET_LOGS_PER_CHUNK:
+                chunk_size = max(1, chunk_size // 2)
+            elif len(logs) < TARGET_LOGS_PER_CHUNK // 4:
+                chunk_size = min(chunk_size * 2, self.max_chunk_size)
+            start = stop + 1
+        return indexed
+
+    def _store(self, collectible, logs: List, stop: int) -> int:
+        """To decode and write the logs of a block range, then checkpoint it."""
+        address = collectible.address
+        event_abis = {
+            _to_hex(collectible.topics[a["name"]]): a
+            for a in collectible.abi
+            if a["type"] == "event" and a["name"] in COLLECTIBLE_EVENTS
+        }
+        requests, fulfillments, block_hashes = [], [], {}
+        for log in logs:
+            if log.get("removed", False):
+                continue
+            event_abi = event_abis[_to_hex(log["topics"][0])]
+            event = decode_log(event_abi, log)
+            block_number = int(log["blockNumber"])
+            block_hashes[block_number] = _to_hex(log["blockHash"])
+            tx_hash = _to_hex(log["transactionHash"])
+            if event_abi["name"] == "RequestCollectible":
+                requests.append(
+                    (
+                        address,
+                        str(event["requestId"]),
+                        str(event["owner"]),
+                        str(event["amount"]) if "amount" in event else None,
+                        block_number,
+                        tx_hash,
+                    )
+                )
+            else:
+                fulfillments.append(
+                    (
+                        event_abi["name"],
+                        event,
+                        tx_hash,
+                        int(log["logIndex"]),
+                        block_number,
+                    )
+                )
+        request_ids = self._fulfilled_request_ids(
+            collectible,
+            [f[2] for f in fulfillments],
+            [r[1] for r in requests],
+            from_block=min(f[4] for f in fulfillments) if fulfillments else 0,
+            to_block=stop,
+        )
+        stop_hash = _to_hex(web3.eth.get_block(stop)["hash"])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?, ?, ?)", requests
+            )
+            for name, event, tx_hash, log_index, block_number in fulfillments:
+                request_id = request_ids.get(tx_hash)
+                if name == "AssignBreed":  # ERC-721, one token per request
+                    owner_row = self._conn.execute(
+                        "SELECT owner FROM requests WHERE contract = ? "
+                        "AND request_id = ?",
+                        (address, request_id),
+                    ).fetchone()
+                    token_id, breed, amount = event["tokenId"], event["breedIndex"], 1
+                    owner = None if owner_row is None else owner_row["owner"]
+                else:  # ERC-1155, the token ID is the breed
+                    token_id = breed = event["breed"]
+                    amount, owner = event["amount"], str(event["owner"])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO mints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        address,
+                        tx_hash,
+                        log_index,
+                        request_id,
+                        int(token_id),
+                        int(breed),
+                        owner,
+                        int(amount),
+                        block_number,
+                    ),
+                )
+            block_hashes[stop] = stop_hash
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?)",
+                [(address, n, h) for n, h in block_hashes.items()],
+            )
+            # only the hashes within the reorg depth are needed
+            self._conn.execute(
+                "DELETE FROM blocks WHERE contract = ? AND block_number < ?",
+                (address, stop - self.reorg_depth),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                (address, stop, stop_hash),
+            )
+        return len(requests) + len(fulfillments)
+
+    def _fulfilled_request_ids(
+        self,
+        collectible,
+        tx_hashes: List[str],
+        new_request_ids: List[str],
+        from_block: int,
+        to_block: int,
+    ) -> Dict[str, str]:
+        """
+        To link the fulfillment txs to their request IDs, with the VRF coordinator
+        `RandomWordsFulfilled` logs of the still pending requests only.
+        """
+        if len(tx_hashes) == 0:
+            return {}
+        with self._lock:
+            pending = [
+                row["request_id"]
+                for row in self._conn.execute(
+                    "SELECT request_id FROM requests WHERE contract = ? AND "
+                    "request_id NOT IN (SELECT request_id FROM mints "
+                    "WHERE contract = ? AND request_id IS NOT NULL)",
+                    (collectible.address, collectible.address),
+                )
+            ]
+        pending = list(dict.fromkeys(pending + new_request_ids))
+        vrf = get_contract(contract_name="vrf_coordinator")
+        wanted = set(tx_hashes)
+        request_ids = {}
+        for i in range(0, len(pending), REQUEST_IDS_PER_QUERY):
+            topics = [
+                f"0x{int(r):064x}" for r in pending[i : i + REQUEST_IDS_PER_QUERY]
+            ]
+            for log in web3.eth.get_logs(
+                {
+                    "address": vrf.address,
+                    "topics": [vrf.topics["RandomWordsFulfilled"], topics],
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                }
+            ):
+                tx_hash = _to_hex(log["transactionHash"])
+                if tx_hash in wanted:
+                    request_ids[tx_hash] = str(int(_to_hex(log["topics"][1]), 16))
+        return request_ids
+
+    def _chain_hash(self, block_number: int) -> Optional[str]:
+        try:
+            return _to_hex(web3.eth.get_block(block_number)["hash"])
+        except Exception:  # the block is gone, e.g. a reverted local chain
+            return None
+
+    def _rollback_reorg(self, address: str):
+        """
+        To roll the index back to the last block still on chain, if the checkpoint
+        block was reorganized.
+        """
+        with self._lock:
+            checkpoint = self._conn.execute(
+                "SELECT block_number, block_hash FROM checkpoints WHERE contract = ?",
+                (address,),
+            ).fetchone()
+        if checkpoint is None:
+            return
+        if self._chain_hash(checkpoint["block_number"]) == checkpoint["block_hash"]:
+            return
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT block_number, block_hash FROM blocks WHERE contract = ? "
+                "AND block_number < ? ORDER BY block_number DESC",
+                (address, checkpoint["block_number"]),
+            ).fetchall()
+        ancestor = checkpoint["block_number"] - self.reorg_depth - 1
+        for row in stored:
+            if self._chain_hash(row["block_number"]) == row["block_hash"]:
+                ancestor = row["block_number"]
+                break
+        ancestor = max(ancestor, -1)
+        print(
+            f"Reorg detected at block {checkpoint['block_number']} of '{address}', "
+            f"rolling back to block {ancestor} ..."
+        )
+        with self._lock, self._conn:
+            for table in ["requests", "mints", "blocks"]:
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE contract = ? AND block_number > ?",
+                    (address, ancestor),
+                )
+            if ancestor < 0:
+                self._conn.execute(
+                    "DELETE FROM checkpoints WHERE contract = ?", (address,)
+                )
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                    (address, ancestor, self._chain_hash(ancestor)),
+                )
+
+    def get_token_breeds(self, collectible) -> List[Tuple[int, int]]:
+        """To get the indexed (token ID, breed) pairs, sorted by token ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT token_id, breed FROM mints WHERE contract = ? "
+                "ORDER BY token_id",
+                (collectible.address,),
+            ).fetchall()
+        return [(row["token_id"], row["breed"]) for row in rows]
+
+    def get_mints(
+        self,
+        collectible=None,
+        token_id: Optional[int] = None,
+        owner: Optional[str] = None,
+        request_id: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        To query the indexed mints, e.g. "which breed did token N get" or
+        "who minted what", in the minting order.
+        """
+        clauses, params = [], []
+        for column, value in [
+            ("contract", None if collectible is None else collectible.address),
+            ("token_id", token_id),
+            ("owner", owner),
+            ("request_id", None if request_id is None else str(request_id)),
+        ]:
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM mints {where} ORDER BY block_number, log_index",
+                params,
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_request(self, collectible, request_id: int) -> Optional[dict]:
+        """To get an indexed mint request, None if it's not indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM requests WHERE contract = ? AND request_id = ?",
+                (collectible.address, str(request_id)),
+            ).fetchone()
+        return None if row is None else dict(row)
+
+    def get_pending_requests(self, collectible) -> List[dict]:
+        """To get the indexed requests which are not yet fulfilled."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM requests WHERE contract = ? AND request_id NOT IN "
+                "(SELECT request_id FROM mints WHERE contract = ? "
+                "AND request_id IS NOT NULL) ORDER BY block_number",
+                (collectible.address, collectible.address),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    indexer = EventIndexer()
+    for container in [AdvancedCollectible, MultiCollectible]:
+        if len(container) == 0:
+            continue
+        collectible = container[-1]
+        indexed = indexer.sync(collectible)
+        print(
+            f"Indexed {indexed} new event(s) of {container._name} "
+            f"'{collectible.address}' up to block {indexer.checkpoint(collectible)}, "
+            f"{len(indexer.get_mints(collectible))} mint(s) in total."
+        )
+    indexer.close()
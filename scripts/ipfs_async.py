@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from scripts.utils_ipfs import PinResult, add_to_ipfs
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class AsyncIPFSClient:
+    """
+    An asyncio front of the IPFS uploads, for callers running an event loop.
+    Every upload runs the sync `add_to_ipfs` path (same `IPFS_NETWORK` backend
+    selection, streamed multipart bodies, retries, rate limits and pin cache) on a
+    worker thread, so the returned CIDs are identical and the loop is never blocked.
+
+    Parameters
+    ----------
+    max_concurrency: `int`
+        The maximum number of uploads in flight (the worker threads).
+    use_cache: `bool`
+        Look up (and store) the pinned CIDs in the local pin cache.
+    """
+
+    def __init__(
+        self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, use_cache: bool = True
+    ):
+        self.max_concurrency = max_concurrency
+        self.use_cache = use_cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="ipfs-async"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def add(self, filepath: str, verify: bool = False) -> str:
+        """
+        To pin a file, or a directory (wrapped with a directory), see `add_to_ipfs`.
+
+        Returns
+        -------
+        `str`: The pinned CID.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            lambda: add_to_ipfs(filepath, use_cache=self.use_cache, verify=verify),
+        )
+
+    async def add_many(self, filepaths: List[str]) -> List[PinResult]:
+        """
+        To pin many independent files/directories concurrently.
+
+        Returns
+        -------
+        `List[PinResult]`: The per-path CID or error, in the input order.
+        """
+
+        async def pin(filepath: str) -> PinResult:
+            try:
+                return PinResult(filepath=filepath, cid=await self.add(filepath))
+            except Exception as e:
+                return PinResult(filepath=filepath, error=repr(e))
+
+        return list(await asyncio.gather(*[pin(f) for f in filepaths]))
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+
+async def async_add_to_ipfs(filepath: str, use_cache: bool = True) -> str:
+    """
+    To pin a single file/directory without blocking the event loop.
+    For many uploads, share an `AsyncIPFSClient` instead.
+    """
+    return await asyncio.to_thread(add_to_ipfs, filepath, use_cache=use_cache)
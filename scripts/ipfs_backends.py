@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from scripts.ipfs_client import get_ipfs_client
+from scripts.ipfs_cid import (
+    compute_cid,
+    compute_file_cid,
+    encode_directory_node,
+)
+from scripts.ipfs_multipart import MultipartFileStream
+
+# IPFS API endpoints, overridable for self-hosted nodes and testing
+IPFS_API_URLS = {
+    "local": ("IPFS_LOCAL_API_URL", "http://127.0.0.1:5001"),
+    "infura": ("IPFS_INFURA_API_URL", "https://ipfs.infura.io:5001"),
+    "pinata": ("IPFS_PINATA_API_URL", "https://api.pinata.cloud"),
+}
+# the retried pin status errors, kubo answers 500 for a CID which is not pinned,
+# that's not worth retrying
+PIN_RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def get_api_url(ipfs_network: str) -> str:
+    """To get the API base URL of an IPFS network service."""
+    env_name, default_url = IPFS_API_URLS[ipfs_network]
+    return os.getenv(env_name, default_url).rstrip("/")
+
+
+@dataclass(frozen=True)
+class BackendLimits:
+    """The limits advertised by an IPFS backend, to size and split the uploads."""
+
+    max_concurrency: int = 8  # concurrent requests
+    rate_limit: Optional[float] = None  # requests/sec, None for unlimited
+    max_request_size: Optional[int] = None  # bytes per upload, None for unlimited
+
+
+def split_batches(
+    files: List[Tuple[str, str]], max_request_size: Optional[int]
+) -> List[List[Tuple[str, str]]]:
+    """
+    To split the (upload name, filepath) pairs into batches within the request size.
+    A single file larger than the limit gets a batch of its own.
+    """
+    if max_request_size is None:
+        return [files] if files else []
+    batches, batch, batch_size = [], [], 0
+    for name, filepath in files:
+        size = os.path.getsize(filepath)
+        if batch and batch_size + size > max_request_size:
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append((name, filepath))
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _flatten(directory: str) -> List[Tuple[str, str]]:
+    """To list the (basename, filepath) of every file, the way directories are pinned."""
+    # avoid the circular import, utils_ipfs uses the backends
+    from scripts.utils_ipfs import get_all_files
+
+    return [(os.path.basename(f), f) for f in get_all_files(directory)]
+
+
+class IPFSBackend(ABC):
+    """
+    The interface of an IPFS pinning service. A directory is flattened by basename
+    and wrapped with a directory, every CID is a CIDv1.
+    """
+
+    name = ""
+    limits = BackendLimits()
+
+    @abstractmethod
+    def add_file(self, filepath: str) -> str:
+        """To pin a single file, returning its CID."""
+
+    @abstractmethod
+    def add_directory(self, directory: str) -> str:
+        """To pin the files of a directory, returning the wrapping directory CID."""
+
+    @abstractmethod
+    def pin_status(self, cid: str) -> bool:
+        """To check if a CID is pinned."""
+
+    @abstractmethod
+    def unpin(self, cid: str):
+        """To remove the pin of a CID."""
+
+    def add(self, filepath: str) -> str:
+        """To pin a file or a directory."""
+        if os.path.isdir(filepath):
+            return self.add_directory(filepath.rstrip("/"))
+        return self.add_file(filepath)
+
+
+class KuboBackend(IPFSBackend):
+    """
+    A kubo (go-ipfs) RPC API node, e.g. a local IPFS daemon. A directory larger than
+    `max_request_size` is added in parts concurrently, then the wrapping directory
+    block is put, so the CID is the same as with a single upload.
+    """
+
+    name = "local"
+    limits = BackendLimits(max_concurrency=16)
+
+    def _auth(self) -> Optional[Tuple[str, str]]:
+        return None
+
+    def _post(self, endpoint: str, **kwargs):
+        response = get_ipfs_client().post(
+            self.name,
+            f"{get_api_url(self.name)}/api/v0/{endpoint}",
+            auth=self._auth(),
+            **kwargs,
+        )
+        if response.status_code != 200:
+            raise ValueError(f"Failed POST - {response.status_code} - {response.text}")
+        return response
+
+    def _add(self, files: List[Tuple[str, str]], wrap: bool = False) -> List[dict]:
+        params = {"cid-version": 1}
+        if wrap:
+            params.update({"wrap-with-directory": True, "pin": True})
+        # stream the multipart body, opening one file at a time
+        upload = MultipartFileStream(files)
+        response = self._post("add", params=params, data=upload, headers=upload.headers)
+        return [json.loads(line) for line in response.text.rstrip().split("\n")]
+
+    def add_file(self, filepath: str) -> str:
+        return self._add([(os.path.basename(filepath), filepath)])[-1]["Hash"]
+
+    def add_directory(self, directory: str) -> str:
+        files = _flatten(directory)
+        batches = split_batches(files, self.limits.max_request_size)
+        if len(batches) <= 1:
+            return self._add(files, wrap=True)[-1]["Hash"]
+        print(f"Adding '{directory}' in {len(batches)} parts ...")
+        with ThreadPoolExecutor(max_workers=self.limits.max_concurrency) as pool:
+            parts = list(pool.map(self._add, batches))
+        block = encode_directory_node(
+            [(e["Name"], e["Hash"], int(e["Size"])) for part in parts for e in part]
+        )
+        response = self._post(
+            "block/put",
+            params={"cid-codec": "dag-pb", "mhtype": "sha2-256", "pin": True},
+            files=[("file", ("directory", block))],
+        )
+        return response.json()["Key"]
+
+    def pin_status(self, cid: str) -> bool:
+        response = get_ipfs_client().post(
+            self.name,
+            f"{get_api_url(self.name)}/api/v0/pin/ls",
+            auth=self._auth(),
+            params={"arg": cid, "type": "recursive"},
+            retry_statuses=PIN_RETRY_STATUSES,
+        )
+        if response.status_code == 200:
+            return cid in response.json().get("Keys", {})
+        if "not pinned" in response.text:
+            return False
+        raise ValueError(f"Failed POST - {response.status_code} - {response.text}")
+
+    def unpin(self, cid: str):
+        self._post("pin/rm", params={"arg": cid})
+
+
+class InfuraBackend(KuboBackend):
+    """The Infura IPFS API, a kubo RPC API with basic auth."""
+
+    name = "infura"
+    limits = BackendLimits(
+        max_concurrency=10, rate_limit=10.0, max_request_size=100 * 2**20
+    )
+
+    def _auth(self) -> Optional[Tuple[str, str]]:
+        return (os.getenv("IPFS_INFURA_KEY"), os.getenv("IPFS_INFURA_SECRET"))
+
+
+class PinataBackend(IPFSBackend):
+    """The Pinata pinning API, authorized with the `IPFS_PINATA_JWT` env variable."""
+
+    name = "pinata"
+    limits = BackendLimits(max_concurrency=4, rate_limit=3.0)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {os.getenv('IPFS_PINATA_JWT')}"}
+
+    def _request(self, method: str, path: str, **kwargs):
+        response = get_ipfs_client().request(
+            method, self.name, f"{get_api_url(self.name)}{path}", **kwargs
+        )
+        if response.status_code != 200:
+            raise ValueError(
+                f"Failed {method} - {response.status_code} - {response.text}"
+            )
+        return response
+
+    def _pin(self, files: List[Tuple[str, str]], fields: Dict[str, str]) -> str:
+        # stream the multipart body, opening one file at a time
+        upload = MultipartFileStream(files, fields=fields)
+        response = self._request(
+            "POST",
+            "/pinning/pinFileToIPFS",
+            data=upload,
+            headers=dict(self._headers(), **upload.headers),
+        )
+        return response.json()["IpfsHash"]
+
+    def _options(self) -> Dict[str, str]:
+        return {
+            "pinataOptions": json.dumps({"cidVersion": 1, "wrapWithDirectory": False})
+        }
+
+    def add_file(self, filepath: str) -> str:
+        return self._pin([(os.path.basename(filepath), filepath)], self._options())
+
+    def add_directory(self, directory: str) -> str:
+        maindir = os.path.basename(directory)  # get the lowest directory
+        files = [(f"{maindir}/{name}", f) for name, f in _flatten(directory)]
+        if len(split_batches(files, self.limits.max_request_size)) > 1:
+            raise ValueError(
+                f"'{directory}' is larger than the {self.name} request size limit!"
+            )
+        fields = dict(self._options(), pinataMetadata=json.dumps({"name": maindir}))
+        return self._pin(files, fields)
+
+    def pin_status(self, cid: str) -> bool:
+        response = self._request(
+            "GET",
+            "/data/pinList",
+            params={"hashContains": cid, "status": "pinned"},
+            headers=self._headers(),
+        )
+        return response.json().get("count", 0) > 0
+
+    def unpin(self, cid: str):
+        self._request("DELETE", f"/pinning/unpin/{cid}", headers=self._headers())
+
+
+class MemoryBackend(IPFSBackend):
+    """
+    A fake backend for tests and benchmarks, the CIDs are computed offline.
+    The pinned contents are kept in memory, or in the `root` directory (one file
+    per CID) if given.
+
+    Parameters
+    ----------
+    root: `Optional[str]`
+        The directory storing the pinned contents, if None, keep them in memory.
+    latency: `float`
+        The simulated request latency in seconds.
+    """
+
+    name = "memory"
+    limits = BackendLimits(max_concurrency=32)
+
+    def __init__(self, root: Optional[str] = None, latency: float = 0.0):
+        self.root = root
+        self.latency = latency
+        self.pins: Dict[str, int] = {}  # CID -> pinned size
+        self._blobs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+
+    def _store(self, cid: str, filepath: str):
+        size = os.path.getsize(filepath)
+        if self.root is not None:
+            shutil.copyfile(filepath, os.path.join(self.root, cid))
+            with self._lock:
+                self.pins[cid] = size
+            return
+        with open(filepath, "rb") as f:
+            content = f.read()
+        with self._lock:
+            self._blobs[cid] = content
+            self.pins[cid] = size
+
+    def add_file(self, filepath: str) -> str:
+        time.sleep(self.latency)
+        cid = compute_file_cid(filepath)
+        self._store(cid, filepath)
+        return cid
+
+    def add_directory(self, directory: str) -> str:
+        time.sleep(self.latency)
+        files = _flatten(directory)
+        for _, filepath in files:
+            self._store(compute_file_cid(filepath), filepath)
+        cid = compute_cid(directory)
+        with self._lock:
+            self.pins[cid] = sum(os.path.getsize(f) for _, f in files)
+        return cid
+
+    def pin_status(self, cid: str) -> bool:
+        with self._lock:
+            return cid in self.pins
+
+    def unpin(self, cid: str):
+        with self._lock:
+            self.pins.pop(cid, None)
+            self._blobs.pop(cid, None)
+        if self.root is not None and os.path.exists(os.path.join(self.root, cid)):
+            os.remove(os.path.join(self.root, cid))
+
+    def cat(self, cid: str) -> bytes:
+        """To read a pinned file content."""
+        if self.root is not None:
+            with open(os.path.join(self.root, cid), "rb") as f:
+                return f.read()
+        with self._lock:
+            return self._blobs[cid]
+
+
+_backend_factories: Dict[str, Callable[[], IPFSBackend]] = {}
+_backend_limits: Dict[str, BackendLimits] = {}
+_backends: Dict[str, IPFSBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(
+    name: str,
+    factory: Callable[[], IPFSBackend],
+    limits: Optional[BackendLimits] = None,
+):
+    """
+    To register (or replace) an IPFS backend, selectable with `IPFS_NETWORK`.
+    The limits default to the `limits` of the factory (a backend class).
+    """
+    with _backends_lock:
+        _backend_factories[name] = factory
+        _backend_limits[name] = (
+            getattr(factory, "limits", BackendLimits()) if limits is None else limits
+        )
+        _backends.pop(name, None)
+
+
+def get_backend_rate_limits() -> Dict[str, Optional[float]]:
+    """To get the requests/sec limit of every registered backend, see `BackendLimits`."""
+    with _backends_lock:
+        return {name: limits.rate_limit for name, limits in _backend_limits.items()}
+
+
+def get_backend(ipfs_network: Optional[str] = None) -> IPFSBackend:
+    """
+    To get the shared backend instance, defaults to the `IPFS_NETWORK` env variable.
+    The backend rate limit is applied to the shared IPFS HTTP client.
+    """
+    if ipfs_network is None:
+        ipfs_network = os.getenv("IPFS_NETWORK", "local")
+    ipfs_network = ipfs_network.lower()
+    client = get_ipfs_client()  # created with the registered backends' limits
+    with _backends_lock:
+        if ipfs_network not in _backends:
+            if ipfs_network not in _backend_factories:
+                raise ValueError(f"Unknown IPFS network option: '{ipfs_network}'!")
+            backend = _backend_factories[ipfs_network]()
+            client.set_rate_limit(ipfs_network, backend.limits.rate_limit)
+            _backends[ipfs_network] = backend
+        return _backends[ipfs_network]
+
+
+register_backend("local", KuboBackend)
+register_backend("infura", InfuraBackend)
+register_backend("pinata", PinataBackend)
+register_backend("memory", MemoryBackend)
+register_backend(
+    "filesystem",
+    lambda: MemoryBackend(root=os.getenv("IPFS_FAKE_ROOT", "./.ipfs_fake")),
+    limits=MemoryBackend.limits,
+)
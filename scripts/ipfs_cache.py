@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+# the local pin cache database, disable it with `IPFS_PIN_CACHE=0`
+DEFAULT_CACHE_PATH = "./.ipfs_pin_cache.db"
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pins (
+    cache_key TEXT PRIMARY KEY,
+    cid TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pins_last_used ON pins (last_used);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+
+class PinCache:
+    """
+    A persistent, content-addressed map to the already pinned IPFS CIDs.
+    The cache key is built from the file content hash, the IPFS backend and the CID
+    options, so a changed file (or backend/option) is automatically a cache miss.
+    The file hashes are memoized by (size, modification time), see `file_hash`, and
+    a cached CID is trusted as still pinned, `add_to_ipfs(verify=True)` re-checks
+    both.
+
+    Parameters
+    ----------
+    path: `str`
+        The SQLite database filepath.
+    max_entries: `Optional[int]`
+        Evict the least recently used entries above this size, if None, unbounded.
+    max_age: `Optional[float]`
+        Expire the entries older than this age (in seconds), if None, never expire.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_CACHE_SCHEMA)
+        self._conn.commit()
+
+    def file_hash(self, filepath: str, rehash: bool = False) -> str:
+        """
+        To get the SHA-256 of a file content, only re-hashing the file if its size
+        or modification time has changed since the last time. An edit keeping both
+        (e.g. a same-size rewrite with a restored mtime) goes unnoticed, unless
+        `rehash` is set.
+        """
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM file_hashes WHERE path = ?",
+                (filepath,),
+            ).fetchone()
+        if (
+            not rehash
+            and row is not None
+            and row[0] == stat.st_size
+            and row[1] == stat.st_mtime_ns
+        ):
+            return row[2]
+        sha256 = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                (filepath, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._conn.commit()
+        return digest
+
+    def content_hash(self, filepath: str, rehash: bool = False) -> str:
+        """
+        To get the content hash of a file, or of a directory (flattened by basename,
+        the same way the directory is uploaded), see `file_hash`.
+        """
+        if not os.path.isdir(filepath):
+            return self.file_hash(filepath, rehash=rehash)
+        # avoid the circular import, utils_ipfs uses the cache
+        from scripts.utils_ipfs import get_all_files
+
+        entries = sorted(
+            (os.path.basename(f), self.file_hash(f, rehash=rehash))
+            for f in get_all_files(filepath)
+        )
+        return hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+
+    def make_key(
+        self, filepath: str, backend: str, options: dict, rehash: bool = False
+    ) -> str:
+        """
+        To build the cache key of a file/directory for a specific backend and options.
+        """
+        kind = "dir" if os.path.isdir(filepath) else "file"
+        option_str = json.dumps(options, sort_keys=True)
+        content_hash = self.content_hash(filepath, rehash=rehash)
+        return f"{backend}|{option_str}|{kind}|{content_hash}"
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        To get the pinned CID of a cache key, None if it's not yet pinned.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cid, created_at FROM pins WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is not None and self.max_age is not None:
+                if now - row[1] > self.max_age:  # expired entry
+                    self._conn.execute(
+                        "DELETE FROM pins WHERE cache_key = ?", (cache_key,)
+                    )
+                    self._conn.commit()
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE pins SET last_used = ? WHERE cache_key = ?", (now, cache_key)
+            )
+            self._conn.commit()
+        return row[0]
+
+    def put(self, cache_key: str, cid: str):
+        """
+        To store a newly pinned CID, then apply the eviction policy.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pins VALUES (?, ?, ?, ?)",
+                (cache_key, cid, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        if self.max_age is not None:
+            self._conn.execute(
+                "DELETE FROM pins WHERE created_at < ?", (now - self.max_age,)
+            )
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM pins WHERE cache_key NOT IN "
+                "(SELECT cache_key FROM pins ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        """To remove every cached pin and file hash."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pins")
+            self._conn.execute("DELETE FROM file_hashes")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """To get the cache hit/miss counters and size."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM pins").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            "entries": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_pin_cache: Optional[PinCache] = None
+_pin_cache_lock = threading.Lock()
+
+
+def is_pin_cache_enabled() -> bool:
+    return os.getenv("IPFS_PIN_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def get_pin_cache() -> PinCache:
+    """
+    To get the shared pin cache, configured with the `IPFS_PIN_CACHE_PATH`,
+    `IPFS_PIN_CACHE_MAX_ENTRIES` and `IPFS_PIN_CACHE_MAX_AGE` env variables.
+    """
+    global _pin_cache
+    with _pin_cache_lock:
+        if _pin_cache is None:
+            max_entries = os.getenv("IPFS_PIN_CACHE_MAX_ENTRIES")
+            max_age = os.getenv("IPFS_PIN_CACHE_MAX_AGE")
+            _pin_cache = PinCache(
+                path=os.getenv("IPFS_PIN_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(max_entries) if max_entries else None,
+                max_age=float(max_age) if max_age else None,
+            )
+    return _pin_cache
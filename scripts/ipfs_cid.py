@@ -0,0 +1,222 @@
+import os
+import base64
+import hashlib
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+# The `/api/v0/add` defaults with `cid-version=1`:
+# size-262144 chunker, raw leaves, sha2-256 multihash and a balanced UnixFS DAG.
+CHUNK_SIZE = 262144
+MAX_LINKS = 174  # links per balanced DAG node
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MULTIHASH_SHA2_256 = 0x12
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+
+# (CID bytes, cumulative DAG size, UnixFS file size)
+_DagNode = Tuple[bytes, int, int]
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _pb_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _pb_bytes(field: int, data: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(data)) + data
+
+
+def _make_cid(codec: int, block: bytes) -> bytes:
+    digest = hashlib.sha256(block).digest()
+    multihash = _varint(MULTIHASH_SHA2_256) + _varint(len(digest)) + digest
+    return _varint(1) + _varint(codec) + multihash
+
+
+def cid_to_str(cid: bytes) -> str:
+    """To encode the binary CIDv1 as a base32 (multibase `b`) string."""
+    return "b" + base64.b32encode(cid).decode().lower().rstrip("=")
+
+
+def cid_from_str(cid: str) -> bytes:
+    """To decode a base32 (multibase `b`) CIDv1 string into the binary CID."""
+    if not cid.startswith("b"):
+        raise ValueError(f"Only base32 CIDv1 strings are supported! Input: '{cid}'")
+    encoded = cid[1:].upper()
+    return base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+
+
+def _encode_pb_node(links: List[Tuple[str, bytes, int]], data: bytes) -> bytes:
+    """To encode a dag-pb node, the links are serialized before the data."""
+    encoded = b""
+    for name, cid, tsize in links:
+        link = _pb_bytes(1, cid) + _pb_bytes(2, name.encode()) + _pb_varint(3, tsize)
+        encoded += _pb_bytes(2, link)
+    return encoded + _pb_bytes(1, data)
+
+
+def _file_node(children: List[_DagNode]) -> _DagNode:
+    """To build a UnixFS file node linking to the children (leaves or file nodes)."""
+    filesize = sum(child[2] for child in children)
+    data = _pb_varint(1, UNIXFS_FILE) + _pb_varint(3, filesize)
+    for child in children:
+        data += _pb_varint(4, child[2])  # blocksizes
+    block = _encode_pb_node([("", cid, tsize) for cid, tsize, _ in children], data)
+    tsize = len(block) + sum(child[1] for child in children)
+    return _make_cid(CODEC_DAG_PB, block), tsize, filesize
+
+
+def _read_full(stream: BinaryIO, size: int) -> bytes:
+    chunk = stream.read(size)
+    while 0 < len(chunk) < size:
+        more = stream.read(size - len(chunk))
+        if len(more) == 0:
+            break
+        chunk += more
+    return chunk
+
+
+def _file_dag(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> _DagNode:
+    """
+    To build the balanced UnixFS DAG of a stream, reading it one chunk at a time.
+    Only the leaf CIDs are kept in memory, never the file content.
+    """
+    level = []
+    while True:
+        chunk = _read_full(stream, chunk_size)
+        if len(chunk) == 0 and len(level) > 0:
+            break
+        level.append((_make_cid(CODEC_RAW, chunk), len(chunk), len(chunk)))
+        if len(chunk) < chunk_size:
+            break
+    # group the nodes level by level, same as the balanced layout builder
+    while len(level) > 1:
+        level = [
+            _file_node(level[i : i + MAX_LINKS])
+            for i in range(0, len(level), MAX_LINKS)
+        ]
+    return level[0]
+
+
+def compute_stream_node(
+    stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Tuple[str, int]:
+    """
+    To compute the CIDv1 and the cumulative DAG size of a binary stream, i.e. the
+    `Hash` and `Size` of the `/api/v0/add` response.
+    """
+    cid, tsize, _ = _file_dag(stream, chunk_size=chunk_size)
+    return cid_to_str(cid), tsize
+
+
+def compute_stream_cid(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    To compute the CIDv1 of a binary stream, as added by `/api/v0/add`.
+
+    Parameters
+    ----------
+    stream: `BinaryIO`
+        The readable binary stream.
+    chunk_size: `int`
+        The chunker block size.
+
+    Returns
+    -------
+    `str`: The base32 CIDv1.
+    """
+    return cid_to_str(_file_dag(stream, chunk_size=chunk_size)[0])
+
+
+def compute_bytes_cid(data: bytes) -> str:
+    """To compute the CIDv1 of an in-memory content (e.g. a metadata document)."""
+    return compute_stream_cid(BytesIO(data))
+
+
+def compute_file_cid(filepath: str) -> str:
+    """To compute the CIDv1 of a single file, as added by `/api/v0/add`."""
+    with open(filepath, "rb") as f:
+        return compute_stream_cid(f)
+
+
+def compute_directory_cid(files: Dict[str, Union[str, BinaryIO]]) -> str:
+    """
+    To compute the CIDv1 of files wrapped in a directory (`wrap-with-directory`).
+
+    Parameters
+    ----------
+    files: `Dict[str, Union[str, BinaryIO]]`
+        The mapping of the file name (inside the directory) to the local filepath
+        or to a readable binary stream.
+
+    Returns
+    -------
+    `str`: The base32 CIDv1 of the wrapping directory.
+    """
+    links = []
+    for name, file in files.items():
+        if isinstance(file, str):
+            with open(file, "rb") as f:
+                links.append((name, *compute_stream_node(f)))
+        else:
+            links.append((name, *compute_stream_node(file)))
+    return compute_block_cid(encode_directory_node(links))
+
+
+def encode_directory_node(links: List[Tuple[str, str, int]]) -> bytes:
+    """
+    To encode the dag-pb block of a flat UnixFS directory.
+
+    Parameters
+    ----------
+    links: `List[Tuple[str, str, int]]`
+        The (name, CID, cumulative DAG size) of every directory entry.
+
+    Returns
+    -------
+    `bytes`: The directory block, the links are sorted by name.
+    """
+    sorted_links = [
+        (name, cid_from_str(cid), tsize)
+        for name, cid, tsize in sorted(links, key=lambda link: link[0].encode())
+    ]
+    return _encode_pb_node(sorted_links, _pb_varint(1, UNIXFS_DIRECTORY))
+
+
+def compute_block_cid(block: bytes, codec: int = CODEC_DAG_PB) -> str:
+    """To compute the CIDv1 of a single encoded block."""
+    return cid_to_str(_make_cid(codec, block))
+
+
+def compute_cid(filepath: str) -> str:
+    """
+    To compute the CIDv1 that `add_to_ipfs` will get for a file or directory,
+    without uploading anything. A directory is flattened and wrapped, the same way
+    it is uploaded.
+
+    Parameters
+    ----------
+    filepath: `str`
+        The path to file/directory that would be pinned.
+
+    Returns
+    -------
+    `str`: The CIDv1.
+    """
+    if not os.path.isdir(filepath):
+        return compute_file_cid(filepath)
+    from scripts.utils_ipfs import get_all_files
+
+    return compute_directory_cid(
+        {os.path.basename(f): f for f in get_all_files(filepath)}
+    )
@@ -0,0 +1,277 @@
+import os
+import time
+import random
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Set, Tuple, Union
+from requests.adapters import HTTPAdapter
+
+# HTTP statuses worth retrying (rate limited or temporarily unavailable)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT = (5.0, 120.0)  # (connect, read) in seconds
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_POOL_SIZE = 16
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket, allowing `rate` requests/sec with bursts of `burst`.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """To block until a request is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BackendMetrics:
+    """The request latency and status counters of a single IPFS backend."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.status_counts = {}
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.bytes_sent = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "status_counts": dict(self.status_counts),
+            "latency_avg": self.latency_total / self.requests if self.requests else 0,
+            "latency_max": self.latency_max,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class IPFSClient:
+    """
+    A shared HTTP client for the IPFS backends (`local`, `infura` and `pinata`),
+    with keep-alive connection pooling, timeouts and retries using a jittered
+    exponential backoff that honors the `Retry-After` header.
+
+    Parameters
+    ----------
+    timeout: `Union[float, Tuple[float, float]]`
+        The request (connect, read) timeout in seconds.
+    max_retries: `int`
+        The maximum number of retries per request.
+    backoff_base: `float`
+        The first retry delay upper bound in seconds, doubled on every retry.
+    backoff_max: `float`
+        The maximum retry delay in seconds.
+    pool_size: `int`
+        The maximum number of pooled connections per host.
+    rate_limits: `Optional[Dict[str, Optional[float]]]`
+        The requests/sec limit per backend, None for unlimited.
+    """
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limits: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._limiters = {}
+        for backend, rate in (rate_limits or {}).items():
+            self.set_rate_limit(backend, rate)
+
+    def set_rate_limit(self, backend: str, rate: Optional[float]):
+        """To limit the requests/sec sent to a backend, None for unlimited."""
+        with self._lock:
+            self._limiters[backend] = None if rate is None else RateLimiter(rate)
+
+    def post(self, backend: str, url: str, **kwargs) -> requests.Response:
+        """To send a POST request, see `request`."""
+        return self.request("POST", backend, url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        backend: str,
+        url: str,
+        retry_statuses: Set[int] = RETRY_STATUSES,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        To send a request, retrying on connection errors and retryable statuses.
+        The uploaded file objects are rewound before every attempt.
+
+        Parameters
+        ----------
+        method: `str`
+            The HTTP method.
+        backend: `str`
+            The IPFS backend name, used to group the metrics.
+        url: `str`
+            The request URL.
+        retry_statuses: `Set[int]`
+            The HTTP statuses to retry.
+        **kwargs:
+            The `requests` arguments (`files`, `data`, `params`, `auth`, ...).
+
+        Returns
+        -------
+        `requests.Response`: The last response (successful or not).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            _rewind(kwargs.get("files"))
+            limiter = self._limiters.get(backend)
+            if limiter is not None:
+                limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(backend, time.perf_counter() - start, status=None)
+                if attempt >= self.max_retries:
+                    raise e
+                delay = self._backoff(attempt)
+            else:
+                self._record(
+                    backend, time.perf_counter() - start, status=response.status_code
+                )
+                if (
+                    response.status_code not in retry_statuses
+                    or attempt >= self.max_retries
+                ):
+                    self._record_sent(backend, response.request)
+                    return response
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                delay = min(delay, self.backoff_max)
+            attempt += 1
+            with self._lock:
+                self._get_metrics(backend).retries += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """The full jitter exponential backoff delay."""
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * (2**attempt))
+        )
+
+    def _get_metrics(self, backend: str) -> BackendMetrics:
+        if backend not in self._metrics:
+            self._metrics[backend] = BackendMetrics()
+        return self._metrics[backend]
+
+    def _record(self, backend: str, latency: float, status: Optional[int]):
+        with self._lock:
+            metrics = self._get_metrics(backend)
+            metrics.requests += 1
+            metrics.latency_total += latency
+            metrics.latency_max = max(metrics.latency_max, latency)
+            if status is None:
+                metrics.errors += 1
+            else:
+                metrics.status_counts[status] = metrics.status_counts.get(status, 0) + 1
+
+    def _record_sent(self, backend: str, request: requests.PreparedRequest):
+        sent = int(request.headers.get("Content-Length", 0) or 0)
+        with self._lock:
+            self._get_metrics(backend).bytes_sent += sent
+
+    def metrics(self) -> dict:
+        """To get the request metrics per backend."""
+        with self._lock:
+            return {name: m.as_dict() for name, m in self._metrics.items()}
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics = {}
+
+    def close(self):
+        self.session.close()
+
+
+def _rewind(files):
+    if not files:
+        return
+    for _, file_tuple in files:
+        file_obj = file_tuple[1] if isinstance(file_tuple, tuple) else file_tuple
+        if hasattr(file_obj, "seek"):
+            file_obj.seek(0)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """To parse the `Retry-After` header (in seconds or as an HTTP date)."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_ipfs_client: Optional[IPFSClient] = None
+_ipfs_client_lock = threading.Lock()
+
+
+def get_ipfs_client() -> IPFSClient:
+    """
+    To get the shared IPFS HTTP client, configured with the `IPFS_HTTP_TIMEOUT`,
+    `IPFS_HTTP_MAX_RETRIES` and `IPFS_HTTP_POOL_SIZE` env variables, and the rate
+    limits of the registered backends (see `BackendLimits`).
+    """
+    # avoid the circular import, the backends use the client
+    from scripts.ipfs_backends import get_backend_rate_limits
+
+    global _ipfs_client
+    with _ipfs_client_lock:
+        if _ipfs_client is None:
+            timeout = os.getenv("IPFS_HTTP_TIMEOUT")
+            _ipfs_client = IPFSClient(
+                timeout=float(timeout) if timeout else DEFAULT_TIMEOUT,
+                max_retries=int(
+                    os.getenv("IPFS_HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES)
+                ),
+                pool_size=int(os.getenv("IPFS_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                rate_limits=get_backend_rate_limits(),
+            )
+    return _ipfs_client
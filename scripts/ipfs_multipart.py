@@ -0,0 +1,91 @@
+import os
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STREAM_CHUNK_SIZE = 1 << 16  # 64 KiB
+
+
+class MultipartFileStream:
+    """
+    A streaming multipart/form-data body for `requests`. Every file is opened only
+    while its content is being sent, in fixed-size chunks, then closed right away,
+    so the memory and file descriptors stay flat regardless of the number of files.
+    The body length is computed upfront (no chunked transfer encoding), and the
+    stream can be iterated again to retry the request.
+
+    Parameters
+    ----------
+    files: `List[Tuple[str, str]]`
+        The (upload filename, local filepath) pairs.
+    fields: `Optional[Dict[str, str]]`
+        The extra form fields, sent before the files.
+    field_name: `str`
+        The form field name of the files.
+    chunk_size: `int`
+        The file read size in bytes.
+    """
+
+    def __init__(
+        self,
+        files: List[Tuple[str, str]],
+        fields: Optional[Dict[str, str]] = None,
+        field_name: str = "file",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ):
+        self.files = files
+        self.fields = fields or {}
+        self.field_name = field_name
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self._length = None
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": self.content_type}
+
+    def _field_header(self, name: str) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+        ).encode()
+
+    def _file_header(self, filename: str) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(self.field_name)}"; '
+            f'filename="{_quote(filename)}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+    def __len__(self) -> int:
+        if self._length is None:
+            length = len(self._closing())
+            for name, value in self.fields.items():
+                length += len(self._field_header(name)) + len(value.encode()) + 2
+            for filename, filepath in self.files:
+                length += len(self._file_header(filename))
+                length += os.path.getsize(filepath) + 2
+            self._length = length
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for name, value in self.fields.items():
+            yield self._field_header(name) + value.encode() + b"\r\n"
+        for filename, filepath in self.files:
+            yield self._file_header(filename)
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                    yield chunk
+            yield b"\r\n"
+        yield self._closing()
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22")
@@ -0,0 +1,183 @@
+import io
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+from scripts.ipfs_cid import (
+    compute_block_cid,
+    compute_bytes_cid,
+    compute_directory_cid,
+    compute_stream_node,
+)
+
+
+def parse_multipart(body: bytes, content_type: str) -> List[Tuple[str, bytes]]:
+    """To parse a multipart/form-data body into (filename, content) pairs."""
+    boundary = content_type.split("boundary=")[-1].strip('"').encode()
+    parts = []
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break  # closing boundary
+        headers, _, content = part[2:].partition(b"\r\n\r\n")
+        content = content[:-2]  # strip the trailing CRLF
+        disposition = [
+            line for line in headers.split(b"\r\n") if b"filename=" in line.lower()
+        ]
+        if len(disposition) == 0:
+            continue  # a form field, not a file
+        filename = disposition[0].split(b'filename="')[-1].split(b'"')[0]
+        parts.append((filename.decode(), content))
+    return parts
+
+
+class StubIPFSServer:
+    """
+    An in-process stub of the IPFS `/api/v0/add` (plus `block/put`, `pin/ls` and
+    `pin/rm`) and Pinata `pinFileToIPFS` endpoints, returning the CIDv1 of the
+    uploaded content.
+    Failures and latency can be injected to test the retry and concurrency logic.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.uploaded_bytes = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pins = set()
+        self._failures: List[Tuple[int, Dict[str, str]]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def fail_next(self, count: int, status: int = 503, headers: Dict[str, str] = None):
+        """To respond to the next `count` requests with an error status."""
+        with self._lock:
+            self._failures += [(status, headers or {})] * count
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read_body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "") == "chunked":
+                    body = b""
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        body += self.rfile.read(size)
+                        self.rfile.readline()
+                        if size == 0:
+                            return body
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def _respond(self, status: int, body: bytes, headers: Dict[str, str]):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self._read_body()
+                with stub._lock:
+                    stub.requests += 1
+                    stub.uploaded_bytes += len(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failure = stub._failures.pop(0) if stub._failures else None
+                try:
+                    time.sleep(stub.latency)
+                    if failure is not None:
+                        self._respond(failure[0], b"stub failure", failure[1])
+                        return
+                    url = urlparse(self.path)
+                    content_type = self.headers.get("Content-Type", "")
+                    files = parse_multipart(body, content_type) if body else []
+                    params = parse_qs(url.query)
+                    if url.path == "/api/v0/add":
+                        self._respond(200, self._add(files, params), {})
+                    elif url.path == "/api/v0/block/put":
+                        self._respond(200, self._block_put(files), {})
+                    elif url.path in ["/api/v0/pin/ls", "/api/v0/pin/rm"]:
+                        self._pin(url.path.split("/")[-1], params["arg"][0])
+                    elif url.path == "/pinning/pinFileToIPFS":
+                        self._respond(200, self._pin_file(files), {})
+                    else:
+                        self._respond(404, b"not found", {})
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _add(self, files, params) -> bytes:
+                lines = []
+                for name, content in files:
+                    cid, tsize = compute_stream_node(io.BytesIO(content))
+                    lines.append({"Name": name, "Hash": cid, "Size": str(tsize)})
+                if params.get("wrap-with-directory", ["false"])[0].lower() == "true":
+                    dir_cid = compute_directory_cid(
+                        {name: io.BytesIO(content) for name, content in files}
+                    )
+                    lines.append({"Name": "", "Hash": dir_cid})
+                    with stub._lock:
+                        stub.pins.add(dir_cid)
+                else:
+                    with stub._lock:
+                        stub.pins.update(line["Hash"] for line in lines)
+                return "\n".join(json.dumps(line) for line in lines).encode() + b"\n"
+
+            def _block_put(self, files) -> bytes:
+                cid = compute_block_cid(files[0][1])
+                with stub._lock:
+                    stub.pins.add(cid)
+                return json.dumps({"Key": cid, "Size": len(files[0][1])}).encode()
+
+            def _pin(self, command: str, cid: str):
+                with stub._lock:
+                    pinned = cid in stub.pins
+                    if command == "rm":
+                        stub.pins.discard(cid)
+                if not pinned:
+                    message = {"Message": f"{cid} is not pinned", "Code": 0}
+                    self._respond(500, json.dumps(message).encode(), {})
+                elif command == "ls":
+                    keys = {"Keys": {cid: {"Type": "recursive"}}}
+                    self._respond(200, json.dumps(keys).encode(), {})
+                else:
+                    self._respond(200, json.dumps({"Pins": [cid]}).encode(), {})
+
+            def _pin_file(self, files) -> bytes:
+                if len(files) == 1 and "/" not in files[0][0]:
+                    return json.dumps(
+                        {"IpfsHash": compute_bytes_cid(files[0][1])}
+                    ).encode()
+                dir_cid = compute_directory_cid(
+                    {
+                        name.split("/")[-1]: io.BytesIO(content)
+                        for name, content in files
+                    }
+                )
+                return json.dumps({"IpfsHash": dir_cid}).encode()
+
+        return Handler
@@ -0,0 +1,181 @@
+import os
+import copy
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from metadata.sample_metadata import (
+    metadata_template_puppies,
+    metadata_template_puppies_erc1155,
+)
+from scripts.utils_ipfs import add_many_to_ipfs
+
+WRITE_BATCH_SIZE = 1000  # tokens written per worker task
+
+
+def get_breed_name(breed: str) -> str:
+    """To get the display name of a breed, e.g. 'SHIBA_INU' -> 'Shiba Inu'."""
+    return " ".join(breed.split("_")).title()
+
+
+def get_breed_image_path(breed: str) -> str:
+    """To get the local image filepath of a breed."""
+    return f"./img/{breed.lower().replace('_', '-')}.png"
+
+
+def render_erc721_metadata(breed: str, image_uri: str) -> dict:
+    """
+    To render a fresh ERC-721 token metadata, the shared template is never mutated.
+    """
+    breed_name = get_breed_name(breed)
+    metadata = copy.deepcopy(metadata_template_puppies)
+    metadata["name"] = breed_name
+    metadata["description"] = f"An adorable {breed_name} pup!"
+    metadata["image"] = image_uri
+    return metadata
+
+
+def render_erc1155_metadata(breed_id: int, breed: str, image_uri: str) -> dict:
+    """
+    To render a fresh ERC-1155 token metadata, the shared template is never mutated.
+    """
+    breed_name = get_breed_name(breed)
+    metadata = copy.deepcopy(metadata_template_puppies_erc1155)
+    metadata["name"] = breed_name
+    metadata["description"] = f"An adorable {breed_name} pup!"
+    metadata["image"] = image_uri
+    metadata["attributes"][1]["value"] = int(breed_id + 1)
+    return metadata
+
+
+def write_json_atomic(filepath: str, document: dict):
+    """
+    To write a JSON document atomically (temporary file + rename), so a reader or a
+    crash never sees a partially written metadata file.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(document, f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def pin_images(image_paths: List[str]) -> Dict[str, str]:
+    """
+    To pin every distinct image once, concurrently.
+
+    Returns
+    -------
+    `Dict[str, str]`: The image filepath to `ipfs://` URI mapping.
+    """
+    distinct_paths = sorted(set(image_paths))
+    image_uris = {}
+    for result in add_many_to_ipfs(distinct_paths):
+        if not result.ok:
+            raise ValueError(f"Failed to pin '{result.filepath}': {result.error}")
+        image_uris[result.filepath] = f"ipfs://{result.cid}"
+    return image_uris
+
+
+def build_collection_metadata(
+    tokens: List[Tuple[int, str]],
+    metadata_directory: str,
+    render: Callable[[int, str, str], dict],
+    filename: Callable[[int, str], str],
+    image_resolver: Optional[Callable[[List[str]], Dict[str, str]]] = None,
+    overwrite: bool = False,
+    max_workers: int = 8,
+) -> Dict[int, str]:
+    """
+    To build the metadata files of a whole collection. The image URIs are resolved
+    once per distinct image, then the files are rendered and written in parallel.
+
+    Parameters
+    ----------
+    tokens: `List[Tuple[int, str]]`
+        The (token ID, breed) pairs.
+    metadata_directory: `str`
+        The output directory.
+    render: `Callable[[int, str, str], dict]`
+        The (token ID, breed, image URI) -> metadata document function.
+    filename: `Callable[[int, str], str]`
+        The (token ID, breed) -> metadata filename function.
+    image_resolver: `Optional[Callable[[List[str]], Dict[str, str]]]`
+        The image filepaths -> URIs function, defaults to pinning them to IPFS.
+    overwrite: `bool`
+        Overwrite the existing metadata files.
+    max_workers: `int`
+        The number of writer threads.
+
+    Returns
+    -------
+    `Dict[int, str]`: The token ID to metadata filepath mapping.
+    """
+    os.makedirs(metadata_directory, exist_ok=True)
+    filepaths = {
+        token_id: os.path.join(metadata_directory, filename(token_id, breed))
+        for token_id, breed in tokens
+    }
+    pending = [
+        (token_id, breed)
+        for token_id, breed in tokens
+        if overwrite or not os.path.exists(filepaths[token_id])
+    ]
+    print(
+        f"Creating {len(pending)} metadata file(s) in '{metadata_directory}' "
+        f"({len(tokens) - len(pending)} already exist) ..."
+    )
+    if len(pending) == 0:
+        return filepaths
+    resolver = pin_images if image_resolver is None else image_resolver
+    image_uris = resolver([get_breed_image_path(breed) for _, breed in pending])
+
+    def write_batch(batch: List[Tuple[int, str]]):
+        for token_id, breed in batch:
+            image_uri = image_uris[get_breed_image_path(breed)]
+            write_json_atomic(filepaths[token_id], render(token_id, breed, image_uri))
+
+    batches = [
+        pending[i : i + WRITE_BATCH_SIZE]
+        for i in range(0, len(pending), WRITE_BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(write_batch, batches))  # re-raise any writer error
+    return filepaths
+
+
+def build_erc721_metadata(
+    tokens: List[Tuple[int, str]], metadata_directory: str, **kwargs
+) -> Dict[int, str]:
+    """
+    To build the ERC-721 metadata files (`{token_id}-{breed}.json`), see
+    `build_collection_metadata` for the arguments.
+    """
+    return build_collection_metadata(
+        tokens,
+        metadata_directory,
+        render=lambda _, breed, image_uri: render_erc721_metadata(breed, image_uri),
+        filename=lambda token_id, breed: f"{token_id}-{breed}.json",
+        **kwargs,
+    )
+
+
+def build_erc1155_metadata(
+    tokens: List[Tuple[int, str]], metadata_directory: str, **kwargs
+) -> Dict[int, str]:
+    """
+    To build the ERC-1155 metadata files (`{token_id}.json`), see
+    `build_collection_metadata` for the arguments.
+    """
+    return build_collection_metadata(
+        tokens,
+        metadata_directory,
+        render=render_erc1155_metadata,
+        filename=lambda token_id, _: f"{token_id}.json",
+        **kwargs,
+    )
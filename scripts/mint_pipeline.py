@@ -0,0 +1,155 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from scripts.tx_broadcaster import TxBroadcaster
+from scripts.profiling import with_current_span
+
+
+@dataclass
+class MintResult:
+    """The pipeline state and outcome of a single mint request."""
+
+    index: int
+    request_id: Optional[int] = None
+    request_block: Optional[int] = None
+    token_id: Optional[int] = None
+    breed: Optional[int] = None
+    amount: Optional[int] = None
+    metadata_path: str = ""
+    token_uri: str = ""
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def broadcast_requests(
+    contract_fn,
+    broadcaster: TxBroadcaster,
+    n: int,
+    tx_params: Optional[dict] = None,
+) -> List[MintResult]:
+    """
+    To send N mint requests through the in-flight window of the broadcaster and
+    collect their receipts together.
+
+    Parameters
+    ----------
+    contract_fn: `brownie.network.contract.ContractTx`
+        The `createCollectible` function of the collectible.
+    broadcaster: `TxBroadcaster`
+        The transaction broadcaster of the minting account.
+    n: `int`
+        The number of requests to send.
+    tx_params: `Optional[dict]`
+        Extra transaction parameters, e.g. the paid `value`.
+
+    Returns
+    -------
+    `List[MintResult]`: The per-request results, in sending order.
+    """
+    results = [MintResult(index=i) for i in range(n)]
+    sent = []
+    for result in results:
+        start = time.perf_counter()
+        try:
+            sent.append(
+                (result, start, broadcaster.send(contract_fn, tx_params=tx_params))
+            )
+        except Exception as e:
+            result.error = f"request: {e!r}"
+    for result, start, future in sent:
+        try:
+            tx = future.result()
+            result.request_id = int(tx.events["RequestCollectible"]["requestId"])
+            result.request_block = tx.block_number
+        except Exception as e:
+            result.error = f"request: {e!r}"
+        result.timings["request"] = time.perf_counter() - start
+    return results
+
+
+def run_pipeline(
+    results: List[MintResult],
+    stages: List[Tuple[str, Callable[[MintResult], None]]],
+    max_workers: int = 4,
+) -> List[MintResult]:
+    """
+    To move every mint result through the stages, each stage having its own worker
+    pool, so a slow stage for one token does not stall the other tokens.
+    A failing stage records the error and drops the token from the later stages.
+
+    Parameters
+    ----------
+    results: `List[MintResult]`
+        The mint results from `broadcast_requests`.
+    stages: `List[Tuple[str, Callable[[MintResult], None]]]`
+        The ordered (name, function) stages, each function updates the result.
+    max_workers: `int`
+        The number of workers per stage.
+
+    Returns
+    -------
+    `List[MintResult]`: The same results, updated in place.
+    """
+    pending = [r for r in results if r.ok]
+    if len(pending) == 0 or len(stages) == 0:
+        return results
+    remaining = [len(pending)]
+    lock = threading.Lock()
+    done = threading.Event()
+    pools = [
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"mint-{name}")
+        for name, _ in stages
+    ]
+
+    def run_stage(result: MintResult, stage_idx: int):
+        name, func = stages[stage_idx]
+        start = time.perf_counter()
+        try:
+            func(result)
+        except Exception as e:
+            result.error = f"{name}: {e!r}"
+        result.timings[name] = time.perf_counter() - start
+        if result.ok and stage_idx + 1 < len(stages):
+            pools[stage_idx + 1].submit(
+                with_current_span(run_stage), result, stage_idx + 1
+            )
+            return
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+
+    for result in pending:
+        pools[0].submit(with_current_span(run_stage), result, 0)
+    done.wait()
+    for pool in pools:
+        pool.shutdown(wait=True)
+    return results
+
+
+def report(results: List[MintResult], elapsed: float) -> dict:
+    """
+    To summarize the mint run, printing the failures and the throughput.
+    """
+    succeeded = [r for r in results if r.ok]
+    for r in results:
+        if not r.ok:
+            print(f"Mint #{r.index} (request {r.request_id}) FAILED: {r.error}")
+    summary = {
+        "requested": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "elapsed_sec": elapsed,
+        "mints_per_sec": len(succeeded) / elapsed if elapsed > 0 else 0.0,
+    }
+    print(
+        f"Minted {summary['succeeded']}/{summary['requested']} token(s) in "
+        f"{elapsed:.2f}s ({summary['mints_per_sec']:.2f} mints/sec)."
+    )
+    return summary
@@ -1,59 +1,118 @@
 import time
 import random
-from typing import Optional
-from brownie import MultiCollectible, network, config
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from brownie import MultiCollectible, network, config, web3
 from scripts.utils import (
     get_account,
     get_contract,
     LOCAL_BLOCKCHAIN_ENV,
     OPENSEA_BASE_URL,
 )
-from scripts.multi_collectible.create_metadata import pin_metadata_to_ipfs
+from scripts.multi_collectible.create_metadata import (
+    generate_metadata,
+    pin_metadata_to_ipfs,
+)
+from scripts.ipfs_cid import compute_cid
 from scripts.vrf_subscription import (
     get_subscription,
     register_consumer,
 )
+from scripts.vrf_fulfillment import wait_for_fulfillment
+from scripts.tx_broadcaster import get_broadcaster
+from scripts.price_cache import price_cache
+from scripts.profiling import profiled
+from scripts.mint_pipeline import (
+    MintResult,
+    broadcast_requests,
+    run_pipeline,
+    report,
+)
 
 
+@profiled()
 def deploy():
     network_id = network.show_active()
-    # pin the assets to IPFS and obtain the base token URI
-    base_uri = f"ipfs://{pin_metadata_to_ipfs()}/"
+    # compute the base token URI offline, while the assets are pinned in parallel
+    metadata_directory = generate_metadata()
+    base_uri = f"ipfs://{compute_cid(metadata_directory)}/"
     print(f"The ERC1155 token base URI is available here: '{base_uri}")
     token_name = "Puppies Multi Token"
     token_symbol = "PMT"
 
-    # get the VRF subscription ID
-    subscription_id = get_subscription()
-    key_hash = config["networks"][network_id]["key_hash"]  # aka Gas Lane
-    # deploy the collectible
-    multi_collectible = MultiCollectible.deploy(
-        token_name,
-        token_symbol,
-        get_contract(contract_name="eth_usd_price_feed").address,
-        get_contract(contract_name="vrf_coordinator").address,
-        subscription_id,
-        key_hash,
-        base_uri,
-        {"from": get_account()},
-        publish_source=config["networks"].get(network_id, {}).get("verify", False),
-    )
-    register_consumer(
-        contract_address=multi_collectible.address, subscription_id=subscription_id
-    )
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pinning = pool.submit(pin_metadata_to_ipfs)
+        # get the VRF subscription ID
+        subscription_id = get_subscription()
+        key_hash = config["networks"][network_id]["key_hash"]  # aka Gas Lane
+        # deploy the collectible
+        multi_collectible = MultiCollectible.deploy(
+            token_name,
+            token_symbol,
+            get_contract(contract_name="eth_usd_price_feed").address,
+            get_contract(contract_name="vrf_coordinator").address,
+            subscription_id,
+            key_hash,
+            base_uri,
+            {"from": get_account()},
+            publish_source=config["networks"].get(network_id, {}).get("verify", False),
+        )
+        register_consumer(
+            contract_address=multi_collectible.address, subscription_id=subscription_id
+        )
+        pinned_uri = f"ipfs://{pinning.result()}/"
+    if pinned_uri != base_uri:  # the IPFS service used different CID settings
+        print(f"The pinned base URI differs, updating it to: '{pinned_uri}'")
+        multi_collectible.setURI(pinned_uri, {"from": get_account()}).wait(1)
     # The NFT token URL
     collection_url = f"{OPENSEA_BASE_URL}/{network_id}/{multi_collectible.address}/"
     print(f"Successfully deployed the ERC1155 collection at '{collection_url}'")
     return multi_collectible
 
 
+@profiled()
 def mint(
-    collectible, account, rng: Optional[int] = None, pay_wei: Optional[int] = None
+    collectible,
+    account,
+    rng: Optional[int] = None,
+    pay_wei: Optional[int] = None,
+    lots: int = 1,
+    rngs: Optional[List[int]] = None,
 ):
+    """
+    To mint a collectible request, or several lots in a single batched request
+    (one VRF request and fulfillment for every lot).
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The MultiCollectible contract.
+    account: `brownie.network.account.Account`
+        The minting account.
+    rng: `Optional[int]`
+        The random number of a single lot, only used on the local chain.
+    pay_wei: `Optional[int]`
+        The paid amount (in Wei) per lot, defaults to the cached entrance fee
+        plus the safety margin (see `price_cache`).
+    lots: `int`
+        The number of lots, batched with `createCollectibles` if more than one.
+    rngs: `Optional[List[int]]`
+        The random number per lot, only used on the local chain.
+
+    Returns
+    -------
+    `brownie.network.event._EventItem`: The `MintedCollectible` event, or the list of
+    them (one per lot) if `lots` > 1.
+    """
     print(f"Minting collectible ...")
     # mint the collectible here
-    pay_wei = int(collectible.getEntranceFee() * 1.01) if pay_wei is None else pay_wei
-    mint_tx = collectible.createCollectible({"from": account, "value": pay_wei})
+    pay_wei = price_cache.pay_amount(collectible) if pay_wei is None else pay_wei
+    if lots > 1:
+        mint_tx = collectible.createCollectibles(
+            lots, {"from": account, "value": pay_wei * lots}
+        )
+    else:
+        mint_tx = collectible.createCollectible({"from": account, "value": pay_wei})
     mint_tx.wait(1)
     mint_event = mint_tx.events["RequestCollectible"]
     print(f"User '{mint_event['owner']}' successfully paid {mint_event['amount']} Wei!")
@@ -63,18 +122,216 @@ def mint(
         print(f"Manually fulfilling the VRF random request ...")
         vrf = get_contract(contract_name="vrf_coordinator")
         # random number from 100 to 100,000
-        winning_rng = random.randint(100, 100000) if rng is None else rng
+        if rngs is None:
+            rngs = [
+                random.randint(100, 100000) if rng is None else rng for _ in range(lots)
+            ]
         fulfill_tx = vrf.fulfillRandomWordsWithOverride(
             mint_event["requestId"],
             collectible.address,
-            [winning_rng],
+            rngs,
             {"from": account},
         )
         fulfill_tx.wait(1)
     else:
         print(f"Waiting for the VRF fulfill ...")
-        time.sleep(60)
-    print(f"Successfully minted the token!")
+    minted_events = wait_for_fulfillment(
+        collectible=collectible,
+        request_id=mint_event["requestId"],
+        from_block=mint_tx.block_number,
+        all_events=True,
+    )
+    for minted_event in minted_events:
+        print(
+            f"Successfully minted {minted_event['amount']} token(s) "
+            f"of breed #{minted_event['breed']}!"
+        )
+    return minted_events if lots > 1 else minted_events[0]
+
+
+@profiled()
+def mint_many(
+    collectible,
+    account,
+    n: int,
+    rngs: Optional[List[int]] = None,
+    pay_wei: Optional[int] = None,
+    max_workers: int = 4,
+    vrf_simulator=None,
+    journal=None,
+) -> List[MintResult]:
+    """
+    To mint N collectible requests in a batch. The paid requests are sent
+    back-to-back, then each one is fulfilled independently.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The MultiCollectible contract.
+    account: `brownie.network.account.Account`
+        The minting account.
+    n: `int`
+        The number of requests to send.
+    rngs: `Optional[List[int]]`
+        The random number per request, only used on the local chain.
+    pay_wei: `Optional[int]`
+        The paid amount (in Wei) per request, defaults to the cached entrance fee
+        plus the safety margin (see `price_cache`).
+    max_workers: `int`
+        The number of fulfillment workers.
+    vrf_simulator: `Optional[VRFSimulator]`
+        The running local VRF fulfiller (see `vrf_simulator`), if given, the
+        requests are left to it instead of being fulfilled right away.
+    journal: `Optional[DropJournal]`
+        The journal recording every completed step (see `drop_journal`), so an
+        interrupted run can be finished with `resume_mints`.
+
+    Returns
+    -------
+    `List[MintResult]`: The per-request results, in request order.
+    """
+    print(f"Minting {n} collectible(s) ...")
+    start = time.perf_counter()
+    pay_wei = price_cache.pay_amount(collectible) if pay_wei is None else pay_wei
+    broadcaster = get_broadcaster(account)
+    if journal is not None:
+        run_id = journal.start_run(
+            collectible.address,
+            account.address,
+            from_block=web3.eth.block_number,
+            n=n,
+            target="fulfilled",
+        )
+    results = broadcast_requests(
+        collectible.createCollectible,
+        broadcaster=broadcaster,
+        n=n,
+        tx_params={"value": pay_wei},
+    )
+    if journal is not None:
+        journal.record_many(
+            collectible.address,
+            [r for r in results if r.ok],
+            "sent",
+            run_id=run_id,
+            target="fulfilled",
+        )
+    _complete_mints(
+        collectible,
+        account,
+        results,
+        rngs=rngs,
+        max_workers=max_workers,
+        vrf_simulator=vrf_simulator,
+        journal=journal,
+    )
+    report(results, elapsed=time.perf_counter() - start)
+    return results
+
+
+@profiled()
+def resume_mints(
+    collectible, account, journal, max_workers: int = 4
+) -> List[MintResult]:
+    """
+    To finish the journaled requests of an interrupted run, the paid requests
+    are only fulfilled (nothing is requested or paid again).
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The MultiCollectible contract.
+    account: `brownie.network.account.Account`
+        The fulfilling account on the local chain.
+    journal: `DropJournal`
+        The journal of the interrupted run (see `drop_journal`).
+    max_workers: `int`
+        The number of fulfillment workers.
+
+    Returns
+    -------
+    `List[MintResult]`: The per-request results of the resumed requests.
+    """
+    start = time.perf_counter()
+    results = journal.get_unfinished(collectible.address).get("fulfilled", [])
+    if len(results) == 0:
+        print("Nothing to resume, every journaled mint is finished.")
+        return results
+    print(f"Resuming {len(results)} collectible request(s) ...")
+    _complete_mints(
+        collectible,
+        account,
+        results,
+        max_workers=max_workers,
+        journal=journal,
+        resumed=True,
+    )
+    report(results, elapsed=time.perf_counter() - start)
+    return results
+
+
+def _complete_mints(
+    collectible,
+    account,
+    results: List[MintResult],
+    rngs: Optional[List[int]] = None,
+    max_workers: int = 4,
+    vrf_simulator=None,
+    journal=None,
+    resumed: bool = False,
+):
+    """To fulfill the sent requests, the already fulfilled ones are skipped."""
+    broadcaster = get_broadcaster(account)
+    is_local = network.show_active() in LOCAL_BLOCKCHAIN_ENV
+    vrf = get_contract(contract_name="vrf_coordinator")
+    poll_kwargs = {}
+    if vrf_simulator is not None:  # follow the simulated fulfillments closely
+        poll_kwargs = {
+            "poll_interval": vrf_simulator.poll_interval,
+            "max_poll_interval": vrf_simulator.poll_interval,
+        }
+
+    def fulfill(result: MintResult):
+        if result.amount is not None:
+            return
+        minted_event = None
+        if resumed:  # it may have been fulfilled before the interruption
+            try:
+                minted_event = wait_for_fulfillment(
+                    collectible=collectible,
+                    request_id=result.request_id,
+                    from_block=result.request_block,
+                    timeout=0,
+                )
+            except TimeoutError:
+                pass
+        if minted_event is None and is_local and vrf_simulator is None:
+            # manually fulfill the request
+            winning_rng = (
+                random.randint(100, 100000) if rngs is None else rngs[result.index]
+            )
+            broadcaster.send(
+                vrf.fulfillRandomWordsWithOverride,
+                result.request_id,
+                collectible.address,
+                [winning_rng],
+            ).result()
+        if minted_event is None:
+            minted_event = wait_for_fulfillment(
+                collectible=collectible,
+                request_id=result.request_id,
+                from_block=result.request_block,
+                **poll_kwargs,
+            )
+        result.breed = int(minted_event["breed"])
+        result.amount = int(minted_event["amount"])
+        if journal is not None:
+            journal.record(collectible.address, result, "fulfilled")
+
+    run_pipeline(results, stages=[("fulfill", fulfill)], max_workers=max_workers)
+    if journal is not None:
+        journal.record_errors(collectible.address, results)
+    return results
 
 
 def main():
@@ -0,0 +1,127 @@
+import os
+import math
+import time
+import threading
+from fractions import Fraction
+from typing import Dict, Hashable, Optional, Tuple
+from brownie import network
+from scripts.utils import get_contract
+
+# overridden by the PRICE_CACHE_TTL and PRICE_SAFETY_MARGIN env variables
+DEFAULT_TTL = 60  # seconds between two price feed round checks
+DEFAULT_MARGIN = 0.01  # paid on top of the minimum price, for a price move
+
+
+class PriceCache:
+    """
+    A client-side cache of the collectible prices derived from the ETH/USD feed
+    (`getEntranceFee` and `getTokenMinimumPrice`). The prices are keyed on the
+    `latestRoundData` round ID of the feed, which is checked at most once per TTL,
+    so many payments are computed from a single price read.
+
+    Parameters
+    ----------
+    ttl: `Optional[float]`
+        The seconds a feed round is trusted without checking it again.
+    margin: `Optional[float]`
+        The default safety margin of `pay_amount`, e.g. 0.01 for 1%.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, margin: Optional[float] = None):
+        self.ttl = float(
+            os.getenv("PRICE_CACHE_TTL", DEFAULT_TTL) if ttl is None else ttl
+        )
+        self.margin = float(
+            os.getenv("PRICE_SAFETY_MARGIN", DEFAULT_MARGIN)
+            if margin is None
+            else margin
+        )
+        self._network_id = None
+        self._rounds: Dict[str, Tuple[int, float]] = {}  # feed -> (round, checked)
+        self._prices: Dict[str, Tuple[int, Dict[Hashable, int]]] = {}
+        self._lock = threading.RLock()
+        self.round_reads = 0
+        self.price_reads = 0
+        self.hits = 0
+
+    def _round_id(self) -> int:
+        feed = get_contract(contract_name="eth_usd_price_feed")
+        now = time.monotonic()
+        with self._lock:
+            network_id = network.show_active()
+            if network_id != self._network_id:  # network switched, drop everything
+                self._rounds.clear()
+                self._prices.clear()
+                self._network_id = network_id
+            cached = self._rounds.get(feed.address)
+            if cached is not None and now - cached[1] < self.ttl:
+                return cached[0]
+        round_id = int(feed.latestRoundData()[0])
+        with self._lock:
+            self.round_reads += 1
+            self._rounds[feed.address] = (round_id, now)
+        return round_id
+
+    def _get(self, collectible, key: Hashable, read) -> int:
+        round_id = self._round_id()
+        with self._lock:
+            cached_round, prices = self._prices.get(collectible.address, (None, {}))
+            if cached_round == round_id and key in prices:
+                self.hits += 1
+                return prices[key]
+        price = int(read())
+        with self._lock:
+            self.price_reads += 1
+            cached_round, prices = self._prices.get(collectible.address, (None, {}))
+            if cached_round != round_id:  # a new round, the older prices are stale
+                prices = {}
+                self._prices[collectible.address] = (round_id, prices)
+            prices[key] = price
+        return price
+
+    def get_entrance_fee(self, collectible) -> int:
+        """To get the minimum paid value (in Wei) of the collectible."""
+        return self._get(collectible, "entrance_fee", collectible.getEntranceFee)
+
+    def get_token_minimum_price(self, collectible, token_id: int) -> int:
+        """To get the minimum price (in Wei) of a token ID (aka breed)."""
+        return self._get(
+            collectible,
+            ("token", int(token_id)),
+            lambda: collectible.getTokenMinimumPrice(token_id),
+        )
+
+    def pay_amount(
+        self,
+        collectible,
+        token_id: Optional[int] = None,
+        margin: Optional[float] = None,
+    ) -> int:
+        """
+        To get the value (in Wei) to pay for a mint request: the entrance fee (or
+        the minimum price of `token_id`) plus the safety margin, rounded up.
+        """
+        price = (
+            self.get_entrance_fee(collectible)
+            if token_id is None
+            else self.get_token_minimum_price(collectible, token_id)
+        )
+        margin = self.margin if margin is None else margin
+        return price + math.ceil(price * Fraction(str(margin)))  # exact in Wei
+
+    def clear(self):
+        with self._lock:
+            self._rounds.clear()
+            self._prices.clear()
+
+    def stats(self) -> dict:
+        """To get the round/price read counters and the cache hits."""
+        with self._lock:
+            return {
+                "round_reads": self.round_reads,
+                "price_reads": self.price_reads,
+                "hits": self.hits,
+            }
+
+
+price_cache = PriceCache()
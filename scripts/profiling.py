@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from brownie import network, web3
+from brownie.network import history
+from scripts.ipfs_client import get_ipfs_client
+
+# turn the profiling on/off with `PROFILING=1/0`, it's on by default on development
+PROFILED_NETWORKS = ["development"]
+DEFAULT_REPORT_DIR = "./reports/profiles"
+RPC_COUNTER_NAME = "profiling_rpc_counter"
+
+# the innermost open span of the running thread (or of the submitting thread, for
+# the worker functions wrapped with `with_current_span`)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "profiling_current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """The wall time, gas, RPC round trips and IPFS bytes of a profiled step."""
+
+    name: str
+    attributes: dict = field(default_factory=dict)
+    started_at: float = 0.0  # epoch seconds
+    wall_time: float = 0.0
+    gas_used: int = 0
+    tx_count: int = 0
+    rpc_calls: Dict[str, int] = field(default_factory=dict)
+    ipfs_bytes: int = 0
+    error: Optional[str] = None
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def rpc_total(self) -> int:
+        return sum(self.rpc_calls.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "attributes": self.attributes,
+            "started_at": self.started_at,
+            "wall_time": self.wall_time,
+            "gas_used": self.gas_used,
+            "tx_count": self.tx_count,
+            "rpc_total": self.rpc_total,
+            "rpc_calls": dict(self.rpc_calls),
+            "ipfs_bytes": self.ipfs_bytes,
+            "error": self.error,
+            "children": [child.as_dict() for child in self.children],
+        }
+
+
+class Tracer:
+    """
+    The span hooks of an external tracer (e.g. an OpenTelemetry adapter), register
+    it with `Profiler.add_tracer`. A hook error never breaks the profiled step.
+    """
+
+    def on_span_start(self, span: Span):
+        pass
+
+    def on_span_end(self, span: Span):
+        pass
+
+
+class _RPCCounter:
+    """A web3 middleware counting the JSON-RPC requests per method."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, make_request, w3):
+        def middleware(method, params):
+            with self._lock:
+                self.counts[method] = self.counts.get(method, 0) + 1
+            return make_request(method, params)
+
+        return middleware
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+class Profiler:
+    """
+    The instrumentation of the deploy and mint scripts. Every span records the
+    gas used by the transactions sent meanwhile (from the brownie `history`), its
+    wall time, the JSON-RPC round trips and the bytes uploaded to IPFS. A JSON
+    report is written when a top-level span ends.
+    The counters are process wide, so a span includes the concurrent work too.
+
+    Parameters
+    ----------
+    report_dir: `str`
+        The directory of the JSON reports.
+    """
+
+    def __init__(self, report_dir: str = DEFAULT_REPORT_DIR):
+        self.report_dir = report_dir
+        self.tracers: List[Tracer] = []
+        self.reports: List[str] = []
+        self._rpc_counter = _RPCCounter()
+        self._lock = threading.Lock()
+
+    def add_tracer(self, tracer: Tracer):
+        self.tracers.append(tracer)
+
+    def _install_rpc_counter(self):
+        try:
+            web3.middleware_onion.add(self._rpc_counter, name=RPC_COUNTER_NAME)
+        except ValueError:
+            pass  # already installed
+
+    def _counters(self):
+        ipfs_bytes = sum(m["bytes_sent"] for m in get_ipfs_client().metrics().values())
+        return len(history), self._rpc_counter.snapshot(), ipfs_bytes
+
+    def _notify(self, hook: str, span: Span):
+        for tracer in self.tracers:
+            try:
+                getattr(tracer, hook)(span)
+            except Exception as e:
+                print(f"Tracer {hook} hook failed: {e!r}")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        To profile a step, nested spans are attached to the enclosing one (of the
+        submitting thread, for the worker functions wrapped with
+        `with_current_span`).
+        """
+        parent = _current_span.get()
+        is_root = parent is None
+        span = Span(name=name, attributes=attributes, started_at=time.time())
+        if is_root:
+            self._install_rpc_counter()
+        else:
+            with self._lock:  # the workers of a span append concurrently
+                parent.children.append(span)
+        token = _current_span.set(span)
+        self._notify("on_span_start", span)
+        tx_start, rpc_start, ipfs_start = self._counters()
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.wall_time = time.perf_counter() - start
+            tx_end, rpc_end, ipfs_end = self._counters()
+            txs = list(history)[tx_start:tx_end]
+            span.tx_count = len(txs)
+            span.gas_used = sum(tx.gas_used or 0 for tx in txs)
+            span.rpc_calls = {
+                method: count - rpc_start.get(method, 0)
+                for method, count in rpc_end.items()
+                if count > rpc_start.get(method, 0)
+            }
+            span.ipfs_bytes = ipfs_end - ipfs_start
+            _current_span.reset(token)
+            self._notify("on_span_end", span)
+            if is_root:
+                self.write_report(span)
+
+    def write_report(self, span: Span) -> str:
+        """To write the JSON report of a top-level span, returning its filepath."""
+        os.makedirs(self.report_dir, exist_ok=True)
+        started_at = datetime.fromtimestamp(span.started_at, tz=timezone.utc)
+        network_id = network.show_active()
+        filepath = os.path.join(
+            self.report_dir,
+            f"{started_at:%Y%m%dT%H%M%S%f}-{network_id}-{span.name}.json",
+        )
+        report = {
+            "network": network_id,
+            "started_at": started_at.isoformat(),
+            "span": span.as_dict(),
+        }
+        with open(filepath, "w") as f:
+            json.dump(report, f, indent=2)
+        self.reports.append(filepath)
+        print(
+            f"[profile] {span.name}: {span.wall_time:.2f}s, {span.gas_used} gas, "
+            f"{span.tx_count} tx(s), {span.rpc_total} RPC call(s), "
+            f"{span.ipfs_bytes} IPFS byte(s) -> '{filepath}'"
+        )
+        return filepath
+
+
+profiler = Profiler(report_dir=os.getenv("PROFILING_REPORT_DIR", DEFAULT_REPORT_DIR))
+
+
+def with_current_span(func):
+    """
+    To wrap a function run by a worker thread, so its spans are attached to the
+    span open when it's wrapped (e.g. at submit time), instead of starting their
+    own top-level span.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # a context can't be entered by two threads at once, run in a copy
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def is_profiling_enabled() -> bool:
+    setting = os.getenv("PROFILING")
+    if setting is not None:
+        return setting.lower() not in ("0", "false", "no")
+    return network.is_connected() and network.show_active() in PROFILED_NETWORKS
+
+
+def profiled(name: Optional[str] = None):
+    """
+    To profile every call of a script function, see `Profiler`.
+
+    Parameters
+    ----------
+    name: `Optional[str]`
+        The span name, defaults to `module.function`.
+    """
+
+    def decorator(func):
+        span_name = name or f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_profiling_enabled():
+                return func(*args, **kwargs)
+            with profiler.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
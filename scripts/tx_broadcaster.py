@@ -0,0 +1,261 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+from brownie import network, web3
+from brownie.network.transaction import Status
+
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_STUCK_TIMEOUT = 180  # seconds before a pending tx gets a gas bump
+DEFAULT_GAS_BUMP = 1.125  # the minimum replacement increment accepted by nodes
+DEFAULT_POLL_INTERVAL = 0.5
+NONCE_ERRORS = [
+    "nonce too low",
+    "nonce too high",
+    "correct nonce",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+]
+
+
+def is_nonce_error(error: Exception) -> bool:
+    return any(pattern in str(error).lower() for pattern in NONCE_ERRORS)
+
+
+class TxBroadcaster:
+    """
+    A transaction broadcaster for a single account. The nonces are assigned locally,
+    up to `max_in_flight` transactions are kept pending at a time, and the receipts
+    are collected in the background. A transaction still pending after
+    `stuck_timeout` is replaced with a gas bump, and nonce errors are recovered by
+    re-syncing the nonce with the chain.
+
+    Parameters
+    ----------
+    account: `brownie.network.account.Account`
+        The sending account, e.g. from `scripts.utils.get_account`.
+    max_in_flight: `int`
+        The maximum number of pending transactions.
+    confirmations: `int`
+        The number of confirmations of a collected receipt.
+    stuck_timeout: `float`
+        The time (in seconds) before a pending transaction is replaced.
+    gas_bump: `float`
+        The gas price multiplier of a replacement transaction.
+    max_replacements: `int`
+        The maximum number of replacements per transaction.
+    """
+
+    def __init__(
+        self,
+        account,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        confirmations: int = 1,
+        stuck_timeout: float = DEFAULT_STUCK_TIMEOUT,
+        gas_bump: float = DEFAULT_GAS_BUMP,
+        max_replacements: int = 3,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.account = account
+        self.max_in_flight = max_in_flight
+        self.confirmations = confirmations
+        self.stuck_timeout = stuck_timeout
+        self.gas_bump = gas_bump
+        self.max_replacements = max_replacements
+        self.poll_interval = poll_interval
+        self._nonce = None
+        self._nonce_lock = threading.Lock()
+        self._window = threading.BoundedSemaphore(max_in_flight)
+        self._collector = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="tx-collector"
+        )
+        self._futures: List[Future] = []
+        self._futures_lock = threading.Lock()
+        self._stats = {
+            "sent": 0,
+            "confirmed": 0,
+            "reverted": 0,
+            "replaced": 0,
+            "nonce_resyncs": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @property
+    def in_flight(self) -> int:
+        """The number of sent transactions without a collected receipt yet."""
+        with self._futures_lock:
+            return sum(not f.done() for f in self._futures)
+
+    def resync_nonce(self):
+        """To re-read the next nonce (including the pending txs) from the chain."""
+        with self._nonce_lock:
+            self._nonce = web3.eth.get_transaction_count(
+                self.account.address, "pending"
+            )
+        self._count("nonce_resyncs")
+
+    def _broadcast(self, send: Callable[[dict], object], max_attempts: int = 3):
+        """
+        To assign the next local nonce and broadcast, re-syncing on nonce errors.
+        """
+        for attempt in range(max_attempts):
+            with self._nonce_lock:
+                if self._nonce is None:
+                    self._nonce = web3.eth.get_transaction_count(
+                        self.account.address, "pending"
+                    )
+                try:
+                    tx = send(
+                        {
+                            "from": self.account,
+                            "nonce": self._nonce,
+                            "required_confs": 0,
+                        }
+                    )
+                except Exception as e:
+                    self._nonce = None  # unknown state, re-read it on the next call
+                    if not is_nonce_error(e) or attempt + 1 >= max_attempts:
+                        raise
+                    print(f"Nonce error, re-syncing with the chain: {e}")
+                    self._count("nonce_resyncs")
+                    continue
+                self._nonce += 1
+            self._count("sent")
+            return tx
+
+    def send(self, contract_fn, *args, tx_params: Optional[dict] = None) -> Future:
+        """
+        To broadcast a contract transaction, blocking only while the in-flight window
+        is full.
+
+        Parameters
+        ----------
+        contract_fn: `brownie.network.contract.ContractTx`
+            The contract function to transact, e.g. `collectible.createCollectible`.
+        *args:
+            The contract function arguments.
+        tx_params: `Optional[dict]`
+            Extra transaction parameters, e.g. the paid `value`.
+
+        Returns
+        -------
+        `concurrent.futures.Future`: The future of the confirmed receipt.
+        """
+        extra_params = dict(tx_params or {})
+        return self._submit(
+            lambda params: contract_fn(*args, dict(extra_params, **params))
+        )
+
+    def transfer(self, to: str, amount) -> Future:
+        """To broadcast an ETH transfer, see `send`."""
+        return self._submit(lambda params: self.account.transfer(to, amount, **params))
+
+    def _submit(self, send: Callable[[dict], object]) -> Future:
+        self._window.acquire()
+        try:
+            tx = self._broadcast(send)
+        except Exception:
+            self._window.release()
+            raise
+        future = self._collector.submit(self._collect, tx)
+        future.add_done_callback(lambda _: self._window.release())
+        with self._futures_lock:
+            # only track the in-flight txs, the callers hold their own futures
+            self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def _collect(self, tx):
+        """
+        To wait for the receipt, replacing the transaction if it gets stuck. The
+        original and its replacements share the nonce, whichever is mined is
+        returned (the other ones get dropped).
+        """
+        candidates = [tx]
+        deadline = time.monotonic() + self.stuck_timeout
+        while True:
+            mined = [
+                c
+                for c in candidates
+                if c.status not in [Status.Pending, Status.Dropped]
+            ]
+            if mined:
+                tx = mined[0]
+                break
+            if all(c.status == Status.Dropped for c in candidates):
+                raise ValueError(
+                    f"Dropped tx: '{candidates[0].txid}', its nonce was used by "
+                    f"another transaction"
+                )
+            if time.monotonic() < deadline or len(candidates) > self.max_replacements:
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                print(f"Tx '{candidates[-1].txid}' is stuck, replacing it ...")
+                candidates.append(
+                    candidates[-1].replace(increment=self.gas_bump, silent=True)
+                )
+                self._count("replaced")
+            except Exception as e:
+                if not is_nonce_error(e):
+                    raise
+                # a candidate got mined in the meantime
+            deadline = time.monotonic() + self.stuck_timeout
+        tx.wait(self.confirmations)
+        if tx.status == Status.Reverted:
+            self._count("reverted")
+            raise ValueError(f"Reverted tx: '{tx.txid}' - {tx.revert_msg}")
+        self._count("confirmed")
+        return tx
+
+    def flush(self) -> List:
+        """
+        To wait for every in-flight transaction.
+
+        Returns
+        -------
+        `List`: The receipts (or exceptions) of the txs still in flight when called,
+        in the sending order.
+        """
+        with self._futures_lock:
+            futures, self._futures = self._futures, []
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self):
+        self.flush()
+        self._collector.shutdown(wait=True)
+
+
+_broadcasters = {}
+_broadcasters_lock = threading.Lock()
+
+
+def get_broadcaster(account, **kwargs) -> TxBroadcaster:
+    """
+    To get the shared broadcaster of an account on the active network, so every
+    script sending from the account draws from the same local nonce stream.
+    The keyword arguments only apply when the broadcaster is created.
+    """
+    key = (network.show_active(), account.address)
+    with _broadcasters_lock:
+        if key not in _broadcasters:
+            _broadcasters[key] = TxBroadcaster(account, **kwargs)
+        broadcaster = _broadcasters[key]
+    if broadcaster.in_flight == 0:
+        # the account may have been used elsewhere (or the chain reverted) meanwhile
+        broadcaster.resync_nonce()
+    return broadcaster
@@ -1,4 +1,6 @@
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Optional
 from brownie import (
     accounts,
     config,
@@ -6,11 +8,12 @@ from brownie import (
     MockV3Aggregator,
     VRFCoordinatorV2Mock,
     LinkToken,
+    Multicall3,
     Contract,
+    web3,
 )
 from web3 import Web3
 
-
 DECIMALS = 8
 STARTING_PRICE = 200000000000
 BASE_FEE = 100000000000000000  # VRF Coordinator mock base fee
@@ -30,6 +33,7 @@ CONTRACT_TO_MOCK = {
     "eth_usd_price_feed": MockV3Aggregator,
     "vrf_coordinator": VRFCoordinatorV2Mock,
     "link_token": LinkToken,
+    "multicall": Multicall3,
 }
 
 # NFT variables
@@ -42,6 +46,75 @@ BREED_TOKEN_URIS = {
 BREED_NAMES = ["PUG", "SHIBA_INU", "ST_BERNARD"]
 
 
+class ResolutionCache:
+    """
+    A per-network cache of the resolved contract handles and account objects.
+    Every entry is dropped when the active network changes, and an entry can be
+    validated on each lookup (e.g. a mock that is no longer the latest deployment).
+    """
+
+    def __init__(self):
+        self._network_id = None
+        self._entries = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        key: Hashable,
+        resolve: Callable[[], Any],
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        To get the cached value of a key, resolving (and caching) it if missing.
+
+        Parameters
+        ----------
+        key: `Hashable`
+            The cache key.
+        resolve: `Callable[[], Any]`
+            The function resolving the value on a cache miss.
+        is_valid: `Optional[Callable[[Any], bool]]`
+            The function checking whether a cached value is still valid.
+        """
+        network_id = network.show_active()
+        with self._lock:
+            if network_id != self._network_id:  # network switched, drop everything
+                self._entries.clear()
+                self._network_id = network_id
+            if key in self._entries and (
+                is_valid is None or is_valid(self._entries[key])
+            ):
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            value = resolve()
+            self._entries[key] = value
+            return value
+
+    def clear(self, key: Optional[Hashable] = None):
+        """To drop a single key, or every cached entry if None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """To get the cache hit/miss counters and size."""
+        with self._lock:
+            return {
+                "network": self._network_id,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+resolution_cache = ResolutionCache()
+
+
 def get_account(index=None, id=None, use_local=False):
     """
     To get an active account.
@@ -51,30 +124,38 @@ def get_account(index=None, id=None, use_local=False):
         return accounts[index]
     if id is not None:
         # get from the stored account in brownie
-        return accounts.load(id)
+        return resolution_cache.get(("account", id), lambda: accounts.load(id))
 
     if (
         network.show_active() in LOCAL_BLOCKCHAIN_ENV
         or network.show_active() in FORKED_LOCAL_ENV
     ):
         if use_local:  # use brownie LocalAccount!
-            local = accounts.add(config["wallets"]["key_playground"])
-            if local.balance() == 0:  # fund account if empty
-                accounts[0].transfer(local, "10 ether")
-            print(
-                f"Using permit method - Local balance: "
-                f"{Web3.fromWei(local.balance(), 'ether')} ETH"
-            )
-            return local
+            return resolution_cache.get(("account", "local"), _load_local_account)
         else:
             return accounts[0]
-    return accounts.add(config["wallets"]["key_playground"])
+    return resolution_cache.get(
+        ("account", "key_playground"),
+        lambda: accounts.add(config["wallets"]["key_playground"]),
+    )
+
+
+def _load_local_account():
+    local = accounts.add(config["wallets"]["key_playground"])
+    if local.balance() == 0:  # fund account if empty
+        accounts[0].transfer(local, "10 ether")
+    print(
+        f"Using permit method - Local balance: "
+        f"{Web3.fromWei(local.balance(), 'ether')} ETH"
+    )
+    return local
 
 
 def get_contract(contract_name: str):
     """
     This function will grab the contract addresses from the brownie config if defined,
     otherwise, it will deploy a mock version of that contract instead!
+    The resolved contract is cached per network (see `resolution_cache`).
 
     Parameters
     ----------
@@ -86,6 +167,21 @@ def get_contract(contract_name: str):
     brownie.network.contract.ProjectContract: The most recently deployed version of
     this contract.
     """
+    contract_type = CONTRACT_TO_MOCK[contract_name]
+
+    def is_latest_mock(contract) -> bool:
+        # a cached mock is only valid while it's still the latest deployed one
+        return len(contract_type) > 0 and contract_type[-1].address == contract.address
+
+    is_local = network.show_active() in LOCAL_BLOCKCHAIN_ENV
+    return resolution_cache.get(
+        ("contract", contract_name),
+        resolve=lambda: _resolve_contract(contract_name),
+        is_valid=is_latest_mock if is_local else None,
+    )
+
+
+def _resolve_contract(contract_name: str):
     network_id = network.show_active()
     contract_type = CONTRACT_TO_MOCK[contract_name]
     if network_id in LOCAL_BLOCKCHAIN_ENV:  # use Mock on local!
@@ -110,6 +206,10 @@ def deploy_mocks(mock_name: Optional[str] = None):
         The mock contract name to deploy, if None, deploy all available mocks!
     """
     account = get_account()
+    # the freshly deployed mocks replace the cached ones
+    for contract_name in CONTRACT_TO_MOCK:
+        if mock_name is None or mock_name == contract_name:
+            resolution_cache.clear(("contract", contract_name))
     if mock_name is None or mock_name == "eth_usd_price_feed":
         print("Deploying the mock Price Feed ... ")
         MockV3Aggregator.deploy(DECIMALS, STARTING_PRICE, {"from": account})
@@ -119,6 +219,37 @@ def deploy_mocks(mock_name: Optional[str] = None):
     if mock_name is None or mock_name == "link_token":
         print(f"Deploying the mock LINK Token ... ")
         LinkToken.deploy({"from": account})
+    if mock_name is None or mock_name == "multicall":
+        print(f"Deploying the mock Multicall3 ... ")
+        Multicall3.deploy({"from": account})
+
+
+_checkpoints = []  # the open `chain_checkpoint` snapshot IDs, innermost last
+
+
+def _rpc(method: str, params: list) -> Any:
+    response = web3.provider.make_request(method, params)
+    if "error" in response:
+        raise ValueError(f"'{method}' failed: {response['error']}")
+    return response["result"]
+
+
+@contextmanager
+def chain_checkpoint():
+    """
+    To revert the local chain to its current state on exit (`evm_snapshot` and
+    `evm_revert`). The checkpoints are kept on an explicit stack, so they can be
+    nested, and brownie's own snapshot (`chain.snapshot()`, e.g. the `fn_isolation`
+    fixture) is left untouched. Brownie is not notified of the revert, so the
+    contracts deployed inside a checkpoint must not be used after it.
+    """
+    snapshot_id = _rpc("evm_snapshot", [])
+    _checkpoints.append(snapshot_id)
+    try:
+        yield
+    finally:
+        _checkpoints.remove(snapshot_id)
+        _rpc("evm_revert", [snapshot_id])  # also drops the inner snapshots
 
 
 def get_breed(breed_id: int):
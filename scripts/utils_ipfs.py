@@ -1,8 +1,12 @@
 import os
-import json
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from scripts.ipfs_backends import get_backend
+from scripts.ipfs_cache import get_pin_cache, is_pin_cache_enabled
+from scripts.ipfs_cid import compute_cid
 
 
 def get_all_files(directory: str) -> List[str]:
@@ -14,14 +18,21 @@ def get_all_files(directory: str) -> List[str]:
     return filepaths
 
 
-def add_to_ipfs(filepath: str) -> str:
+def add_to_ipfs(filepath: str, use_cache: bool = True, verify: bool = False) -> str:
     """
     Handle adding file to IPFS with different IPFS network services.
+    Already pinned contents are served from the local pin cache (see `ipfs_cache`).
 
     Parameters
     ----------
     filepath: `str`
         The path to file/directory that would be pinned.
+    use_cache: `bool`
+        Look up (and store) the pinned CID in the local pin cache.
+    verify: `bool`
+        Check the returned CID against the offline computed one (see `ipfs_cid`).
+        A cache lookup re-hashes the content and checks the cached CID is still
+        pinned (e.g. after a garbage collected or restarted local node).
 
     Returns
     -------
@@ -30,86 +41,96 @@ def add_to_ipfs(filepath: str) -> str:
     ipfs_network = os.getenv("IPFS_NETWORK", "local").lower()
     if not Path(filepath).exists():
         raise ValueError(f"The input path does not exist! Input: '{filepath}'")
-    post_args = {}
-    # handle different IPFS network
-    if ipfs_network == "local":
-        post_args["url"] = "http://127.0.0.1:5001/api/v0/add"
-    elif ipfs_network == "infura":
-        post_args["url"] = "https://ipfs.infura.io:5001/api/v0/add"
-        post_args["auth"] = (
-            os.getenv("IPFS_INFURA_KEY"),
-            os.getenv("IPFS_INFURA_SECRET"),
+    cache_key = None
+    if use_cache and is_pin_cache_enabled():
+        pin_cache = get_pin_cache()
+        cache_key = pin_cache.make_key(
+            filepath, backend=ipfs_network, options={"cid-version": 1}, rehash=verify
         )
-    elif ipfs_network == "pinata":
-        return _add_file_to_ipfs_pinata(filepath=filepath)
-    else:
-        raise ValueError(f"Unknown IPFS network option: '{ipfs_network}'!")
-
-    # handle the input file(s) and params
-    post_args["params"] = {"cid-version": 1}
-    if os.path.isdir(filepath):
-        if filepath.endswith("/"):
-            filepath = filepath[:-1]
-        all_files = get_all_files(filepath)
-        post_args["files"] = [
-            ("file", (os.path.basename(f), open(f, "rb"))) for f in all_files
-        ]
-        post_args["params"].update({"wrap-with-directory": True, "pin": True})
-    else:
-        filename = os.path.basename(filepath)
-        post_args["files"] = [("file", (filename, open(filepath, "rb")))]
-
-    # HTTP post request to add the file(s) here
-    response = requests.post(**post_args)
-    if response.status_code != 200:
-        raise ValueError(f"Failed POST - {response.status_code} - {response.text}")
-    # print(f"Response [200]: {response.text}")
-    pinned_list = response.text.rstrip().split("\n")
-    pinned_cid = json.loads(pinned_list[-1])["Hash"]
+        pinned_cid = pin_cache.get(cache_key)
+        if pinned_cid is not None and verify:
+            if not get_backend(ipfs_network).pin_status(pinned_cid):
+                print(f"Cached CID '{pinned_cid}' is no longer pinned, pinning again")
+                pinned_cid = None
+        if pinned_cid is not None:
+            print(f"Pin cache hit for '{filepath}': {pinned_cid}")
+            return pinned_cid
+    pinned_cid = _add_to_ipfs(filepath=filepath, ipfs_network=ipfs_network)
+    if verify:
+        expected_cid = compute_cid(filepath)
+        if pinned_cid != expected_cid:
+            raise ValueError(
+                f"Pinned CID mismatch for '{filepath}'! "
+                f"Pinned: '{pinned_cid}', expected: '{expected_cid}'"
+            )
+    if cache_key is not None:
+        pin_cache.put(cache_key, pinned_cid)
     return pinned_cid
 
 
-def _add_file_to_ipfs_pinata(filepath: str):
+@dataclass
+class PinResult:
+    """The pinning outcome of a single file/directory."""
+
+    filepath: str
+    cid: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def add_many_to_ipfs(
+    filepaths: List[str],
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[PinResult]:
     """
-    Manually handle pinning to IPFS HTTP for Pinata
+    To pin many independent files/directories concurrently. At most
+    `max_concurrency` uploads are in flight (and queued) at a time, and the backend
+    rate limit of the shared IPFS client is applied to every request.
 
     Parameters
     ----------
-    filepath: `str`
-        The path to file/directory that would be pinned.
+    filepaths: `List[str]`
+        The paths to files/directories that would be pinned.
+    max_concurrency: `Optional[int]`
+        The maximum number of concurrent uploads, defaults to the backend limit.
+    use_cache: `bool`
+        Look up (and store) the pinned CIDs in the local pin cache.
 
     Returns
     -------
-    `str`: The pinned CID.
+    `List[PinResult]`: The per-path CID or error, in the input order.
     """
-    pinata_args = {}
-    # add the remaining args here
-    pinata_args["url"] = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-    pinata_args["headers"] = {"Authorization": f"Bearer {os.getenv('IPFS_PINATA_JWT')}"}
-    pinata_args["data"] = {
-        "pinataOptions": json.dumps({"cidVersion": 1, "wrapWithDirectory": False})
-    }
-    # handle the file uploading
-    if os.path.isdir(filepath):
-        if filepath.endswith("/"):
-            filepath = filepath[:-1]
-        maindir = os.path.basename(filepath)  # get the lowest directory
-        all_files = get_all_files(filepath)
-        pinata_args["files"] = [
-            ("file", (f"{maindir}/{os.path.basename(f)}", open(f, "rb")))
-            for f in all_files
-        ]
-        pinata_args["data"]["pinataMetadata"] = json.dumps({"name": maindir})
-    else:
-        filename = os.path.basename(filepath)
-        pinata_args["files"] = [("file", (filename, open(filepath, "rb")))]
-
-    # HTTP POST request to pin the file(s) to Pinata
-    response = requests.post(**pinata_args)
-    if response.status_code != 200:
-        raise ValueError(f"Failed POST - {response.status_code} - {response.text}")
-    pinned_cid = response.json()["IpfsHash"]
-    return pinned_cid
+    if max_concurrency is None:
+        max_concurrency = get_backend().limits.max_concurrency
+    results = [PinResult(filepath=f) for f in filepaths]
+    slots = threading.BoundedSemaphore(max_concurrency * 2)  # backpressure
+
+    def pin(result: PinResult):
+        try:
+            result.cid = add_to_ipfs(result.filepath, use_cache=use_cache)
+        except Exception as e:
+            result.error = repr(e)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix="ipfs-pin"
+    ) as pool:
+        for result in results:
+            slots.acquire()
+            pool.submit(pin, result)
+    return results
+
+
+def _add_to_ipfs(filepath: str, ipfs_network: str) -> str:
+    """
+    Upload the file/directory to the selected IPFS network service.
+    """
+    return get_backend(ipfs_network).add(filepath)
 
 
 def main():
@@ -0,0 +1,114 @@
+import time
+from typing import List, Optional
+from brownie import chain, web3
+from scripts.utils import get_contract
+
+# collectible events emitted inside the VRF fulfillment callback
+FULFILLMENT_EVENTS = ["AssignBreed", "MintedCollectible"]
+# polling defaults (in seconds)
+DEFAULT_TIMEOUT = 300
+DEFAULT_POLL_INTERVAL = 2
+DEFAULT_MAX_POLL_INTERVAL = 30
+DEFAULT_BACKOFF = 1.5
+
+
+def wait_for_fulfillment(
+    collectible,
+    request_id: int,
+    from_block: Optional[int] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+    backoff: float = DEFAULT_BACKOFF,
+    all_events: bool = False,
+):
+    """
+    To wait until the VRF coordinator fulfills a random words request.
+    The coordinator `RandomWordsFulfilled` logs are followed for the given request ID,
+    and the collectible event emitted by the same fulfillment is returned as soon as
+    it lands on chain.
+
+    Parameters
+    ----------
+    collectible: `brownie.network.contract.ProjectContract`
+        The VRF consumer (AdvancedCollectible or MultiCollectible).
+    request_id: `int`
+        The request ID emitted by the `RequestCollectible` event.
+    from_block: `Optional[int]`
+        The first block to scan, usually the block of the request transaction.
+        If None, start from the latest block.
+    timeout: `float`
+        The maximum waiting time in seconds.
+    poll_interval: `float`
+        The initial polling interval in seconds.
+    max_poll_interval: `float`
+        The upper bound of the polling interval in seconds.
+    backoff: `float`
+        The polling interval multiplier applied while no new block is found.
+    all_events: `bool`
+        Return every collectible event of the fulfillment, e.g. one
+        `MintedCollectible` per lot of a batched request.
+
+    Returns
+    -------
+    `brownie.network.event._EventItem`: The `AssignBreed` or `MintedCollectible` event,
+    or the list of them if `all_events`.
+    """
+    vrf = get_contract(contract_name="vrf_coordinator")
+    log_filter = {
+        "address": vrf.address,
+        "topics": [vrf.topics["RandomWordsFulfilled"], f"0x{int(request_id):064x}"],
+    }
+    next_block = web3.eth.block_number if from_block is None else int(from_block)
+    deadline = time.monotonic() + timeout
+    interval = poll_interval
+    while True:
+        latest_block = web3.eth.block_number
+        if latest_block >= next_block:
+            logs = web3.eth.get_logs(
+                dict(log_filter, fromBlock=next_block, toBlock=latest_block)
+            )
+            if len(logs) > 0:
+                events = _get_fulfillment_events(
+                    collectible, request_id, logs[0]["transactionHash"].hex()
+                )
+                return events if all_events else events[0]
+            next_block = latest_block + 1
+            interval = poll_interval  # new blocks are coming, poll eagerly again
+        else:
+            interval = min(interval * backoff, max_poll_interval)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"VRF request {request_id} was NOT fulfilled within {timeout} seconds!"
+            )
+        time.sleep(min(interval, remaining))
+
+
+def _get_fulfillment_events(collectible, request_id: int, tx_hash: str) -> List:
+    """
+    To extract the collectible events from the VRF fulfillment transaction.
+    """
+    fulfill_tx = chain.get_transaction(tx_hash)
+    fulfilled = [
+        e
+        for e in fulfill_tx.events["RandomWordsFulfilled"]
+        if int(e["requestId"]) == int(request_id)
+    ]
+    if len(fulfilled) == 0 or not fulfilled[0]["success"]:
+        raise ValueError(
+            f"The VRF callback for request {request_id} failed! Tx: '{tx_hash}'"
+        )
+    events = [
+        event
+        for event_name in FULFILLMENT_EVENTS
+        if event_name in fulfill_tx.events
+        for event in fulfill_tx.events[event_name]
+        if event.address == collectible.address
+    ]
+    if len(events) > 0:
+        return events
+    raise ValueError(
+        f"No fulfillment event of '{collectible.address}' found in tx: '{tx_hash}'"
+    )
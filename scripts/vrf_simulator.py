@@ -0,0 +1,342 @@
+import math
+import time
+import random
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from brownie import AdvancedCollectible, web3
+from scripts.utils import get_account, get_contract
+from scripts.event_indexer import decode_log
+from scripts.tx_broadcaster import get_broadcaster
+from scripts.advanced_collectible.create_collectible import mint_many
+
+DEFAULT_BATCH_SIZE = 16  # fulfillments sent back-to-back per poll
+DEFAULT_POLL_INTERVAL = 0.2  # seconds
+DEFAULT_MAX_ATTEMPTS = 5  # fulfillments sent per request before dropping it
+DEFAULT_RETRY_DELAY = 1.0  # seconds before the first retry, doubled on each one
+LATENCY_DISTRIBUTIONS = ["constant", "uniform", "exponential", "lognormal"]
+
+# the fulfillment delay (in seconds) of a request, drawn from the seeded RNG
+LatencyModel = Callable[[random.Random], float]
+
+
+def make_latency_model(
+    distribution: str = "constant", mean: float = 0.0, spread: float = 0.0
+) -> LatencyModel:
+    """
+    To build a fulfillment latency model.
+
+    Parameters
+    ----------
+    distribution: `str`
+        One of `LATENCY_DISTRIBUTIONS`.
+    mean: `float`
+        The mean latency in seconds.
+    spread: `float`
+        The half width of `uniform`, or the sigma of `lognormal` (ignored otherwise).
+
+    Returns
+    -------
+    `LatencyModel`: The latency sampling function.
+    """
+    if distribution == "constant":
+        return lambda rng: mean
+    if distribution == "uniform":
+        return lambda rng: max(0.0, rng.uniform(mean - spread, mean + spread))
+    if distribution == "exponential":
+        return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if distribution == "lognormal":
+        # scale mu so the distribution mean is `mean`
+        return lambda rng: (
+            rng.lognormvariate(0.0, spread) * mean / math.exp(spread**2 / 2)
+        )
+    raise ValueError(
+        f"Unknown latency distribution: '{distribution}'! "
+        f"Available: {LATENCY_DISTRIBUTIONS}"
+    )
+
+
+@dataclass
+class PendingRequest:
+    """A `RandomWordsRequested` request waiting in the simulator queue."""
+
+    request_id: int
+    consumer: str
+    num_words: int
+    block_number: int
+    seen_at: float  # monotonic seconds
+    due_at: float  # monotonic seconds
+    attempts: int = 0  # failed fulfillments
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class VRFSimulator:
+    """
+    A local VRF fulfillment service for `VRFCoordinatorV2Mock`, standing in for the
+    Chainlink node. The `RandomWordsRequested` logs are followed, every request is
+    delayed by a latency drawn from the model, then the due requests are fulfilled
+    in batches. The random words and the latencies come from seeded RNGs, so a run
+    is reproducible.
+
+    Parameters
+    ----------
+    seed: `int`
+        The seed of the random words and latencies.
+    batch_size: `int`
+        The maximum number of fulfillments sent per poll.
+    latency: `Optional[LatencyModel]`
+        The fulfillment latency model, defaults to no delay.
+    poll_interval: `float`
+        The log polling interval in seconds.
+    consumers: `Optional[List[str]]`
+        Only fulfill the requests of these consumers, defaults to every consumer.
+    account: `Optional[brownie.network.account.Account]`
+        The fulfilling account, defaults to `get_account()`.
+    from_block: `Optional[int]`
+        The first block to follow, defaults to the next block.
+    max_attempts: `int`
+        The number of fulfillments sent for a request before dropping it, e.g.
+        while the subscription balance is too low.
+    retry_delay: `float`
+        The seconds before retrying a failed fulfillment, doubled on each retry.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        latency: Optional[LatencyModel] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        consumers: Optional[List[str]] = None,
+        account=None,
+        from_block: Optional[int] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_delay: float = DEFAULT_RETRY_DELAY,
+    ):
+        self.seed = seed
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.latency = make_latency_model() if latency is None else latency
+        self.poll_interval = poll_interval
+        self.consumers = (
+            None
+            if consumers is None
+            else {web3.toChecksumAddress(str(c)) for c in consumers}
+        )
+        self.account = get_account() if account is None else account
+        self.vrf = get_contract(contract_name="vrf_coordinator")
+        self._event_abi = next(
+            abi
+            for abi in self.vrf.abi
+            if abi["type"] == "event" and abi["name"] == "RandomWordsRequested"
+        )
+        self._rng = random.Random(seed)
+        self._queue: Dict[int, PendingRequest] = {}
+        self._next_block = (
+            web3.eth.block_number + 1 if from_block is None else int(from_block)
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latencies: List[float] = []
+        self._max_queue_depth = 0
+        self._stats = {
+            "requested": 0,
+            "fulfilled": 0,
+            "retried": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def random_words(self, request_id: int, num_words: int) -> List[int]:
+        """To derive the random words of a request, independently of the ordering."""
+        rng = random.Random(f"{self.seed}:{request_id}")
+        return [rng.getrandbits(256) for _ in range(num_words)]
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _fetch_requests(self):
+        latest_block = web3.eth.block_number
+        if latest_block < self._next_block:
+            return
+        logs = web3.eth.get_logs(
+            {
+                "address": self.vrf.address,
+                "topics": [self.vrf.topics["RandomWordsRequested"]],
+                "fromBlock": self._next_block,
+                "toBlock": latest_block,
+            }
+        )
+        now = time.monotonic()
+        with self._lock:
+            for log in logs:
+                event = decode_log(self._event_abi, log)
+                consumer = web3.toChecksumAddress(event["sender"])
+                if self.consumers is not None and consumer not in self.consumers:
+                    continue
+                request_id = int(event["requestId"])
+                self._queue[request_id] = PendingRequest(
+                    request_id=request_id,
+                    consumer=consumer,
+                    num_words=int(event["numWords"]),
+                    block_number=log["blockNumber"],
+                    seen_at=now,
+                    due_at=now + self.latency(self._rng),
+                )
+                self._stats["requested"] += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+        self._next_block = latest_block + 1
+
+    def _fulfill_due(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            due = sorted(
+                (r for r in self._queue.values() if r.due_at <= now),
+                key=lambda r: (r.due_at, r.request_id),
+            )[: self.batch_size]
+            for request in due:
+                del self._queue[request.request_id]
+        if len(due) == 0:
+            return 0
+        broadcaster = get_broadcaster(self.account)
+        futures = [
+            (
+                request,
+                broadcaster.send(
+                    self.vrf.fulfillRandomWordsWithOverride,
+                    request.request_id,
+                    request.consumer,
+                    self.random_words(request.request_id, request.num_words),
+                ),
+            )
+            for request in due
+        ]
+        for request, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed to fulfill the VRF request {request.request_id}: {e}")
+                self._retry(request)
+                continue
+            with self._lock:
+                self._stats["fulfilled"] += 1
+                self._latencies.append(time.monotonic() - request.seen_at)
+        with self._lock:
+            self._stats["batches"] += 1
+        return len(due)
+
+    def _retry(self, request: PendingRequest):
+        """To queue a failed request again with a backoff, or drop it after the cap."""
+        request.attempts += 1
+        with self._lock:
+            if request.attempts >= self.max_attempts:
+                self._stats["failed"] += 1
+                return
+            request.due_at = time.monotonic() + self.retry_delay * 2 ** (
+                request.attempts - 1
+            )
+            self._queue[request.request_id] = request
+            self._stats["retried"] += 1
+
+    def poll(self) -> int:
+        """To run a single iteration: queue the new requests and fulfill a batch."""
+        self._fetch_requests()
+        return self._fulfill_due()
+
+    def drain(self, timeout: float = 60):
+        """To poll until every queued request is fulfilled."""
+        deadline = time.monotonic() + timeout
+        self._fetch_requests()
+        while self.queue_depth > 0:
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"{self.queue_depth} VRF request(s) still queued after {timeout}s!"
+                )
+            if self.poll() == 0:
+                time.sleep(self.poll_interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                fulfilled = self.poll()
+            except Exception as e:
+                print(f"VRF simulator poll failed: {e!r}")
+                fulfilled = 0
+            if fulfilled == 0:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """To run the simulator in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="vrf-simulator", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def metrics(self) -> dict:
+        """To get the counters, the queue depth and the fulfillment latency stats."""
+        with self._lock:
+            latencies = list(self._latencies)
+            metrics = dict(
+                self._stats,
+                queue_depth=len(self._queue),
+                max_queue_depth=self._max_queue_depth,
+            )
+        metrics.update(
+            {
+                "latency_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "latency_p50": _percentile(latencies, 0.5),
+                "latency_p95": _percentile(latencies, 0.95),
+                "latency_max": max(latencies, default=0.0),
+            }
+        )
+        return metrics
+
+    def report(self) -> dict:
+        metrics = self.metrics()
+        print(
+            f"VRF simulator: {metrics['fulfilled']}/{metrics['requested']} "
+            f"fulfilled in {metrics['batches']} batch(es), {metrics['retried']} "
+            f"retried, {metrics['failed']} failed, "
+            f"max queue depth {metrics['max_queue_depth']}, latency "
+            f"p50 {metrics['latency_p50']:.2f}s / p95 {metrics['latency_p95']:.2f}s."
+        )
+        return metrics
+
+
+def main():
+    # load test the AdvancedCollectible pipeline with many outstanding requests
+    latency = make_latency_model("exponential", mean=2.0)
+    with VRFSimulator(seed=42, latency=latency) as simulator:
+        mint_many(
+            AdvancedCollectible[-1],
+            get_account(),
+            n=200,
+            is_set_uri=False,
+            vrf_simulator=simulator,
+        )
+    simulator.report()
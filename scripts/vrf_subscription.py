@@ -1,10 +1,23 @@
+import time
+import threading
 import yaml
-from typing import Union, Optional
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Union
 from pathlib import Path
-from brownie import config, network, convert
+from brownie import config, network, convert, web3
 from scripts.utils import LOCAL_BLOCKCHAIN_ENV, get_account, get_contract
+from scripts.event_indexer import decode_log
+from scripts.profiling import profiled
+from scripts.tx_broadcaster import get_broadcaster
 
+# the monitor defaults
+DEFAULT_LEAD_TIME = 120  # seconds of spending covered ahead of a top-up landing
+DEFAULT_MIN_FULFILLMENTS = 10  # fulfillments always covered by the balance
+DEFAULT_RATE_WINDOW = 60  # seconds of requests in the mint rate estimation
+DEFAULT_CALLBACK_GAS = 500000  # the `_callbackGasLimit` of the collectibles
 
+
+@profiled()
 def get_subscription(is_create_new: bool = False) -> int:
     """
     To get the VRF subscription ID if a subscription exists, if not:
@@ -71,6 +84,7 @@ def is_subscription_funded(subscription_id: int) -> bool:
     return sub_details[0] > minimum_fund
 
 
+@profiled()
 def fund_subscription(
     subscription_id: int, link_amount: Union[int, float, None] = None
 ):
@@ -94,20 +108,20 @@ def fund_subscription(
     vrf_coordinator = get_contract(contract_name="vrf_coordinator")
     # handle funding for LOCAL chain or not
     print(f"Begin funding {link_amount} LINK to Subscription {subscription_id} ... ")
+    # shares the account nonces with the minting transactions (see `tx_broadcaster`)
+    broadcaster = get_broadcaster(account)
     if network_id in LOCAL_BLOCKCHAIN_ENV:
-        fund_sub = vrf_coordinator.fundSubscription(
-            subscription_id, fund_amount, {"from": account}
-        )
-        fund_sub.wait(1)
+        broadcaster.send(
+            vrf_coordinator.fundSubscription, subscription_id, fund_amount
+        ).result()
     else:  # wallet transfer the LINK token
         link_token = get_contract("link_token")
-        fund_sub = link_token.transferAndCall(
+        broadcaster.send(
+            link_token.transferAndCall,
             vrf_coordinator.address,
             fund_amount,
             convert.to_bytes(subscription_id),
-            {"from": account},
-        )
-        fund_sub.wait(1)
+        ).result()
     # get the latest subscription balance
     sub_balance, _, _, _ = vrf_coordinator.getSubscription(subscription_id)
     sub_balance_precision = sub_balance / (10**18)
@@ -117,6 +131,7 @@ def fund_subscription(
     )
 
 
+@profiled()
 def register_consumer(contract_address: str, subscription_id: Optional[int] = None):
     """
     To check if an address is already registered as a consumer, will register it
@@ -157,6 +172,238 @@ def register_consumer(contract_address: str, subscription_id: Optional[int] = No
         add_consumer.wait(1)
 
 
+class SubscriptionMonitor:
+    """
+    A balance monitor of a VRF subscription, topping it up ahead of time during a
+    long mint run. The `RandomWordsRequested` and `RandomWordsFulfilled` logs of
+    the subscription are followed to measure the LINK spent per fulfillment and
+    the current mint (request) rate. The subscription is funded with
+    `fund_subscription` as soon as the balance no longer covers the pending
+    requests, `min_fulfillments` more and `lead_time` seconds of minting.
+
+    Parameters
+    ----------
+    subscription_id: `int`
+        The subscription ID.
+    lead_time: `float`
+        The seconds of minting at the current rate kept covered by the balance.
+    min_fulfillments: `int`
+        The number of fulfillments always covered by the balance.
+    top_up_link: `Union[int, float, None]`
+        The minimum top-up amount in LINK, defaults to the network `fund_amount`.
+    rate_window: `float`
+        The seconds of requests used to estimate the mint rate.
+    poll_interval: `float`
+        The log polling interval (in seconds) of the background thread.
+    expected_payment: `Optional[int]`
+        The expected LINK (with precision) per fulfillment until one is observed,
+        defaults to the worst case of the coordinator mock on the local chain.
+    from_block: `Optional[int]`
+        The first block to follow, defaults to the next block.
+    """
+
+    def __init__(
+        self,
+        subscription_id: int,
+        lead_time: float = DEFAULT_LEAD_TIME,
+        min_fulfillments: int = DEFAULT_MIN_FULFILLMENTS,
+        top_up_link: Union[int, float, None] = None,
+        rate_window: float = DEFAULT_RATE_WINDOW,
+        poll_interval: float = 2.0,
+        expected_payment: Optional[int] = None,
+        from_block: Optional[int] = None,
+    ):
+        self.subscription_id = int(subscription_id)
+        self.lead_time = lead_time
+        self.min_fulfillments = min_fulfillments
+        if top_up_link is None:
+            fund_amount = config["networks"][network.show_active()]["fund_amount"]
+            top_up_link = fund_amount / (10**18)
+        self.top_up_link = top_up_link
+        self.rate_window = rate_window
+        self.poll_interval = poll_interval
+        self.vrf = get_contract(contract_name="vrf_coordinator")
+        if expected_payment is None and network.show_active() in LOCAL_BLOCKCHAIN_ENV:
+            expected_payment = (
+                self.vrf.BASE_FEE() + DEFAULT_CALLBACK_GAS * self.vrf.GAS_PRICE_LINK()
+            )
+        self.expected_payment = expected_payment
+        self._event_abis = {
+            abi["name"]: abi for abi in self.vrf.abi if abi["type"] == "event"
+        }
+        self._next_block = (
+            web3.eth.block_number + 1 if from_block is None else int(from_block)
+        )
+        self._pending: Dict[int, float] = {}  # request ID -> seen at
+        self._requests: Deque[float] = deque()  # seen at, within the rate window
+        self._balance = 0
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "requested": 0,
+            "fulfilled": 0,
+            "failed_callbacks": 0,
+            "link_spent": 0,
+            "top_ups": 0,
+            "link_topped_up": 0,
+        }
+
+    def _fetch_logs(self, event_name: str, topics: list, to_block: int) -> list:
+        logs = web3.eth.get_logs(
+            {
+                "address": self.vrf.address,
+                "topics": [self.vrf.topics[event_name]] + topics,
+                "fromBlock": self._next_block,
+                "toBlock": to_block,
+            }
+        )
+        return [decode_log(self._event_abis[event_name], log) for log in logs]
+
+    def _sync(self):
+        now = time.monotonic()
+        latest_block = web3.eth.block_number
+        if latest_block >= self._next_block:
+            requested = self._fetch_logs(
+                "RandomWordsRequested",
+                [None, f"0x{self.subscription_id:064x}"],
+                latest_block,
+            )
+            fulfilled = self._fetch_logs("RandomWordsFulfilled", [], latest_block)
+            with self._lock:
+                for event in requested:
+                    self._pending[int(event["requestId"])] = now
+                    self._requests.append(now)
+                    self._stats["requested"] += 1
+                for event in fulfilled:
+                    if self._pending.pop(int(event["requestId"]), None) is None:
+                        continue  # another subscription
+                    self._stats["fulfilled"] += 1
+                    self._stats["link_spent"] += int(event["payment"])
+                    self._stats["failed_callbacks"] += int(not event["success"])
+            self._next_block = latest_block + 1
+        balance, _, _, _ = self.vrf.getSubscription(self.subscription_id)
+        with self._lock:
+            self._balance = int(balance)
+            while self._requests and self._requests[0] < now - self.rate_window:
+                self._requests.popleft()
+
+    def _mint_rate(self) -> float:
+        """The requests/sec in the rate window (or since the monitor started)."""
+        window = min(self.rate_window, time.monotonic() - self._started_at)
+        return len(self._requests) / window if window > 0 else 0.0
+
+    def forecast(self) -> Tuple[Optional[int], Optional[float]]:
+        """
+        To forecast the spending from the observed fulfillments and mint rate.
+
+        Returns
+        -------
+        `Tuple[Optional[int], Optional[float]]`: The LINK (with precision) needed
+        ahead of time, and the seconds until the balance runs out (None if unknown
+        or not spending).
+        """
+        with self._lock:
+            if self._stats["fulfilled"] > 0:
+                payment = self._stats["link_spent"] / self._stats["fulfilled"]
+            else:
+                payment = self.expected_payment
+            if payment is None:
+                return None, None
+            mint_rate = self._mint_rate()
+            pending_cost = len(self._pending) * payment
+            balance = self._balance
+        required = int(
+            pending_cost
+            + payment * (self.min_fulfillments + mint_rate * self.lead_time)
+        )
+        if mint_rate == 0:
+            return required, None
+        return required, max(0.0, (balance - pending_cost) / (mint_rate * payment))
+
+    def poll(self) -> bool:
+        """
+        To sync the subscription logs and balance, then top it up if the balance
+        will not cover the forecast spending. Returns whether it was topped up.
+        """
+        self._sync()
+        required, _ = self.forecast()
+        balance = self.balance
+        if required is None or balance >= required:
+            return False
+        top_up = max(required - balance, int(self.top_up_link * (10**18)))
+        print(
+            f"Subscription {self.subscription_id} balance ({balance / 10**18:.4f} "
+            f"LINK) is below the forecast spending ({required / 10**18:.4f} LINK)!"
+        )
+        fund_subscription(self.subscription_id, link_amount=top_up / (10**18))
+        with self._lock:
+            self._stats["top_ups"] += 1
+            self._stats["link_topped_up"] += top_up
+        self._sync()
+        return True
+
+    @property
+    def balance(self) -> int:
+        with self._lock:
+            return self._balance
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Subscription monitor poll failed: {e!r}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """To run the monitor in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="subscription-monitor", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def metrics(self) -> dict:
+        """To get the counters, the balance and the spending forecast."""
+        required, seconds_to_empty = self.forecast()
+        with self._lock:
+            metrics = dict(
+                self._stats,
+                subscription_id=self.subscription_id,
+                balance=self._balance,
+                pending_requests=len(self._pending),
+                mint_rate=self._mint_rate(),
+            )
+        metrics.update(
+            {
+                "link_per_fulfillment": (
+                    metrics["link_spent"] / metrics["fulfilled"]
+                    if metrics["fulfilled"] > 0
+                    else None
+                ),
+                "required_balance": required,
+                "seconds_to_empty": seconds_to_empty,
+            }
+        )
+        return metrics
+
+
 def main():
     # sub_id = config["networks"][network.show_active()]["subscription_id"]
     # fund_subscription(subscription_id=sub_id, link_amount=4)
@@ -0,0 +1,282 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+from brownie import MultiCollectible, Wei, accounts, config, network
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV, get_account, resolution_cache
+from scripts.mint_pipeline import MintResult, report
+from scripts.tx_broadcaster import get_broadcaster
+from scripts.price_cache import price_cache
+from scripts.profiling import with_current_span
+from scripts.multi_collectible.deploy_and_mint import mint_many
+
+DEFAULT_POOL_SIZE = 4  # fresh keys on the local chain
+DEFAULT_MIN_BALANCE = Wei("0.05 ether")
+DEFAULT_TARGET_BALANCE = Wei("0.2 ether")
+DEFAULT_CHUNK_SIZE = 10  # mints per worker step
+MAX_CONSECUTIVE_ERRORS = 3  # a wallet is isolated beyond
+MAX_CHUNK_ATTEMPTS = 3
+
+# (account, number of mints) -> per-mint results, e.g. a collectible `mint_many`
+MintFunction = Callable[[object, int], List[MintResult]]
+
+
+def load_pool_accounts(size: Optional[int] = None) -> List:
+    """
+    To load the wallet pool keys. On the local chain, `size` fresh keys are
+    generated, otherwise the comma-separated `wallets.pool_keys` of the config
+    (`WALLET_POOL_KEYS` in `.env`) are loaded.
+    """
+    if network.show_active() in LOCAL_BLOCKCHAIN_ENV:
+        return [accounts.add() for _ in range(size or DEFAULT_POOL_SIZE)]
+    pool_keys = str(config["wallets"].get("pool_keys") or "")
+    keys = [k.strip() for k in pool_keys.split(",") if k.strip()]
+    if len(keys) == 0 or keys[0].startswith("${"):
+        raise ValueError("No wallet pool keys, please set `WALLET_POOL_KEYS`!")
+    keys = keys if size is None else keys[:size]
+    return [
+        resolution_cache.get(("pool_key", key), lambda key=key: accounts.add(key))
+        for key in keys
+    ]
+
+
+@dataclass
+class PoolWallet:
+    """The minting state of a single wallet in the pool."""
+
+    account: object
+    minted: int = 0
+    failed: int = 0
+    funded: int = 0  # Wei received from the treasury
+    consecutive_errors: int = 0
+    isolated: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def address(self) -> str:
+        return self.account.address
+
+
+class WalletPool:
+    """
+    A pool of minting wallets, each with its own nonce stream (see `tx_broadcaster`)
+    and worker thread. The mints are split into chunks pulled by the workers, the
+    wallets are topped up from the treasury before running low, and a failing
+    wallet is isolated, its chunks being retried by the other wallets.
+
+    Parameters
+    ----------
+    wallets: `List[brownie.network.account.Account]`
+        The minting accounts, e.g. from `load_pool_accounts`.
+    treasury: `Optional[brownie.network.account.Account]`
+        The funding account, defaults to `get_account()`.
+    min_balance: `int`
+        The balance (in Wei) kept on every wallet on top of the chunk cost.
+    target_balance: `int`
+        The balance (in Wei) a low wallet is topped up to, plus the chunk cost.
+    """
+
+    def __init__(
+        self,
+        wallets: List,
+        treasury=None,
+        min_balance: int = DEFAULT_MIN_BALANCE,
+        target_balance: int = DEFAULT_TARGET_BALANCE,
+    ):
+        if len(wallets) == 0:
+            raise ValueError("The wallet pool is empty!")
+        self.wallets = [PoolWallet(account=account) for account in wallets]
+        self.treasury = get_account() if treasury is None else treasury
+        self.min_balance = Wei(min_balance)
+        self.target_balance = Wei(target_balance)
+        self._lock = threading.Lock()
+
+    def _top_up_amount(self, wallet: PoolWallet, extra: int = 0) -> int:
+        balance = wallet.account.balance()
+        if balance >= self.min_balance + extra:
+            return 0
+        return self.target_balance + extra - balance
+
+    def _top_up(self, wallet: PoolWallet, extra: int = 0):
+        """To fund a single wallet from the treasury if it's running low."""
+        amount = self._top_up_amount(wallet, extra=extra)
+        if amount > 0:
+            get_broadcaster(self.treasury).transfer(wallet.account, amount).result()
+            with self._lock:
+                wallet.funded += amount
+
+    def rebalance(self, extra: int = 0):
+        """
+        To top up every active wallet below `min_balance` (+ `extra`) to
+        `target_balance` (+ `extra`), with concurrent transfers from the treasury.
+        """
+        broadcaster = get_broadcaster(self.treasury)
+        transfers = []
+        for wallet in self.wallets:
+            amount = 0 if wallet.isolated else self._top_up_amount(wallet, extra)
+            if amount > 0:
+                transfers.append(
+                    (wallet, amount, broadcaster.transfer(wallet.account, amount))
+                )
+        for wallet, amount, future in transfers:
+            future.result()
+            with self._lock:
+                wallet.funded += amount
+        if transfers:
+            print(f"Funded {len(transfers)} pool wallet(s) from the treasury.")
+
+    def mint(
+        self,
+        mint_fn: MintFunction,
+        n: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cost_per_mint: int = 0,
+    ) -> dict:
+        """
+        To spread N mints over the pool wallets, one worker per wallet.
+
+        Parameters
+        ----------
+        mint_fn: `MintFunction`
+            The (account, number of mints) -> results function.
+        n: `int`
+            The number of mints.
+        chunk_size: `int`
+            The number of mints per `mint_fn` call.
+        cost_per_mint: `int`
+            The Wei spent per mint on top of the gas (e.g. the paid value), kept
+            available on the wallet for a whole chunk.
+
+        Returns
+        -------
+        `dict`: The aggregate throughput and the per-wallet report.
+        """
+        chunks: "queue.Queue" = queue.Queue()
+        for start in range(0, n, chunk_size):
+            chunks.put((min(chunk_size, n - start), 0))  # (size, attempts)
+        results: List[MintResult] = []
+        remaining = chunks.qsize()
+        done = threading.Event()
+        if remaining == 0:
+            done.set()
+
+        def finish_chunk(chunk_results: List[MintResult]):
+            nonlocal remaining
+            with self._lock:
+                results.extend(chunk_results)
+                remaining -= 1
+                if remaining == 0:
+                    done.set()
+
+        def worker(wallet: PoolWallet):
+            while not done.is_set() and not wallet.isolated:
+                try:
+                    size, attempts = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    self._top_up(wallet, extra=cost_per_mint * size)
+                    chunk_results = mint_fn(wallet.account, size)
+                except Exception as e:
+                    with self._lock:
+                        wallet.consecutive_errors += 1
+                        wallet.errors.append(repr(e))
+                        wallet.isolated = (
+                            wallet.consecutive_errors >= MAX_CONSECUTIVE_ERRORS
+                        )
+                    print(f"Pool wallet {wallet.address} failed a chunk: {e!r}")
+                    if attempts + 1 < MAX_CHUNK_ATTEMPTS:
+                        chunks.put((size, attempts + 1))  # retry on any wallet
+                    else:
+                        finish_chunk(
+                            [MintResult(index=i, error=repr(e)) for i in range(size)]
+                        )
+                    continue
+                with self._lock:
+                    wallet.consecutive_errors = 0
+                    wallet.minted += sum(r.ok for r in chunk_results)
+                    wallet.failed += sum(not r.ok for r in chunk_results)
+                finish_chunk(chunk_results)
+
+        start = time.perf_counter()
+        self.rebalance(extra=cost_per_mint * min(chunk_size, n))
+        threads = [
+            threading.Thread(
+                target=with_current_span(worker),
+                args=(w,),
+                name=f"pool-{w.address[:8]}",
+            )
+            for w in self.wallets
+            if not w.isolated
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # every wallet got isolated, fail the leftover chunks
+        while not chunks.empty():
+            size, _ = chunks.get()
+            results.extend(
+                MintResult(index=i, error="no active pool wallet") for i in range(size)
+            )
+        return self.report(results, elapsed=time.perf_counter() - start)
+
+    def report(self, results: List[MintResult], elapsed: float) -> dict:
+        """To summarize the pool throughput, with a line per wallet."""
+        summary = report(results, elapsed=elapsed)
+        summary["wallets"] = []
+        for wallet in self.wallets:
+            summary["wallets"].append(
+                {
+                    "address": wallet.address,
+                    "minted": wallet.minted,
+                    "failed": wallet.failed,
+                    "funded": int(wallet.funded),
+                    "isolated": wallet.isolated,
+                    "errors": wallet.errors[-MAX_CONSECUTIVE_ERRORS:],
+                }
+            )
+            print(
+                f"  {wallet.address}: {wallet.minted} minted, {wallet.failed} failed"
+                + (" (isolated)" if wallet.isolated else "")
+            )
+        summary["keys"] = len(self.wallets)
+        return summary
+
+
+def measure_scaling(
+    mint_fn: MintFunction,
+    n: int,
+    key_counts: List[int],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cost_per_mint: int = 0,
+) -> List[dict]:
+    """
+    To measure the aggregate mint throughput as the number of keys grows, with a
+    fresh pool per key count.
+    """
+    reports = []
+    for size in key_counts:
+        print(f"Minting {n} token(s) with {size} key(s) ...")
+        pool = WalletPool(load_pool_accounts(size))
+        reports.append(
+            pool.mint(mint_fn, n=n, chunk_size=chunk_size, cost_per_mint=cost_per_mint)
+        )
+    for summary in reports:
+        print(
+            f"{summary['keys']} key(s): {summary['mints_per_sec']:.2f} mints/sec "
+            f"({summary['succeeded']}/{summary['requested']} minted)"
+        )
+    return reports
+
+
+def main():
+    collectible = MultiCollectible[-1]
+    pay_wei = price_cache.pay_amount(collectible)
+    measure_scaling(
+        lambda account, size: mint_many(collectible, account, n=size, pay_wei=pay_wei),
+        n=100,
+        key_counts=[1, 2, 4, 8],
+        cost_per_mint=pay_wei,
+    )
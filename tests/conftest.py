@@ -0,0 +1,52 @@
+import pytest
+from brownie import network
+from scripts.ipfs_stub import StubIPFSServer
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV
+from scripts.advanced_collectible.deploy_and_create import deploy as deploy_advanced
+from scripts.multi_collectible.deploy_and_mint import deploy as deploy_multi
+
+# Every test runs against the module deployments, and the local chain is reverted
+# after each test with brownie's `fn_isolation` (and reset after each module with
+# `module_isolation`). The tests can run in parallel
+# with `brownie test -n auto` (pytest-xdist), every worker process launches its own
+# local chain and deploys its own collectibles.
+
+
+def _is_local_chain() -> bool:
+    return network.is_connected() and network.show_active() in LOCAL_BLOCKCHAIN_ENV
+
+
+@pytest.fixture(autouse=True)
+def isolation(request):
+    """To revert the local chain to its pre-test state after every test."""
+    if _is_local_chain():
+        request.getfixturevalue("fn_isolation")
+
+
+@pytest.fixture(scope="module")
+def advanced_collectible(request):
+    """An AdvancedCollectible (and the mocks) deployed once per test module."""
+    if not _is_local_chain():
+        pytest.skip("unit testing only for local blockchain!")
+    request.getfixturevalue("module_isolation")  # deployed on the module's chain
+    return deploy_advanced()
+
+
+@pytest.fixture(scope="module")
+def multi_collectible(request):
+    """A MultiCollectible, with its metadata pinned, deployed once per test module."""
+    if not _is_local_chain():
+        pytest.skip("unit testing only for local blockchain!")
+    request.getfixturevalue("module_isolation")
+    return deploy_multi()
+
+
+@pytest.fixture
+def ipfs_stub(monkeypatch):
+    """A running stub IPFS server, set as the `local` and `pinata` API endpoint."""
+    server = StubIPFSServer().start()
+    monkeypatch.setenv("IPFS_LOCAL_API_URL", server.url)
+    monkeypatch.setenv("IPFS_PINATA_API_URL", server.url)
+    monkeypatch.setenv("IPFS_PIN_CACHE", "0")
+    yield server
+    server.stop()
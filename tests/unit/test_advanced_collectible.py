@@ -1,13 +1,15 @@
 import pytest
-from brownie import network
-from scripts.advanced_collectible.deploy_and_create import (
-    deploy,
-    create_collectible,
+from brownie import accounts, exceptions, network
+from scripts.advanced_collectible.deploy_and_create import create_collectible
+from scripts.advanced_collectible.create_collectible import (
+    TokenURIBatcher,
+    mint_many,
+    set_token_uris,
 )
 from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account
 
 
-def test_can_create_advanced_collectible():
+def test_can_create_advanced_collectible(advanced_collectible):
     # Arrange
     if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
         pytest.skip("unit testing only for local blockchain!")
@@ -15,7 +17,6 @@ def test_can_create_advanced_collectible():
     number_of_breeds = len(BREED_NAMES)
     random_number = 777
     # Act
-    advanced_collectible = deploy()
     _, token_uri = create_collectible(
         collectible=advanced_collectible,
         account=account,
@@ -27,3 +28,180 @@ def test_can_create_advanced_collectible():
     assert advanced_collectible.ownerOf(0) == account
     assert advanced_collectible.tokenIdToBreed(0) == random_number % number_of_breeds
     assert advanced_collectible.tokenURI(0) == token_uri
+
+
+def test_can_mint_many_advanced_collectibles(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_breeds = len(BREED_NAMES)
+    random_numbers = [777, 778, 779, 780]
+    # Act
+    results = mint_many(
+        collectible=advanced_collectible,
+        account=account,
+        n=len(random_numbers),
+        rngs=random_numbers,
+        is_set_uri=True,
+    )
+    # Assert
+    assert advanced_collectible.tokenCounter() == len(random_numbers)
+    assert all(r.ok for r in results)
+    assert sorted(r.token_id for r in results) == list(range(len(random_numbers)))
+    for r in results:
+        assert advanced_collectible.ownerOf(r.token_id) == account
+        assert r.breed == random_numbers[r.index] % number_of_breeds
+        assert advanced_collectible.tokenIdToBreed(r.token_id) == r.breed
+        assert advanced_collectible.tokenURI(r.token_id) == r.token_uri
+
+
+def test_set_token_uris_gas_per_token(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_tokens = 21
+    mint_many(
+        collectible=advanced_collectible,
+        account=account,
+        n=number_of_tokens,
+        rngs=list(range(number_of_tokens)),
+        is_set_uri=False,
+    )
+    token_uri = "ipfs://bafkreibgvlhkdkx5crezbvjv7nv5lnybhdc6eot5u6r53btfvd6ghgijzy"
+    # Act
+    single_tx = advanced_collectible.setTokenURI(0, token_uri, {"from": account})
+    batch_gas = {}
+    token_id = 1
+    for batch_size in [1, 4, 16]:
+        token_ids = list(range(token_id, token_id + batch_size))
+        batch_tx = advanced_collectible.setTokenURIs(
+            token_ids, [token_uri] * batch_size, {"from": account}
+        )
+        batch_gas[batch_size] = batch_tx.gas_used / batch_size
+        token_id += batch_size
+    # Assert
+    print(f"setTokenURI gas/token: {single_tx.gas_used}")
+    for batch_size, gas_per_token in batch_gas.items():
+        print(f"setTokenURIs x{batch_size} gas/token: {gas_per_token:.0f}")
+    assert batch_gas[16] < batch_gas[4] < batch_gas[1]
+    assert batch_gas[16] < 0.8 * single_tx.gas_used
+    for i in range(number_of_tokens):
+        assert advanced_collectible.tokenURI(i) == token_uri
+
+
+def test_set_token_uris_checks_ownership(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    mint_many(advanced_collectible, get_account(), n=2, rngs=[1, 2], is_set_uri=False)
+    # Act / Assert
+    with pytest.raises(exceptions.VirtualMachineError):
+        advanced_collectible.setTokenURIs([0, 1], ["a", "b"], {"from": accounts[1]})
+    with pytest.raises(exceptions.VirtualMachineError):
+        advanced_collectible.setTokenURIs([0, 1], ["a"], {"from": get_account()})
+
+
+def test_set_token_uris_chunks_by_gas(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_tokens = 30
+    mint_many(
+        collectible=advanced_collectible,
+        account=account,
+        n=number_of_tokens,
+        rngs=list(range(number_of_tokens)),
+        is_set_uri=False,
+    )
+    token_uris = {i: f"ipfs://token-{i}.json" for i in range(number_of_tokens)}
+    gas_limit = 500000
+    # Act
+    errors = set_token_uris(advanced_collectible, account, token_uris, gas_limit)
+    # Assert
+    assert errors == {i: None for i in range(number_of_tokens)}
+    for i, token_uri in token_uris.items():
+        assert advanced_collectible.tokenURI(i) == token_uri
+    batch_txs = [
+        tx
+        for tx in network.history
+        if tx.fn_name == "setTokenURIs" and tx.receiver == advanced_collectible.address
+    ]
+    assert len(batch_txs) > 1  # split into several transactions
+    assert all(tx.gas_used <= gas_limit for tx in batch_txs)
+
+
+def test_token_uri_batcher_sends_full_batches(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    results = mint_many(
+        advanced_collectible, account, n=5, rngs=list(range(5)), is_set_uri=False
+    )
+    for r in results:
+        r.token_uri = f"ipfs://token-{r.token_id}.json"
+    batcher = TokenURIBatcher(advanced_collectible, account, chunk_size=2)
+    # Act
+    for r in results[:4]:
+        batcher(r)
+    sent_uris = [advanced_collectible.tokenURI(r.token_id) for r in results[:4]]
+    batcher(results[4])
+    leftover_uri = advanced_collectible.tokenURI(results[4].token_id)
+    batcher.flush()
+    # Assert: two batches are set before the pipeline is done, one by the flush
+    assert sent_uris == [r.token_uri for r in results[:4]]
+    assert leftover_uri == ""
+    assert batcher.batches == 3
+    assert all(r.ok and "set_uri" in r.timings for r in results)
+    for r in results:
+        assert advanced_collectible.tokenURI(r.token_id) == r.token_uri
+
+
+def test_can_mint_many_with_base_uri(tmp_path, monkeypatch, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    monkeypatch.setenv("BASE_URI_METADATA_ROOT", str(tmp_path))
+    account = get_account()
+    random_numbers = [1, 2, 3, 4, 5]
+    # Act
+    results = mint_many(
+        collectible=advanced_collectible,
+        account=account,
+        n=len(random_numbers),
+        rngs=random_numbers,
+        is_set_uri=True,
+        use_base_uri=True,
+    )
+    # Assert
+    base_uri = advanced_collectible.baseURI()
+    assert base_uri.startswith("ipfs://") and base_uri.endswith("/")
+    for r in results:
+        assert r.ok
+        assert r.token_uri == f"{base_uri}{r.token_id}.json"
+        assert advanced_collectible.tokenURI(r.token_id) == r.token_uri
+    metadata_directory = tmp_path / network.show_active() / advanced_collectible.address
+    assert {f"{r.token_id}.json" for r in results} <= {
+        p.name for p in metadata_directory.iterdir()
+    }
+    uri_txs = [
+        tx
+        for tx in network.history
+        if tx.receiver == advanced_collectible.address
+        and tx.fn_name in ["setTokenURI", "setTokenURIs", "setBaseURI"]
+    ]
+    assert [tx.fn_name for tx in uri_txs] == ["setBaseURI"]
+
+
+def test_only_owner_can_set_base_uri(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    # Act / Assert
+    with pytest.raises(exceptions.VirtualMachineError):
+        advanced_collectible.setBaseURI("ipfs://cid/", {"from": accounts[1]})
+    advanced_collectible.setBaseURI("ipfs://cid/", {"from": get_account()})
+    assert advanced_collectible.baseURI() == "ipfs://cid/"
@@ -0,0 +1,50 @@
+import json
+import pytest
+from brownie import network
+from scripts.benchmark import COMPARED_METRICS, compare_results, run_benchmarks
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV
+
+
+def test_compare_results_threshold():
+    # Arrange
+    baseline = {
+        "multi_mint_n100": {"mints_per_sec": 10.0, "rpc_per_mint": 20.0},
+        "ipfs_pin_n1000": {"pins_per_sec": 500.0},
+    }
+    results = {
+        "multi_mint_n100": {"mints_per_sec": 8.5, "rpc_per_mint": 25.0},
+        "ipfs_pin_n1000": {"pins_per_sec": 900.0},
+        "metadata_n1000": {"files_per_sec": 1.0},  # not in the baseline
+    }
+    # Act
+    regressions = compare_results(results, baseline, threshold=0.2)
+    # Assert: -15% mints/sec is within the threshold, +25% RPC calls is not
+    assert len(regressions) == 1
+    assert regressions[0].startswith("multi_mint_n100.rpc_per_mint")
+    assert compare_results(results, baseline, threshold=0.3) == []
+    assert len(compare_results(results, baseline, threshold=0.1)) == 2
+
+
+def test_run_benchmarks(tmp_path):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    # Act
+    filepath = run_benchmarks(sizes=[1, 3], result_dir=str(tmp_path), sample_size=20)
+    # Assert
+    with open(filepath, "r") as f:
+        results = json.load(f)["results"]
+    for case in ["advanced_mint", "multi_mint"]:
+        for n in [1, 3]:
+            metrics = results[f"{case}_n{n}"]
+            assert metrics["succeeded"] == n
+            assert metrics["mints_per_sec"] > 0
+            assert metrics["rpc_per_mint"] > 0 and metrics["gas_per_mint"] > 0
+    assert results["metadata_n20"]["n"] == 20
+    assert results["metadata_n20"]["files_per_sec"] > 0
+    assert results["ipfs_pin_n20"]["n"] == 20
+    assert results["ipfs_pin_n20"]["pins_per_sec"] > 0
+    assert "metadata_n1000" not in results and "ipfs_pin_n1000" not in results
+    # the same run compared with itself never regresses
+    assert compare_results(results, results) == []
+    assert set(COMPARED_METRICS) >= {"mints_per_sec", "rpc_per_mint"}
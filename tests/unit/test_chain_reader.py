@@ -0,0 +1,70 @@
+import time
+import pytest
+from brownie import network
+from scripts.advanced_collectible.create_collectible import mint_many
+from scripts.multi_collectible.deploy_and_mint import mint_many as mint_many_multi
+from scripts.chain_reader import read_balances, read_token_range
+from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account
+
+
+def test_read_token_range(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_tokens = 12
+    rngs = list(range(100, 100 + number_of_tokens))
+    results = mint_many(
+        collectible=advanced_collectible,
+        account=account,
+        n=number_of_tokens,
+        rngs=rngs,
+        is_set_uri=False,
+    )
+    # Act
+    start = time.perf_counter()
+    states = read_token_range(advanced_collectible, start=0, stop=number_of_tokens + 2)
+    batched_time = time.perf_counter() - start
+    start = time.perf_counter()
+    per_call_states = [
+        (
+            advanced_collectible.ownerOf(i),
+            advanced_collectible.tokenIdToBreed(i),
+            advanced_collectible.tokenURI(i),
+        )
+        for i in range(number_of_tokens)
+    ]
+    per_call_time = time.perf_counter() - start
+    print(f"Batched reads: {batched_time:.3f}s, per-call reads: {per_call_time:.3f}s")
+    # Assert
+    assert len(states) == number_of_tokens  # capped at the token counter
+    for state, (owner, breed, token_uri) in zip(states, per_call_states):
+        assert state.exists
+        assert state.owner == owner == account
+        assert state.breed == breed
+        assert state.token_uri == token_uri
+    # the token IDs follow the fulfillment order, not the request order
+    for r in results:
+        assert states[r.token_id].breed == rngs[r.index] % len(BREED_NAMES)
+
+
+def test_read_erc1155_balances(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    mint_many_multi(
+        collectible=multi_collectible,
+        account=account,
+        n=3,
+        rngs=[300, 301, 302],
+        pay_wei=multi_collectible.getEntranceFee(),
+    )
+    token_ids = list(range(len(BREED_NAMES)))
+    # Act
+    balances = read_balances(multi_collectible, [account.address], token_ids)
+    # Assert
+    for token_id in token_ids:
+        assert balances[account.address][token_id] == multi_collectible.balanceOf(
+            account, token_id
+        )
@@ -0,0 +1,120 @@
+import sqlite3
+import pytest
+from brownie import network, web3
+from scripts.advanced_collectible import create_collectible
+from scripts.advanced_collectible.create_collectible import mint_many, resume_mints
+from scripts.drop_journal import _UNFINISHED_QUERY, DropJournal, recover_requests
+from scripts.mint_pipeline import MintResult
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV, get_account
+
+CONTRACT = "0x0000000000000000000000000000000000000001"
+
+
+def test_drop_journal_steps_only_move_forward(tmp_path):
+    # Arrange
+    journal = DropJournal(path=str(tmp_path / "journal.db"))
+    results = [MintResult(index=i, request_id=100 + i) for i in range(3)]
+    journal.record_many(CONTRACT, results, "sent", run_id=1, target="uri_set")
+    # Act
+    results[0].token_id, results[0].breed = 0, 2
+    journal.record(CONTRACT, results[0], "fulfilled")
+    journal.record(CONTRACT, results[0], "sent", target="uri_set")  # a replay
+    results[1].token_id, results[1].token_uri = 1, "ipfs://cid"
+    journal.record(CONTRACT, results[1], "pinned")
+    journal.record(CONTRACT, results[1], "uri_set")
+    journal.close()
+    journal = DropJournal(path=str(tmp_path / "journal.db"))
+    # Assert
+    assert journal.get_step(CONTRACT, 100) == "fulfilled"
+    assert journal.get_step(CONTRACT, 999) is None
+    unfinished = journal.get_unfinished(CONTRACT)["uri_set"]
+    assert [r.request_id for r in unfinished] == [100, 102]
+    assert (unfinished[0].token_id, unfinished[0].breed) == (0, 2)
+    assert unfinished[1].token_id is None
+    assert journal.count_steps(CONTRACT) == {"sent": 1, "fulfilled": 1, "uri_set": 1}
+    steps = [e["step"] for e in journal.get_history(CONTRACT, 100)]
+    assert steps == ["sent", "fulfilled", "sent"]
+    with pytest.raises(ValueError):
+        journal.record(CONTRACT, results[2], "burnt")
+
+
+def test_drop_journal_indexed_startup(tmp_path):
+    # Arrange
+    path = str(tmp_path / "journal.db")
+    journal = DropJournal(path=path)
+    results = [MintResult(index=i, request_id=i, token_id=i) for i in range(100000)]
+    journal.record_many(CONTRACT, results, "sent", target="fulfilled")
+    journal.record_many(CONTRACT, results[:-10], "fulfilled")
+    journal.close()
+    # Act
+    journal = DropJournal(path=path)
+    unfinished = journal.get_unfinished(CONTRACT)
+    conn = sqlite3.connect(path)
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {_UNFINISHED_QUERY}", (CONTRACT,))
+    details = [row[-1] for row in plan.fetchall()]
+    conn.close()
+    # Assert
+    assert [r.request_id for r in unfinished["fulfilled"]] == list(range(99990, 100000))
+    assert any("USING INDEX idx_tokens_unfinished" in d for d in details)
+
+
+def test_resume_interrupted_mints(tmp_path, monkeypatch, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    journal = DropJournal(path=str(tmp_path / "journal.db"))
+    add_to_ipfs = create_collectible.add_to_ipfs
+
+    def failing_add_to_ipfs(filepath):
+        raise ConnectionError("IPFS is down")
+
+    monkeypatch.setattr(create_collectible, "add_to_ipfs", failing_add_to_ipfs)
+    results = mint_many(
+        advanced_collectible, account, n=3, rngs=[0, 1, 2], journal=journal
+    )
+    assert not any(r.ok for r in results)
+    token_counter = advanced_collectible.tokenCounter()
+    monkeypatch.setattr(create_collectible, "add_to_ipfs", add_to_ipfs)
+    # Act
+    resumed = resume_mints(advanced_collectible, account, journal)
+    # Assert
+    assert [r.request_id for r in resumed] == [r.request_id for r in results]
+    assert all(r.ok for r in resumed)
+    assert advanced_collectible.tokenCounter() == token_counter  # no new mint
+    for result in resumed:
+        assert journal.get_step(advanced_collectible.address, result.request_id) == (
+            "uri_set"
+        )
+        assert advanced_collectible.tokenURI(result.token_id) == result.token_uri
+    assert resume_mints(advanced_collectible, account, journal) == []
+
+
+def test_recover_unrecorded_requests(tmp_path, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    journal = DropJournal(path=str(tmp_path / "journal.db"))
+    journal.start_run(
+        advanced_collectible.address,
+        account.address,
+        from_block=web3.eth.block_number,
+        n=2,
+        target="fulfilled",
+    )
+    # the script died before recording the sent requests
+    request_ids = [
+        advanced_collectible.createCollectible({"from": account}).events[
+            "RequestCollectible"
+        ]["requestId"]
+        for _ in range(2)
+    ]
+    # Act
+    recovered = recover_requests(journal, advanced_collectible)
+    resumed = resume_mints(advanced_collectible, account, journal)
+    # Assert
+    assert recovered == 2
+    assert recover_requests(journal, advanced_collectible) == 0
+    assert [r.request_id for r in resumed] == request_ids
+    assert all(r.ok and r.token_id is not None for r in resumed)
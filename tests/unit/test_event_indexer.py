@@ -0,0 +1,75 @@
+import pytest
+from brownie import chain, network
+from scripts.advanced_collectible.create_collectible import mint_many
+from scripts.event_indexer import EventIndexer
+from scripts.utils import (
+    BREED_NAMES,
+    LOCAL_BLOCKCHAIN_ENV,
+    chain_checkpoint,
+    get_account,
+    get_contract,
+)
+
+
+def _mint(collectible, account, rng: int):
+    create_tx = collectible.createCollectible({"from": account})
+    create_tx.wait(1)
+    request_id = create_tx.events["RequestCollectible"]["requestId"]
+    vrf = get_contract(contract_name="vrf_coordinator")
+    vrf.fulfillRandomWordsWithOverride(
+        request_id, collectible.address, [rng], {"from": account}
+    ).wait(1)
+    return request_id
+
+
+def test_event_indexer_incremental_sync(tmp_path, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    rngs = list(range(100, 106))
+    results = mint_many(
+        advanced_collectible, account, n=len(rngs), rngs=rngs, is_set_uri=False
+    )
+    indexer = EventIndexer(path=str(tmp_path / "index.db"), chunk_size=2)
+    # Act
+    indexed = indexer.sync(advanced_collectible)
+    # Assert
+    assert indexed == 2 * len(rngs)  # request + fulfillment events
+    for result in results:
+        (mint,) = indexer.get_mints(advanced_collectible, request_id=result.request_id)
+        assert mint["token_id"] == result.token_id
+        assert mint["breed"] == rngs[result.index] % len(BREED_NAMES)
+        assert mint["owner"] == account.address
+    assert len(indexer.get_mints(owner=account.address)) == len(rngs)
+    assert indexer.get_pending_requests(advanced_collectible) == []
+    # only the new blocks are indexed on the next sync
+    assert indexer.sync(advanced_collectible) == 0
+    request_id = _mint(advanced_collectible, account, rng=7)
+    assert indexer.sync(advanced_collectible) == 2
+    (mint,) = indexer.get_mints(advanced_collectible, request_id=request_id)
+    assert mint["token_id"] == len(rngs)
+    assert indexer.checkpoint(advanced_collectible) == chain.height
+
+
+def test_event_indexer_reorg(tmp_path, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    _mint(advanced_collectible, account, rng=0)
+    indexer = EventIndexer(path=str(tmp_path / "index.db"))
+    indexer.sync(advanced_collectible)
+    with chain_checkpoint():
+        _mint(advanced_collectible, account, rng=1)
+        _mint(advanced_collectible, account, rng=1)
+        indexer.sync(advanced_collectible)
+        breeds = [m["breed"] for m in indexer.get_mints(advanced_collectible)]
+        assert breeds == [0, 1, 1]
+    # Act: the last 2 mints are dropped, then fork with a different breed
+    _mint(advanced_collectible, account, rng=2)
+    chain.mine(5)
+    indexer.sync(advanced_collectible)
+    # Assert
+    assert [m["breed"] for m in indexer.get_mints(advanced_collectible)] == [0, 2]
+    assert indexer.get_token_breeds(advanced_collectible) == [(0, 0), (1, 2)]
@@ -0,0 +1,58 @@
+import asyncio
+from scripts.ipfs_async import AsyncIPFSClient, async_add_to_ipfs
+from scripts.ipfs_cid import compute_cid
+from scripts.utils_ipfs import add_to_ipfs
+
+
+def _make_files(directory, count: int):
+    directory.mkdir(exist_ok=True)
+    filepaths = []
+    for i in range(count):
+        filepath = directory / f"{i}.json"
+        filepath.write_text(f'{{"name": "Pup #{i}"}}')
+        filepaths.append(str(filepath))
+    return filepaths
+
+
+def test_async_add_many_matches_sync_path(ipfs_stub, tmp_path):
+    # Arrange
+    ipfs_stub.latency = 0.05
+    filepaths = _make_files(tmp_path / "pups", 12)
+    filepaths.append(str(tmp_path / "pups"))  # wrapped with a directory
+    ticks = []
+
+    async def ticker(done: asyncio.Event):
+        while not done.is_set():
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        done = asyncio.Event()
+        ticking = asyncio.create_task(ticker(done))
+        async with AsyncIPFSClient(max_concurrency=4) as client:
+            results = await client.add_many(filepaths)
+        done.set()
+        await ticking
+        return results
+
+    # Act
+    results = asyncio.run(run())
+    # Assert
+    assert [r.filepath for r in results] == filepaths
+    for r in results:
+        assert r.ok
+        assert r.cid == compute_cid(r.filepath) == add_to_ipfs(r.filepath)
+    assert ipfs_stub.max_in_flight <= 4
+    assert len(ticks) > 5  # the event loop kept running during the uploads
+
+
+def test_async_add_to_ipfs_pinata(ipfs_stub, monkeypatch, tmp_path):
+    # Arrange
+    monkeypatch.setenv("IPFS_NETWORK", "pinata")
+    filepaths = _make_files(tmp_path / "pups", 3)
+    # Act
+    file_cid = asyncio.run(async_add_to_ipfs(filepaths[0]))
+    directory_cid = asyncio.run(async_add_to_ipfs(str(tmp_path / "pups")))
+    # Assert
+    assert file_cid == compute_cid(filepaths[0])
+    assert directory_cid == compute_cid(str(tmp_path / "pups"))
@@ -0,0 +1,99 @@
+import pytest
+from scripts.ipfs_backends import (
+    BackendLimits,
+    KuboBackend,
+    MemoryBackend,
+    InfuraBackend,
+    PinataBackend,
+    get_backend,
+    get_backend_rate_limits,
+    split_batches,
+)
+from scripts.ipfs_cid import compute_cid
+from scripts.utils_ipfs import add_many_to_ipfs, add_to_ipfs
+
+
+class SmallRequestKuboBackend(KuboBackend):
+    limits = BackendLimits(max_concurrency=4, max_request_size=1000)
+
+
+def _make_files(directory, count: int, size: int = 100):
+    directory.mkdir(exist_ok=True)
+    filepaths = []
+    for i in range(count):
+        filepath = directory / f"{i}.json"
+        filepath.write_text(f'{{"name": "Pup #{i}"}}'.ljust(size))
+        filepaths.append(str(filepath))
+    return filepaths
+
+
+@pytest.mark.parametrize("in_filesystem", [False, True])
+def test_memory_backend(tmp_path, in_filesystem):
+    # Arrange
+    backend = MemoryBackend(root=str(tmp_path / "store") if in_filesystem else None)
+    filepaths = _make_files(tmp_path / "pups", 3)
+    # Act
+    file_cid = backend.add(filepaths[0])
+    directory_cid = backend.add(str(tmp_path / "pups"))
+    # Assert
+    assert file_cid == compute_cid(filepaths[0])
+    assert directory_cid == compute_cid(str(tmp_path / "pups"))
+    assert backend.cat(file_cid) == open(filepaths[0], "rb").read()
+    assert backend.pin_status(directory_cid)
+    backend.unpin(directory_cid)
+    assert not backend.pin_status(directory_cid)
+
+
+def test_memory_backend_selected_by_env(monkeypatch, tmp_path):
+    # Arrange
+    monkeypatch.setenv("IPFS_NETWORK", "memory")
+    monkeypatch.setenv("IPFS_PIN_CACHE", "0")
+    filepaths = _make_files(tmp_path, 5)
+    # Act
+    results = add_many_to_ipfs(filepaths)
+    # Assert
+    assert [r.cid for r in results] == [compute_cid(f) for f in filepaths]
+    assert all(get_backend().pin_status(r.cid) for r in results)
+
+
+def test_kubo_backend_splits_large_directories(ipfs_stub, tmp_path):
+    # Arrange
+    backend = SmallRequestKuboBackend()
+    _make_files(tmp_path / "pups", 20, size=300)
+    files = [(f"{i}.json", str(tmp_path / "pups" / f"{i}.json")) for i in range(20)]
+    number_of_parts = len(split_batches(files, backend.limits.max_request_size))
+    # Act
+    directory_cid = backend.add(str(tmp_path / "pups"))
+    # Assert
+    assert number_of_parts == 7
+    assert ipfs_stub.requests == number_of_parts + 1  # the parts + the directory
+    assert directory_cid == compute_cid(str(tmp_path / "pups"))
+    assert directory_cid == KuboBackend().add(str(tmp_path / "pups"))
+
+
+def test_kubo_backend_pin_status_and_unpin(ipfs_stub, tmp_path):
+    # Arrange
+    backend = KuboBackend()
+    (filepath,) = _make_files(tmp_path, 1)
+    cid = add_to_ipfs(filepath)
+    # Act
+    was_pinned = backend.pin_status(cid)
+    backend.unpin(cid)
+    # Assert
+    assert was_pinned
+    assert not backend.pin_status(cid)
+    assert ipfs_stub.requests == 4  # no retry on the "not pinned" answer
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown IPFS network option"):
+        get_backend("unknown")
+
+
+def test_backend_rate_limits():
+    # Act
+    rate_limits = get_backend_rate_limits()
+    # Assert: the shared client limits come from the `BackendLimits` of each backend
+    assert rate_limits["pinata"] == PinataBackend.limits.rate_limit
+    assert rate_limits["infura"] == InfuraBackend.limits.rate_limit
+    assert rate_limits["local"] is None and rate_limits["memory"] is None
@@ -0,0 +1,57 @@
+import time
+from scripts.ipfs_cid import compute_cid
+from scripts.ipfs_client import RateLimiter
+from scripts.utils_ipfs import add_many_to_ipfs
+
+
+def _make_files(directory, count: int):
+    filepaths = []
+    for i in range(count):
+        filepath = directory / f"{i}.json"
+        filepath.write_text(f'{{"name": "Pup #{i}"}}')
+        filepaths.append(str(filepath))
+    return filepaths
+
+
+def test_add_many_to_ipfs_keeps_order(ipfs_stub, tmp_path):
+    # Arrange
+    filepaths = _make_files(tmp_path, 10)
+    filepaths.insert(3, str(tmp_path / "missing.json"))
+    # Act
+    results = add_many_to_ipfs(filepaths, max_concurrency=4)
+    # Assert
+    assert [r.filepath for r in results] == filepaths
+    assert not results[3].ok
+    for r in results[:3] + results[4:]:
+        assert r.ok
+        assert r.cid == compute_cid(r.filepath)
+    assert ipfs_stub.max_in_flight <= 4
+
+
+def test_add_many_to_ipfs_scales_with_concurrency(ipfs_stub, tmp_path):
+    # Arrange
+    ipfs_stub.latency = 0.1  # every worker is busy long enough to overlap
+    filepaths = _make_files(tmp_path, 24)
+    max_in_flight = {}
+    # Act
+    for max_concurrency in [1, 4, 8]:
+        ipfs_stub.max_in_flight = 0
+        start = time.perf_counter()
+        results = add_many_to_ipfs(filepaths, max_concurrency=max_concurrency)
+        elapsed = time.perf_counter() - start
+        max_in_flight[max_concurrency] = ipfs_stub.max_in_flight
+        assert all(r.ok for r in results)
+        print(f"Concurrency {max_concurrency}: {len(results) / elapsed:.1f} pins/s")
+    # Assert: the uploads actually overlap, up to the requested concurrency
+    assert max_in_flight == {1: 1, 4: 4, 8: 8}
+
+
+def test_rate_limiter():
+    # Arrange
+    limiter = RateLimiter(rate=20, burst=1)
+    # Act
+    start = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    # Assert
+    assert time.perf_counter() - start >= 5 / 20 * 0.9
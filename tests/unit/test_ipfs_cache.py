@@ -0,0 +1,118 @@
+import os
+import time
+from scripts import utils_ipfs
+from scripts.ipfs_backends import get_backend
+from scripts.ipfs_cache import PinCache
+from scripts.utils_ipfs import add_to_ipfs
+
+LOCAL_OPTIONS = {"cid-version": 1}
+
+
+def test_pin_cache_hit_and_miss(tmp_path):
+    # Arrange
+    cache = PinCache(path=str(tmp_path / "pins.db"))
+    test_file = tmp_path / "pug.json"
+    test_file.write_text('{"name": "Pug"}')
+    # Act
+    cache_key = cache.make_key(str(test_file), backend="local", options=LOCAL_OPTIONS)
+    first_lookup = cache.get(cache_key)
+    cache.put(cache_key, "bafkrei-pug")
+    second_lookup = cache.get(cache_key)
+    # Assert
+    assert first_lookup is None
+    assert second_lookup == "bafkrei-pug"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_pin_cache_is_persistent(tmp_path):
+    # Arrange
+    cache_path = str(tmp_path / "pins.db")
+    test_file = tmp_path / "pug.json"
+    test_file.write_text('{"name": "Pug"}')
+    cache = PinCache(path=cache_path)
+    cache.put(
+        cache.make_key(str(test_file), backend="local", options=LOCAL_OPTIONS),
+        "bafkrei-pug",
+    )
+    cache.close()
+    # Act
+    reopened = PinCache(path=cache_path)
+    cache_key = reopened.make_key(
+        str(test_file), backend="local", options=LOCAL_OPTIONS
+    )
+    # Assert
+    assert reopened.get(cache_key) == "bafkrei-pug"
+
+
+def test_pin_cache_invalidation(tmp_path):
+    # Arrange
+    cache = PinCache(path=str(tmp_path / "pins.db"))
+    test_file = tmp_path / "pug.json"
+    test_file.write_text('{"name": "Pug"}')
+    cache_key = cache.make_key(str(test_file), backend="local", options=LOCAL_OPTIONS)
+    cache.put(cache_key, "bafkrei-pug")
+    # Act
+    test_file.write_text('{"name": "Shiba Inu"}')
+    os.utime(test_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+    changed_key = cache.make_key(str(test_file), backend="local", options=LOCAL_OPTIONS)
+    other_backend_key = cache.make_key(
+        str(test_file), backend="pinata", options=LOCAL_OPTIONS
+    )
+    # Assert
+    assert changed_key != cache_key
+    assert cache.get(changed_key) is None
+    assert other_backend_key != changed_key
+
+
+def test_pin_cache_eviction(tmp_path):
+    # Arrange
+    cache = PinCache(path=str(tmp_path / "pins.db"), max_entries=2)
+    # Act
+    for i in range(3):
+        cache.put(f"key-{i}", f"cid-{i}")
+        time.sleep(0.01)
+    # Assert
+    assert cache.stats()["entries"] == 2
+    assert cache.get("key-0") is None
+    assert cache.get("key-2") == "cid-2"
+    # Act & Assert (expired entries)
+    expiring = PinCache(path=str(tmp_path / "expiring.db"), max_age=0.01)
+    expiring.put("key", "cid")
+    time.sleep(0.05)
+    assert expiring.get("key") is None
+
+
+def test_pin_cache_rehash_catches_same_size_edits(tmp_path):
+    # Arrange
+    cache = PinCache(path=str(tmp_path / "pins.db"))
+    test_file = tmp_path / "pug.json"
+    test_file.write_text('{"name": "Pug"}')
+    memo_hash = cache.file_hash(str(test_file))
+    stat = os.stat(test_file)
+    # Act: same size, and the modification time is restored
+    test_file.write_text('{"name": "Pig"}')
+    os.utime(test_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    # Assert
+    assert cache.file_hash(str(test_file)) == memo_hash  # the memo limitation
+    assert cache.file_hash(str(test_file), rehash=True) != memo_hash
+    assert cache.file_hash(str(test_file)) != memo_hash  # the memo is updated
+
+
+def test_verified_cache_hit_pins_again(ipfs_stub, monkeypatch, tmp_path):
+    # Arrange
+    cache = PinCache(path=str(tmp_path / "pins.db"))
+    monkeypatch.setenv("IPFS_PIN_CACHE", "1")
+    monkeypatch.setattr(utils_ipfs, "get_pin_cache", lambda: cache)
+    test_file = tmp_path / "pug.json"
+    test_file.write_text('{"name": "Pug"}')
+    cid = add_to_ipfs(str(test_file))
+    get_backend("local").unpin(cid)  # e.g. garbage collected by the node
+    # Act
+    stale_cid = add_to_ipfs(str(test_file))
+    stale_pinned = cid in ipfs_stub.pins
+    verified_cid = add_to_ipfs(str(test_file), verify=True)
+    # Assert
+    assert stale_cid == verified_cid == cid
+    assert not stale_pinned  # trusted without `verify`
+    assert cid in ipfs_stub.pins
@@ -0,0 +1,67 @@
+import io
+import json
+from scripts.ipfs_cid import (
+    CHUNK_SIZE,
+    MAX_LINKS,
+    compute_bytes_cid,
+    compute_cid,
+    compute_directory_cid,
+    compute_stream_cid,
+)
+
+# CIDs returned by `/api/v0/add?cid-version=1` (see the pinned metadata images)
+KNOWN_IMAGE_CIDS = {
+    "./img/pug.png": "bafkreihdpkml2wi3qn3hmf4mut23chh3ks7eeng353agc4m2emefaqjksq",
+    "./img/shiba-inu.png": "bafkreibfkec3ybuwxirrym2pkmn3nlrq6ng4a7zbyiegs26pw2pkl3ehxy",
+    "./img/st-bernard.png": "bafkreicz5vqq5kqpfo75fvvgfafd3nmrxvvzbxeg7ic53n7v4xbnl3kmt4",
+}
+EMPTY_FILE_CID = "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"
+EMPTY_DIRECTORY_CID = "bafybeiczsscdsbs7ffqz55asqdf3smv6klcw3gofszvwlyarci47bgf354"
+# `ipfs add --cid-version=1 --raw-leaves [-w]` layouts: a 2 leaves file node, a
+# 2 levels balanced DAG (MAX_LINKS + 1 leaves) and the wrapped `./img` directory
+TWO_CHUNKS_CID = "bafybeiayvlmgcyd4vrfqh7xghmr7lc4ynduufkqxa35yqpx5j3u7ys33nm"
+MANY_CHUNKS_CID = "bafybeicjqtcwcll3vvfzxp265ttc56ms45v3avavp6eio2tbitziz6jybu"
+IMAGE_DIRECTORY_CID = "bafybeia4prgoxs7lesfrdfxan4ckbns44cd7beiveedjm7dfjreipd7xve"
+
+
+def test_compute_file_cid_known_answers():
+    for filepath, expected_cid in KNOWN_IMAGE_CIDS.items():
+        assert compute_cid(filepath) == expected_cid
+    assert compute_bytes_cid(b"") == EMPTY_FILE_CID
+
+
+def test_compute_cid_matches_pinned_metadata():
+    # Arrange
+    with open("./metadata/erc721/development/0-PUG.json", "r") as f:
+        metadata = json.load(f)
+    # Act & Assert
+    assert metadata["image"] == f"ipfs://{compute_cid('./img/pug.png')}"
+
+
+def test_compute_directory_cid():
+    # Act & Assert
+    assert compute_directory_cid({}) == EMPTY_DIRECTORY_CID
+    wrapped_cid = compute_cid("./img")
+    assert wrapped_cid == IMAGE_DIRECTORY_CID
+    # the link order does not depend on the input order
+    assert wrapped_cid == compute_directory_cid(
+        {
+            "st-bernard.png": "./img/st-bernard.png",
+            "pug.png": "./img/pug.png",
+            "shiba-inu.png": "./img/shiba-inu.png",
+        }
+    )
+
+
+def test_compute_chunked_file_cid():
+    # Arrange
+    single_chunk = b"\x01" * CHUNK_SIZE
+    two_chunks = single_chunk + b"\x02"
+    many_chunks = b"\x03" * (CHUNK_SIZE * (MAX_LINKS + 1))
+    # Act & Assert
+    assert compute_bytes_cid(single_chunk).startswith("bafkrei")  # raw leaf
+    assert compute_bytes_cid(two_chunks) == TWO_CHUNKS_CID  # dag-pb root
+    assert compute_bytes_cid(many_chunks) == MANY_CHUNKS_CID
+    # streaming in smaller reads gives the same CID
+    stream = io.BufferedReader(io.BytesIO(two_chunks), buffer_size=1024)
+    assert compute_stream_cid(stream) == compute_bytes_cid(two_chunks)
@@ -0,0 +1,64 @@
+import time
+import pytest
+from scripts.ipfs_cid import compute_cid
+from scripts.ipfs_client import IPFSClient
+from scripts.utils_ipfs import add_to_ipfs
+
+
+def test_client_retries_failed_requests(ipfs_stub):
+    # Arrange
+    client = IPFSClient(backoff_base=0.01, max_retries=3)
+    ipfs_stub.fail_next(2, status=503)
+    # Act
+    with open("./test.txt", "rb") as f:
+        response = client.post(
+            "local",
+            f"{ipfs_stub.url}/api/v0/add",
+            files=[("file", ("test.txt", f))],
+            params={"cid-version": 1},
+        )
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["Hash"] == compute_cid("./test.txt")
+    metrics = client.metrics()["local"]
+    assert metrics["requests"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["status_counts"] == {503: 2, 200: 1}
+
+
+def test_client_honors_retry_after(ipfs_stub):
+    # Arrange
+    client = IPFSClient(backoff_base=0.01, max_retries=1)
+    ipfs_stub.fail_next(1, status=429, headers={"Retry-After": "1"})
+    # Act
+    start = time.perf_counter()
+    with open("./test.txt", "rb") as f:
+        response = client.post(
+            "local", f"{ipfs_stub.url}/api/v0/add", files=[("file", ("test.txt", f))]
+        )
+    # Assert
+    assert response.status_code == 200
+    assert time.perf_counter() - start >= 1.0
+
+
+def test_client_gives_up_after_max_retries(ipfs_stub):
+    # Arrange
+    client = IPFSClient(backoff_base=0.01, max_retries=2)
+    ipfs_stub.fail_next(5, status=500)
+    # Act
+    response = client.post("local", f"{ipfs_stub.url}/api/v0/add")
+    # Assert
+    assert response.status_code == 500
+    assert client.metrics()["local"]["requests"] == 3
+
+
+@pytest.mark.parametrize("ipfs_network", ["local", "pinata"])
+def test_add_to_ipfs_with_stub(ipfs_stub, monkeypatch, ipfs_network):
+    # Arrange
+    monkeypatch.setenv("IPFS_NETWORK", ipfs_network)
+    # Act
+    file_cid = add_to_ipfs("./test.txt")
+    directory_cid = add_to_ipfs("./img")
+    # Assert
+    assert file_cid == compute_cid("./test.txt")
+    assert directory_cid == compute_cid("./img")
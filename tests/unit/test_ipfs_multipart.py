@@ -0,0 +1,77 @@
+import os
+import time
+import tracemalloc
+import pytest
+from scripts.ipfs_cid import compute_cid
+from scripts.ipfs_multipart import MultipartFileStream
+from scripts.utils_ipfs import add_to_ipfs, get_all_files
+from scripts.ipfs_stub import parse_multipart
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_multipart_stream_roundtrip(tmp_path):
+    # Arrange
+    files = []
+    for i in range(3):
+        filepath = tmp_path / f"{i}.json"
+        filepath.write_bytes(os.urandom(1000 * (i + 1)))
+        files.append((f"{i}.json", str(filepath)))
+    upload = MultipartFileStream(files, fields={"pinataOptions": "{}"}, chunk_size=256)
+    # Act
+    body = b"".join(upload)
+    # Assert
+    assert len(body) == len(upload)
+    assert body == b"".join(upload)  # can be streamed again on retry
+    parts = parse_multipart(body, upload.content_type)
+    assert [name for name, _ in parts] == [name for name, _ in files]
+    for (_, content), (_, filepath) in zip(parts, files):
+        assert content == open(filepath, "rb").read()
+
+
+def test_add_directory_to_ipfs_streaming(ipfs_stub, tmp_path):
+    # Arrange
+    for i in range(200):
+        (tmp_path / f"{i}.json").write_text(f'{{"name": "Pup #{i}"}}')
+    # Act
+    directory_cid = add_to_ipfs(str(tmp_path))
+    # Assert
+    assert directory_cid == compute_cid(str(tmp_path))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs procfs")
+def test_multipart_stream_memory_and_fds_benchmark(tmp_path):
+    """
+    To check the memory and file descriptors stay flat on a 10k-file directory.
+    """
+    # Arrange
+    file_size = 2048
+    for i in range(10000):
+        (tmp_path / f"{i}.json").write_bytes(b"x" * file_size)
+    upload = MultipartFileStream(
+        [(os.path.basename(f), f) for f in get_all_files(str(tmp_path))]
+    )
+    baseline_fds = _open_fds()
+    max_fds = baseline_fds
+    streamed = 0
+    # Act
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, chunk in enumerate(upload):
+        streamed += len(chunk)
+        if i % 500 == 0:
+            max_fds = max(max_fds, _open_fds())
+    elapsed = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Assert
+    print(
+        f"Streamed {streamed / 2**20:.1f} MiB in {elapsed:.2f}s, "
+        f"peak memory {peak_memory / 2**10:.0f} KiB, max FDs +{max_fds - baseline_fds}"
+    )
+    assert streamed == len(upload)
+    assert streamed > 10000 * file_size
+    assert max_fds - baseline_fds <= 1
+    assert peak_memory < 2 * 2**20  # much smaller than the 20 MiB payload
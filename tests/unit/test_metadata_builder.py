@@ -0,0 +1,78 @@
+import os
+import copy
+import time
+from metadata.sample_metadata import (
+    metadata_template_puppies,
+    metadata_template_puppies_erc1155,
+)
+from scripts.ipfs_cid import compute_cid
+from scripts.metadata_builder import build_erc721_metadata, build_erc1155_metadata
+
+BREED_NAMES = ["PUG", "SHIBA_INU", "ST_BERNARD"]
+
+
+def offline_image_uris(image_paths):
+    """Resolve the image URIs without uploading, counting the distinct images."""
+    offline_image_uris.calls.append(sorted(set(image_paths)))
+    return {path: f"ipfs://{compute_cid(path)}" for path in set(image_paths)}
+
+
+offline_image_uris.calls = []
+
+
+def test_build_metadata_matches_current_format(tmp_path):
+    # Arrange
+    templates = copy.deepcopy(
+        [metadata_template_puppies, metadata_template_puppies_erc1155]
+    )
+    # Act
+    erc721_files = [
+        build_erc721_metadata(
+            [(0, breed)],
+            metadata_directory=str(tmp_path / "erc721"),
+            image_resolver=offline_image_uris,
+        )[0]
+        for breed in ["PUG", "SHIBA_INU"]
+    ]
+    erc1155_files = build_erc1155_metadata(
+        list(enumerate(BREED_NAMES)),
+        metadata_directory=str(tmp_path / "erc1155"),
+        image_resolver=offline_image_uris,
+    )
+    # Assert
+    for filepath in erc721_files:
+        reference = f"./metadata/erc721/development/{os.path.basename(filepath)}"
+        assert open(filepath, "rb").read() == open(reference, "rb").read()
+    for token_id, filepath in erc1155_files.items():
+        reference = f"./metadata/erc1155/development/{token_id}.json"
+        assert open(filepath, "rb").read() == open(reference, "rb").read()
+    # the shared templates are never mutated
+    assert templates == [metadata_template_puppies, metadata_template_puppies_erc1155]
+
+
+def test_build_collection_metadata_at_scale(tmp_path):
+    # Arrange
+    number_of_tokens = 10000
+    tokens = [(i, BREED_NAMES[i % len(BREED_NAMES)]) for i in range(number_of_tokens)]
+    offline_image_uris.calls.clear()
+    # Act
+    start = time.perf_counter()
+    filepaths = build_erc721_metadata(
+        tokens,
+        metadata_directory=str(tmp_path),
+        image_resolver=offline_image_uris,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Built {number_of_tokens} metadata files in {elapsed:.2f}s")
+    # Assert
+    assert len(filepaths) == number_of_tokens
+    assert len(list(tmp_path.iterdir())) == number_of_tokens  # no temporary files
+    assert offline_image_uris.calls == [
+        sorted({f"./img/{b.lower().replace('_', '-')}.png" for b in BREED_NAMES})
+    ]
+    # the existing files are skipped on the next run
+    offline_image_uris.calls.clear()
+    build_erc721_metadata(
+        tokens, metadata_directory=str(tmp_path), image_resolver=offline_image_uris
+    )
+    assert offline_image_uris.calls == []
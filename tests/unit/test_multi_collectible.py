@@ -1,49 +1,51 @@
 import pytest, random
-from brownie import network
+from brownie import network, reverts
 from web3 import Web3
-from scripts.multi_collectible.deploy_and_mint import deploy, mint, pin_metadata_to_ipfs
-from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account
+from scripts.multi_collectible.deploy_and_mint import (
+    mint,
+    mint_many,
+    pin_metadata_to_ipfs,
+)
+from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account, get_contract
 
 
-def test_deploy_multi_collectible():
+def test_deploy_multi_collectible(multi_collectible):
     # Arrange
     if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
         pytest.skip("unit testing only for local blockchain!")
-    collectible = deploy()
     # Act
     ipfs_cid = pin_metadata_to_ipfs()
     # Assert
     for i in range(len(BREED_NAMES)):
         token_uri_ref = f"ipfs://{ipfs_cid}/{i}.json"
-        token_uri_deployed = collectible.uri(int(i), {"from": get_account()})
+        token_uri_deployed = multi_collectible.uri(int(i), {"from": get_account()})
         print(f"Token URI #{i}: {token_uri_deployed}")
         assert token_uri_ref == token_uri_deployed
     print(f"Passed the test!")
 
 
-def test_get_entrance_fee():
+def test_get_entrance_fee(multi_collectible):
     """
     To test the entrance fee calculation and the minimum fee/price for each token
     """
     # Arrange
     if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
         pytest.skip("unit testing only for local blockchain!")
-    collectible = deploy()
     # Act #1
-    entrance_fee = collectible.getEntranceFee()
+    entrance_fee = multi_collectible.getEntranceFee()
     expected_fee_usd = 20  # USD
     # Assert #1
     print(f"Minimum entrance fee at {entrance_fee} Wei")
     assert entrance_fee == Web3.toWei(expected_fee_usd / 2000, "ether")
     # Act & Assert #2
     for i, min_price_usd in enumerate([5, 10, 20]):
-        min_price = collectible.getTokenMinimumPrice(i)
+        min_price = multi_collectible.getTokenMinimumPrice(i)
         print(f"Token #{i} minimum price at {min_price} Wei")
         assert min_price == Web3.toWei(min_price_usd / 2000, "ether")
     print(f"Passed the test!")
 
 
-def test_mint_multi_collectible():
+def test_mint_multi_collectible(multi_collectible):
     # Arrange
     if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
         pytest.skip("unit testing only for local blockchain!")
@@ -51,7 +53,6 @@ def test_mint_multi_collectible():
     number_of_breeds = len(BREED_NAMES)
     random_number = random.randint(100, 100000)  # random number from 100 to 100,000
     # Act
-    multi_collectible = deploy()
     payable_value = multi_collectible.getEntranceFee()
     mint(
         collectible=multi_collectible,
@@ -67,3 +68,104 @@ def test_mint_multi_collectible():
     print(f"User {account} successfully minted {user_balance} of {breed_name}")
     assert user_balance == expected_amount
     print(f"Passed the test!")
+
+
+def test_mint_many_multi_collectible(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_breeds = len(BREED_NAMES)
+    random_numbers = [300, 301, 302, 303, 304, 305]
+    # Act
+    payable_value = multi_collectible.getEntranceFee()
+    results = mint_many(
+        collectible=multi_collectible,
+        account=account,
+        n=len(random_numbers),
+        rngs=random_numbers,
+        pay_wei=payable_value,
+    )
+    # Assert
+    assert all(r.ok for r in results)
+    expected_balances = [0] * number_of_breeds
+    for r in results:
+        expected_breed = random_numbers[r.index] % number_of_breeds
+        assert r.breed == expected_breed
+        expected_balances[expected_breed] += r.amount
+    for breed_id, expected_balance in enumerate(expected_balances):
+        assert multi_collectible.balanceOf(account, breed_id) == expected_balance
+    print(f"Passed the test!")
+
+
+def test_mint_lots_multi_collectible(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    number_of_breeds = len(BREED_NAMES)
+    random_numbers = [400, 401, 402, 403, 404]
+    balances = [multi_collectible.balanceOf(account, i) for i in range(3)]
+    # Act
+    payable_value = multi_collectible.getEntranceFee()
+    minted_events = mint(
+        collectible=multi_collectible,
+        account=account,
+        pay_wei=payable_value,
+        lots=len(random_numbers),
+        rngs=random_numbers,
+    )
+    # Assert
+    assert len(minted_events) == len(random_numbers)
+    for random_number, minted_event in zip(random_numbers, minted_events):
+        expected_breed = random_number % number_of_breeds
+        assert minted_event["breed"] == expected_breed
+        assert minted_event["amount"] == (number_of_breeds + 1) / (2**expected_breed)
+        balances[expected_breed] += minted_event["amount"]
+    for breed_id, expected_balance in enumerate(balances):
+        assert multi_collectible.balanceOf(account, breed_id) == expected_balance
+    print(f"Passed the test!")
+
+
+def test_batched_mint_gas_per_token(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    vrf = get_contract(contract_name="vrf_coordinator")
+    payable_value = multi_collectible.getEntranceFee()
+    lots = 20
+
+    def request_and_fulfill(create_tx, number_of_words: int) -> int:
+        request_id = create_tx.events["RequestCollectible"]["requestId"]
+        fulfill_tx = vrf.fulfillRandomWordsWithOverride(
+            request_id,
+            multi_collectible.address,
+            list(range(300, 300 + number_of_words)),
+            {"from": account},
+        )
+        assert fulfill_tx.events["RandomWordsFulfilled"]["success"]
+        return create_tx.gas_used + fulfill_tx.gas_used
+
+    # Act
+    single_gas = request_and_fulfill(
+        multi_collectible.createCollectible({"from": account, "value": payable_value}),
+        1,
+    )
+    batch_gas = request_and_fulfill(
+        multi_collectible.createCollectibles(
+            lots, {"from": account, "value": payable_value * lots}
+        ),
+        lots,
+    )
+    # Assert
+    print(f"Gas per lot: {single_gas} single, {batch_gas / lots:.0f} batched")
+    assert batch_gas / lots < single_gas / 2
+    with reverts("Insufficient fee!"):
+        multi_collectible.createCollectibles(
+            lots, {"from": account, "value": payable_value * lots - 1}
+        )
+    with reverts("Invalid number of lots!"):
+        multi_collectible.createCollectibles(
+            multi_collectible.MAX_LOTS() + 1, {"from": account, "value": 0}
+        )
@@ -0,0 +1,39 @@
+import pytest
+from brownie import network
+from scripts.price_cache import PriceCache
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV, get_account, get_contract
+
+
+def test_price_cache_reads_once_per_round(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    cache = PriceCache(ttl=3600, margin=0.02)
+    entrance_fee = multi_collectible.getEntranceFee()
+    # Act
+    pay_amounts = [cache.pay_amount(multi_collectible) for _ in range(100)]
+    breed_prices = [
+        cache.get_token_minimum_price(multi_collectible, i) for i in range(3)
+    ]
+    # Assert
+    assert pay_amounts == [entrance_fee + -(-entrance_fee * 2 // 100)] * 100
+    assert breed_prices == [multi_collectible.getTokenMinimumPrice(i) for i in range(3)]
+    assert cache.stats() == {"round_reads": 1, "price_reads": 4, "hits": 99}
+
+
+def test_price_cache_follows_the_feed_rounds(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    feed = get_contract(contract_name="eth_usd_price_feed")
+    stale_cache = PriceCache(ttl=3600)
+    cache = PriceCache(ttl=0)
+    entrance_fee = cache.get_entrance_fee(multi_collectible)
+    stale_cache.get_entrance_fee(multi_collectible)
+    # Act
+    feed.updateAnswer(feed.latestRoundData()[1] // 2, {"from": get_account()})
+    # Assert
+    assert cache.get_entrance_fee(multi_collectible) == 2 * entrance_fee
+    assert cache.get_entrance_fee(multi_collectible) == 2 * entrance_fee
+    assert cache.stats()["price_reads"] == 2  # once per round
+    assert stale_cache.get_entrance_fee(multi_collectible) == entrance_fee  # TTL
@@ -0,0 +1,91 @@
+import json
+import threading
+import pytest
+from brownie import network
+from scripts.advanced_collectible.deploy_and_create import deploy
+from scripts.profiling import Tracer, profiler, with_current_span
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def on_span_start(self, span):
+        self.events.append(("start", span.name))
+
+    def on_span_end(self, span):
+        self.events.append(("end", span.name))
+
+
+def test_profiled_deploy_report(monkeypatch, tmp_path):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    monkeypatch.setenv("PROFILING", "1")
+    monkeypatch.setattr(profiler, "report_dir", str(tmp_path))
+    tracer = RecordingTracer()
+    monkeypatch.setattr(profiler, "tracers", [tracer])
+    # Act
+    deploy()
+    # Assert
+    (report_path,) = list(tmp_path.iterdir())
+    report = json.load(open(report_path))
+    span = report["span"]
+    assert report["network"] == network.show_active()
+    assert span["name"] == "deploy_and_create.deploy"
+    assert span["tx_count"] >= 1 and span["gas_used"] > 0
+    assert span["rpc_total"] > 0 and span["wall_time"] > 0
+    child_names = [child["name"] for child in span["children"]]
+    assert child_names[0] == "vrf_subscription.get_subscription"
+    assert child_names[-1] == "vrf_subscription.register_consumer"
+    assert sum(c["gas_used"] for c in span["children"]) <= span["gas_used"]
+    assert tracer.events[0] == ("start", "deploy_and_create.deploy")
+    assert tracer.events[-1] == ("end", "deploy_and_create.deploy")
+
+
+def test_profiling_can_be_disabled(monkeypatch, tmp_path):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    monkeypatch.setenv("PROFILING", "0")
+    monkeypatch.setattr(profiler, "report_dir", str(tmp_path))
+    # Act
+    deploy()
+    # Assert
+    assert not tmp_path.exists() or list(tmp_path.iterdir()) == []
+
+
+def test_worker_spans_follow_their_parent(monkeypatch, tmp_path):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    monkeypatch.setattr(profiler, "report_dir", str(tmp_path))
+    overlapping = threading.Barrier(3)
+
+    def work(name: str):
+        with profiler.span(name):
+            overlapping.wait(timeout=10)  # every span is open at once
+
+    # Act
+    with profiler.span("parent"):
+        children = [
+            threading.Thread(target=with_current_span(work), args=(f"child-{i}",))
+            for i in range(3)
+        ]
+        for thread in children:
+            thread.start()
+        for thread in children:
+            thread.join()
+    roots = [threading.Thread(target=work, args=(f"root-{i}",)) for i in range(3)]
+    for thread in roots:
+        thread.start()
+    for thread in roots:
+        thread.join()
+    # Assert
+    reports = [json.load(open(path))["span"] for path in tmp_path.iterdir()]
+    by_name = {span["name"]: span for span in reports}
+    assert sorted(by_name) == ["parent", "root-0", "root-1", "root-2"]
+    child_names = sorted(child["name"] for child in by_name["parent"]["children"])
+    assert child_names == ["child-0", "child-1", "child-2"]
+    assert all(by_name[f"root-{i}"]["children"] == [] for i in range(3))
@@ -0,0 +1,80 @@
+import time
+import pytest
+from brownie import Wei, accounts, chain, network, web3
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV, get_account
+from scripts.tx_broadcaster import TxBroadcaster
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 4, 16])
+def test_broadcaster_in_flight_window(max_in_flight, advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    broadcaster = TxBroadcaster(account, max_in_flight=max_in_flight)
+    number_of_txs = 20
+    # Act
+    futures = []
+    max_in_flight_seen = 0
+    for _ in range(number_of_txs):
+        futures.append(broadcaster.send(advanced_collectible.createCollectible))
+        max_in_flight_seen = max(max_in_flight_seen, broadcaster.in_flight)
+    receipts = [future.result() for future in futures]
+    broadcaster.close()
+    # Assert
+    assert 0 < max_in_flight_seen <= max_in_flight
+    nonces = [tx.nonce for tx in receipts]
+    assert nonces == list(range(nonces[0], nonces[0] + number_of_txs))
+    assert all(tx.status == 1 for tx in receipts)
+    assert broadcaster.stats()["confirmed"] == number_of_txs
+    request_ids = {tx.events["RequestCollectible"]["requestId"] for tx in receipts}
+    assert len(request_ids) == number_of_txs
+
+
+def test_broadcaster_recovers_nonce_errors():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    broadcaster = TxBroadcaster(account, max_in_flight=4)
+    broadcaster.transfer(accounts[1], 1).result()
+    # a tx sent around the broadcaster makes its local nonce stale
+    account.transfer(accounts[1], 1).wait(1)
+    # Act
+    tx = broadcaster.transfer(accounts[1], 1).result()
+    broadcaster.close()
+    # Assert
+    assert tx.status == 1
+    assert tx.nonce == account.nonce - 1
+    assert broadcaster.stats()["nonce_resyncs"] >= 1
+
+
+def test_broadcaster_replaces_stuck_txs(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    broadcaster = TxBroadcaster(
+        account, stuck_timeout=0.5, max_replacements=1, poll_interval=0.1
+    )
+    gas_price = Wei("1 gwei")  # the development default (0) can't be bumped
+    # Act: the tx stays pending until a block is mined by hand
+    web3.provider.make_request("miner_stop", [])
+    try:
+        future = broadcaster.send(
+            advanced_collectible.createCollectible, tx_params={"gas_price": gas_price}
+        )
+        deadline = time.monotonic() + 30
+        while broadcaster.stats()["replaced"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        chain.mine()
+        receipt = future.result(timeout=60)
+    finally:
+        web3.provider.make_request("miner_start", [])
+    broadcaster.close()
+    # Assert: the mined replacement is returned, with its events
+    assert broadcaster.stats()["replaced"] == 1
+    assert broadcaster.stats()["confirmed"] == 1
+    assert receipt.status == 1
+    assert receipt.gas_price > gas_price
+    assert "RequestCollectible" in receipt.events
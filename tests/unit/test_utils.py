@@ -0,0 +1,65 @@
+import pytest
+from brownie import accounts, chain, network
+from scripts.utils import (
+    LOCAL_BLOCKCHAIN_ENV,
+    chain_checkpoint,
+    deploy_mocks,
+    get_account,
+    get_contract,
+    resolution_cache,
+)
+
+
+def test_get_contract_is_cached():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    resolution_cache.clear()
+    vrf_coordinator = get_contract(contract_name="vrf_coordinator")
+    hits = resolution_cache.stats()["hits"]
+    # Act
+    for _ in range(10):
+        assert get_contract(contract_name="vrf_coordinator") == vrf_coordinator
+    # Assert
+    assert resolution_cache.stats()["hits"] == hits + 10
+
+
+def test_get_contract_cache_invalidation():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    old_coordinator = get_contract(contract_name="vrf_coordinator")
+    # Act
+    deploy_mocks(mock_name="vrf_coordinator")
+    new_coordinator = get_contract(contract_name="vrf_coordinator")
+    # Assert
+    assert new_coordinator.address != old_coordinator.address
+    # Act & Assert (explicit clear)
+    resolution_cache.clear()
+    assert resolution_cache.stats()["entries"] == 0
+    assert get_contract(contract_name="vrf_coordinator") == new_coordinator
+    assert get_account() == get_account()
+
+
+def test_chain_checkpoints_nest():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account, receiver = get_account(), accounts[1]
+    balance = receiver.balance()
+    # Act
+    with chain_checkpoint():
+        account.transfer(receiver, 1)
+        with chain_checkpoint():
+            account.transfer(receiver, 2)
+            inner_balance = receiver.balance()
+        outer_balance = receiver.balance()  # the inner checkpoint is reverted
+        account.transfer(receiver, 4)
+    # Assert
+    assert inner_balance == balance + 3
+    assert outer_balance == balance + 1
+    assert receiver.balance() == balance  # then the outer one
+    # brownie's per-test snapshot (`fn_isolation`) is still the test start
+    account.transfer(receiver, 8)
+    chain.revert()
+    assert receiver.balance() == balance
@@ -0,0 +1,47 @@
+import pytest
+from brownie import network
+from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account, get_contract
+from scripts.vrf_fulfillment import wait_for_fulfillment
+
+
+def test_wait_for_fulfillment(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    random_number = 777
+    vrf = get_contract(contract_name="vrf_coordinator")
+    create_tx = advanced_collectible.createCollectible({"from": account})
+    create_tx.wait(1)
+    request_id = create_tx.events["RequestCollectible"]["requestId"]
+    vrf.fulfillRandomWordsWithOverride(
+        request_id, advanced_collectible.address, [random_number], {"from": account}
+    ).wait(1)
+    # Act
+    assign_event = wait_for_fulfillment(
+        collectible=advanced_collectible,
+        request_id=request_id,
+        from_block=create_tx.block_number,
+        timeout=5,
+    )
+    # Assert
+    assert assign_event["tokenId"] == 0
+    assert assign_event["breedIndex"] == random_number % len(BREED_NAMES)
+
+
+def test_wait_for_fulfillment_timeout(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    create_tx = advanced_collectible.createCollectible({"from": get_account()})
+    create_tx.wait(1)
+    request_id = create_tx.events["RequestCollectible"]["requestId"]
+    # Act & Assert
+    with pytest.raises(TimeoutError):
+        wait_for_fulfillment(
+            collectible=advanced_collectible,
+            request_id=request_id,
+            from_block=create_tx.block_number,
+            timeout=1,
+            poll_interval=0.1,
+        )
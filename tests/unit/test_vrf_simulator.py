@@ -0,0 +1,111 @@
+import time
+import random
+import threading
+import pytest
+from brownie import AdvancedCollectible, config, network
+from scripts.advanced_collectible.create_collectible import mint_many
+from scripts.utils import BREED_NAMES, LOCAL_BLOCKCHAIN_ENV, get_account, get_contract
+from scripts.vrf_simulator import VRFSimulator, make_latency_model
+from scripts.vrf_subscription import fund_subscription, register_consumer
+
+
+def _deploy_unfunded(account):
+    vrf = get_contract(contract_name="vrf_coordinator")
+    sub_id = vrf.createSubscription({"from": account}).events[0]["subId"]
+    collectible = AdvancedCollectible.deploy(
+        vrf.address,
+        sub_id,
+        config["networks"][network.show_active()]["key_hash"],
+        {"from": account},
+    )
+    register_consumer(contract_address=collectible.address, subscription_id=sub_id)
+    return collectible, sub_id
+
+
+@pytest.mark.parametrize(
+    "distribution, mean, spread",
+    [("constant", 0.5, 0), ("uniform", 0.5, 0.2), ("exponential", 0.5, 0)],
+)
+def test_latency_model_is_seeded(distribution, mean, spread):
+    # Arrange
+    model = make_latency_model(distribution, mean=mean, spread=spread)
+    # Act
+    samples = [model(random.Random(7)) for _ in range(3)]
+    many = [model(rng) for rng in [random.Random(1)] for _ in range(2000)]
+    # Assert
+    assert samples[0] == samples[1] == samples[2]
+    assert min(many) >= 0
+    assert abs(sum(many) / len(many) - mean) < 0.05
+
+
+def test_simulator_fulfills_in_batches(advanced_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    n = 10
+    latency = make_latency_model("uniform", mean=0.5, spread=0.4)
+    # Act
+    with VRFSimulator(seed=3, batch_size=4, latency=latency) as simulator:
+        results = mint_many(
+            advanced_collectible,
+            get_account(),
+            n=n,
+            is_set_uri=False,
+            vrf_simulator=simulator,
+        )
+    metrics = simulator.report()
+    # Assert
+    assert all(r.ok for r in results)
+    assert metrics["requested"] == metrics["fulfilled"] == n
+    assert metrics["failed"] == 0 and metrics["queue_depth"] == 0
+    assert metrics["batches"] >= n / 4 and metrics["max_queue_depth"] > 1
+    assert 0 < metrics["latency_p50"] <= metrics["latency_max"]
+    for r in results:  # the words only depend on the seed and the request ID
+        (word,) = simulator.random_words(r.request_id, 1)
+        assert r.breed == word % len(BREED_NAMES)
+
+
+def test_simulator_retries_until_the_subscription_is_funded():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    n = 3
+    account = get_account()
+    collectible, sub_id = _deploy_unfunded(account)
+    simulator = VRFSimulator(seed=5, retry_delay=0.1, max_attempts=50)
+
+    def top_up_after_a_retry():
+        deadline = time.monotonic() + 30
+        while simulator.metrics()["retried"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        fund_subscription(subscription_id=sub_id, link_amount=1)
+
+    top_up = threading.Thread(target=top_up_after_a_retry)
+    # Act
+    with simulator:
+        top_up.start()
+        results = mint_many(
+            collectible, account, n=n, is_set_uri=False, vrf_simulator=simulator
+        )
+        top_up.join()
+    metrics = simulator.metrics()
+    # Assert
+    assert all(r.ok for r in results)
+    assert metrics["retried"] >= 1 and metrics["failed"] == 0
+    assert metrics["fulfilled"] == n and metrics["queue_depth"] == 0
+
+
+def test_simulator_drops_a_request_after_the_attempt_cap():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    account = get_account()
+    collectible, _ = _deploy_unfunded(account)
+    simulator = VRFSimulator(seed=5, retry_delay=0.05, max_attempts=3)
+    collectible.createCollectible({"from": account}).wait(1)
+    # Act
+    simulator.drain(timeout=30)
+    metrics = simulator.metrics()
+    # Assert
+    assert metrics["retried"] == 2 and metrics["failed"] == 1
+    assert metrics["fulfilled"] == 0 and metrics["queue_depth"] == 0
@@ -0,0 +1,58 @@
+import pytest
+from brownie import AdvancedCollectible, config, network
+from scripts.advanced_collectible.create_collectible import mint_many
+from scripts.utils import (
+    BASE_FEE,
+    LOCAL_BLOCKCHAIN_ENV,
+    get_account,
+    get_contract,
+)
+from scripts.vrf_simulator import VRFSimulator, make_latency_model
+from scripts.vrf_subscription import (
+    DEFAULT_CALLBACK_GAS,
+    SubscriptionMonitor,
+    register_consumer,
+)
+
+
+def test_monitor_tops_up_before_running_out():
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    n = 6
+    account = get_account()
+    vrf = get_contract(contract_name="vrf_coordinator")
+    sub_id = vrf.createSubscription({"from": account}).events[0]["subId"]
+    # only enough for 2 fulfillments
+    vrf.fundSubscription(sub_id, int(2.5 * BASE_FEE), {"from": account}).wait(1)
+    collectible = AdvancedCollectible.deploy(
+        vrf.address,
+        sub_id,
+        config["networks"][network.show_active()]["key_hash"],
+        {"from": account},
+    )
+    register_consumer(contract_address=collectible.address, subscription_id=sub_id)
+    monitor = SubscriptionMonitor(
+        sub_id, lead_time=0, min_fulfillments=1, top_up_link=0.1, poll_interval=0.1
+    )
+    latency = make_latency_model("constant", mean=1.0)
+    # Act
+    with monitor, VRFSimulator(seed=1, latency=latency) as simulator:
+        results = mint_many(
+            collectible, account, n=n, is_set_uri=False, vrf_simulator=simulator
+        )
+    monitor.poll()
+    metrics = monitor.metrics()
+    # Assert
+    assert all(r.ok for r in results)
+    assert simulator.metrics()["failed"] == 0
+    assert metrics["requested"] == metrics["fulfilled"] == n
+    assert metrics["pending_requests"] == 0 and metrics["failed_callbacks"] == 0
+    assert metrics["top_ups"] >= 1
+    # the mock charges BASE_FEE + the used gas * GAS_PRICE_LINK
+    payment = metrics["link_per_fulfillment"]
+    assert BASE_FEE < payment < monitor.expected_payment
+    assert monitor.expected_payment == (
+        BASE_FEE + DEFAULT_CALLBACK_GAS * vrf.GAS_PRICE_LINK()
+    )
+    assert metrics["balance"] >= metrics["required_balance"]
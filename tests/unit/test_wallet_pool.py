@@ -0,0 +1,68 @@
+import threading
+import pytest
+from brownie import Wei, network
+from scripts.multi_collectible.deploy_and_mint import mint_many
+from scripts.utils import LOCAL_BLOCKCHAIN_ENV
+from scripts.wallet_pool import WalletPool, load_pool_accounts
+
+
+def test_wallet_pool_spreads_mints(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    n = 9
+    pay_wei = multi_collectible.getEntranceFee()
+    wallets = load_pool_accounts(3)
+    pool = WalletPool(wallets, min_balance="0.01 ether", target_balance="0.02 ether")
+    # the first chunk of every wallet waits for the other ones to hold a chunk too,
+    # so the spreading doesn't depend on the thread scheduling
+    all_started = threading.Barrier(len(wallets), timeout=60)
+    started = set()
+    minted = []  # a mint is worth 4, 2 or 1 token(s) depending on the breed
+
+    def mint_fn(account, size):
+        if account.address not in started:
+            started.add(account.address)
+            all_started.wait()
+        results = mint_many(multi_collectible, account, n=size, pay_wei=pay_wei)
+        minted.extend(results)
+        return results
+
+    # Act
+    summary = pool.mint(mint_fn, n=n, chunk_size=2, cost_per_mint=pay_wei)
+    # Assert
+    assert summary["succeeded"] == n and summary["keys"] == 3
+    assert sum(w["minted"] for w in summary["wallets"]) == n
+    # fresh keys start empty
+    assert all(w["funded"] >= Wei("0.02 ether") for w in summary["wallets"])
+    assert not any(w["isolated"] or w["errors"] for w in summary["wallets"])
+    owned = [
+        sum(multi_collectible.balanceOf(account, i) for i in range(3))
+        for account in wallets
+    ]
+    assert sum(owned) == sum(r.amount for r in minted if r.ok)
+    assert all(wallet["minted"] > 0 for wallet in summary["wallets"])  # barrier
+
+
+def test_wallet_pool_isolates_failing_wallet(multi_collectible):
+    # Arrange
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENV:
+        pytest.skip("unit testing only for local blockchain!")
+    n = 8
+    pay_wei = multi_collectible.getEntranceFee()
+    wallets = load_pool_accounts(3)
+    broken = wallets[0]
+    pool = WalletPool(wallets)
+
+    def mint_fn(account, size):
+        if account == broken:
+            raise ValueError("RPC error")
+        return mint_many(multi_collectible, account, n=size, pay_wei=pay_wei)
+
+    # Act
+    summary = pool.mint(mint_fn, n=n, chunk_size=1, cost_per_mint=pay_wei)
+    # Assert: every chunk of the broken wallet is minted by the other ones
+    assert summary["succeeded"] == n and summary["failed"] == 0
+    broken_report = summary["wallets"][0]
+    assert broken_report["minted"] == 0 and broken_report["errors"]
+    assert sum(w["minted"] for w in summary["wallets"][1:]) == n